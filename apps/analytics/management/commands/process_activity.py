@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.analytics.rollups import process_activity
+
+
+class Command(BaseCommand):
+    help = "Folds the analytics change log into the course and instructor daily rollups."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--loop', action='store_true', help="Keep processing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        while True:
+            processed = 0
+            while True:
+                consumed = process_activity(batch_size=options['batch_size'])
+                processed += consumed
+                if consumed < options['batch_size']:
+                    break
+            if processed or not options['loop']:
+                self.stdout.write(f"Processed {processed} change log entr{'y' if processed == 1 else 'ies'}.")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('courses', '0006_catalogue_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActivityEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollments', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reviews', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('watch_minutes', models.IntegerField(default=0)),
+                ('course_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CourseDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollments', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reviews', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('watch_minutes', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.course')),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='course_daily_stats', to='courses.instructor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['instructor', 'day'], name='coursedaily_instr_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('course', 'day'), name='course_daily_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InstructorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollments', models.IntegerField(default=0)),
+                ('completions', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reviews', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('watch_minutes', models.IntegerField(default=0)),
+                ('day', models.DateField()),
+                ('instructor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='courses.instructor')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('instructor', 'day'), name='instructor_daily_stats_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,66 @@
+from django.db import models
+
+from apps.courses.models import Course, Instructor
+
+# metric columns shared by the change log and both rollup tables
+METRICS = ('enrollments', 'completions', 'revenue', 'reviews', 'rating_sum', 'watch_minutes')
+
+
+class Metrics(models.Model):
+    enrollments = models.IntegerField(default=0)
+    completions = models.IntegerField(default=0)
+    # course price after discount at the time of enrollment
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reviews = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    watch_minutes = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class ActivityEvent(Metrics):
+    """
+    Change log of metric deltas, appended by signals and the heartbeat flush
+    and folded into the daily rollups by the ``process_activity`` command.
+    ``day`` is the day the activity belongs to (the enrollment's, the
+    review's), so removing a row corrects the day it was counted on.
+    """
+    # a plain id keeps the log writable while the course is being deleted; such events are dropped
+    course_id = models.BigIntegerField()
+    day = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Activity {self.course_id} on {self.day}"
+
+
+class CourseDailyStats(Metrics):
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='daily_stats')
+    # copied from the course so an instructor's per-course breakdown needs no join
+    instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE, related_name='course_daily_stats')
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'day'], name='course_daily_stats_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['instructor', 'day'], name='coursedaily_instr_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"Course {self.course_id} on {self.day}"
+
+
+class InstructorDailyStats(Metrics):
+    instructor = models.ForeignKey(Instructor, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['instructor', 'day'], name='instructor_daily_stats_unique'),
+        ]
+
+    def __str__(self):
+        return f"Instructor {self.instructor_id} on {self.day}"
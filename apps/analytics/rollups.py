@@ -0,0 +1,261 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+from apps.analytics.models import METRICS, ActivityEvent, CourseDailyStats, InstructorDailyStats
+from apps.courses.cache import bump_version
+from apps.courses.models import Course, CourseStats, Instructor
+
+CENT = Decimal('0.01')
+ENROLLMENTS, COMPLETIONS, REVENUE, REVIEWS, RATING_SUM, WATCH_MINUTES = range(len(METRICS))
+
+
+def zero():
+    return [0] * len(METRICS)
+
+
+def log_activity(events):
+    """Appends ``(course_id, day, {metric: delta})`` entries to the change log in one INSERT."""
+    ActivityEvent.objects.bulk_create([
+        ActivityEvent(course_id=course_id, day=day, **deltas)
+        for course_id, day, deltas in events if any(deltas.values())
+    ])
+
+
+def process_activity(batch_size=5000):
+    """
+    Folds up to ``batch_size`` change log entries into the course and
+    instructor daily rollups, one bulk upsert each, and refreshes the
+    lifetime totals of the instructors involved. Returns the number of log
+    entries consumed. Like ``flush_heartbeats`` it expects one worker per
+    database: rollup rows are read, added to and written back.
+    """
+    with transaction.atomic():
+        log = ActivityEvent.objects.order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            log = log.select_for_update(skip_locked=True)
+        rows = list(log.values_list('id', 'course_id', 'day', *METRICS)[:batch_size])
+        if not rows:
+            return 0
+
+        by_course = defaultdict(zero)
+        for _, course_id, day, *deltas in rows:
+            totals = by_course[(course_id, day)]
+            for index, delta in enumerate(deltas):
+                totals[index] += delta
+
+        # entries of deleted courses are dropped
+        instructors = dict(
+            Course.objects.filter(id__in={course_id for course_id, _ in by_course}).values_list('id', 'instructor_id')
+        )
+        by_course = {key: deltas for key, deltas in by_course.items() if key[0] in instructors}
+        by_instructor = defaultdict(zero)
+        for (course_id, day), deltas in by_course.items():
+            totals = by_instructor[(instructors[course_id], day)]
+            for index, delta in enumerate(deltas):
+                totals[index] += delta
+
+        accumulate(CourseDailyStats, 'course', by_course, extra=lambda course_id: {'instructor_id': instructors[course_id]})
+        accumulate(InstructorDailyStats, 'instructor', by_instructor)
+        refresh_instructor_totals({instructor_id for instructor_id, _ in by_instructor})
+        ActivityEvent.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return len(rows)
+
+
+def accumulate(model, owner, deltas, extra=None):
+    """Adds ``{(owner_id, day): [metric deltas]}`` to the rollup rows of ``model``, creating missing ones."""
+    if not deltas:
+        return
+    existing = {
+        (row[0], row[1]): row[2:]
+        for row in model.objects.filter(
+            **{f'{owner}_id__in': {owner_id for owner_id, _ in deltas}, 'day__in': {day for _, day in deltas}}
+        ).values_list(f'{owner}_id', 'day', *METRICS)
+    }
+    rows = []
+    for (owner_id, day), delta in deltas.items():
+        current = existing.get((owner_id, day), zero())
+        values = {metric: old + change for metric, old, change in zip(METRICS, current, delta)}
+        rows.append(model(**{f'{owner}_id': owner_id}, day=day, **values, **(extra(owner_id) if extra else {})))
+
+    update_fields = list(METRICS) + (['instructor'] if extra else [])
+    model.objects.bulk_create(rows, update_conflicts=True, unique_fields=[owner, 'day'], update_fields=update_fields)
+
+
+def move_course(course_id, previous_instructor_id, instructor_id):
+    """
+    Hands a course's daily rows over to its new instructor: they are
+    relabelled, subtracted from the previous instructor's daily rollups (rows
+    left at zero are deleted) and added to the new one's, and both
+    instructors' totals are refreshed.
+    """
+    with transaction.atomic():
+        rows = CourseDailyStats.objects.filter(course_id=course_id)
+        moved = {}
+        for day, *values in rows.values_list('day', *METRICS):
+            moved[(previous_instructor_id, day)] = [-value for value in values]
+            moved[(instructor_id, day)] = values
+        rows.update(instructor_id=instructor_id)
+        accumulate(InstructorDailyStats, 'instructor', moved)
+        # days the course was all the previous instructor had are left empty
+        InstructorDailyStats.objects.filter(
+            instructor_id=previous_instructor_id, day__in=[day for owner_id, day in moved if owner_id == instructor_id],
+            **{metric: 0 for metric in METRICS},
+        ).delete()
+        refresh_instructor_totals({previous_instructor_id, instructor_id})
+
+
+def refresh_instructor_totals(instructor_ids):
+    """
+    Sets ``Instructor.total_students`` (enrollments over all their courses)
+    and ``Instructor.rating`` (mean of all their reviews) from the
+    denormalized CourseStats rows, one aggregate for all instructors.
+    """
+    if not instructor_ids:
+        return
+    totals = {
+        row['course__instructor_id']: row
+        for row in CourseStats.objects.filter(course__instructor_id__in=instructor_ids)
+        .values('course__instructor_id')
+        .annotate(students=Sum('students_count'), reviews=Sum('reviews_count'), rating_sum=Sum('rating_sum'))
+    }
+    instructors = []
+    for instructor_id in instructor_ids:
+        row = totals.get(instructor_id, {'students': 0, 'reviews': 0, 'rating_sum': 0})
+        rating = Decimal(row['rating_sum']) / row['reviews'] if row['reviews'] else Decimal(0)
+        instructors.append(Instructor(pk=instructor_id, total_students=row['students'], rating=rating.quantize(CENT)))
+    Instructor.objects.bulk_update(instructors, ['total_students', 'rating'], batch_size=500)
+    for instructor_id in instructor_ids:
+        bump_version('instructor', instructor_id)
+
+
+def backfill(course_ids=None, batch_size=200):
+    """
+    Rebuilds the daily rollups from Enrollment, CourseReview and
+    LessonProgress in batches of courses, replacing their rollup rows and
+    discarding their pending change log entries. Revenue is the sum of the
+    amounts the enrollments paid. LessonProgress has no watch history, so watch minutes
+    are put on the day the lesson was completed, or the enrollment day.
+    Returns the number of courses rebuilt.
+    """
+    from apps.enrolments.models import Enrollment, LessonProgress
+    from apps.reviews.models import CourseReview
+
+    courses = Course.objects.order_by('id').values_list('id', 'instructor_id')
+    if course_ids is not None:
+        courses = courses.filter(id__in=course_ids)
+
+    rebuilt = 0
+    instructor_ids = set()
+    last_id = 0
+    while True:
+        batch = list(courses.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        ids = [row[0] for row in batch]
+
+        with transaction.atomic():
+            totals = defaultdict(zero)
+            enrollments = (
+                Enrollment.objects.filter(course_id__in=ids).annotate(day=TruncDate('enrolled_at'))
+                .values('course_id', 'day').annotate(n=Count('id'), paid=Coalesce(Sum('amount_paid'), Decimal(0)))
+                .values_list('course_id', 'day', 'n', 'paid')
+            )
+            for course_id, day, n, paid in enrollments:
+                totals[(course_id, day)][ENROLLMENTS] += n
+                totals[(course_id, day)][REVENUE] += paid
+
+            completions = (
+                Enrollment.objects.filter(course_id__in=ids, status='completed', completed_at__isnull=False)
+                .annotate(day=TruncDate('completed_at'))
+                .values('course_id', 'day').annotate(n=Count('id')).values_list('course_id', 'day', 'n')
+            )
+            for course_id, day, n in completions:
+                totals[(course_id, day)][COMPLETIONS] += n
+
+            reviews = (
+                CourseReview.objects.filter(course_id__in=ids).annotate(day=TruncDate('created_at'))
+                .values('course_id', 'day').annotate(n=Count('id'), rating=Sum('rating'))
+                .values_list('course_id', 'day', 'n', 'rating')
+            )
+            for course_id, day, n, rating in reviews:
+                totals[(course_id, day)][REVIEWS] += n
+                totals[(course_id, day)][RATING_SUM] += rating
+
+            watched = (
+                LessonProgress.objects.filter(enrollment__course_id__in=ids)
+                .annotate(day=TruncDate(Coalesce('completed_at', 'enrollment__enrolled_at')))
+                .values('enrollment__course_id', 'day').annotate(minutes=Sum('watch_time_minutes'))
+                .values_list('enrollment__course_id', 'day', 'minutes')
+            )
+            for course_id, day, minutes in watched:
+                totals[(course_id, day)][WATCH_MINUTES] += minutes
+
+            instructors = {row[0]: row[1] for row in batch}
+            ActivityEvent.objects.filter(course_id__in=ids).delete()
+            CourseDailyStats.objects.filter(course_id__in=ids).delete()
+            CourseDailyStats.objects.bulk_create([
+                CourseDailyStats(
+                    course_id=course_id, instructor_id=instructors[course_id], day=day, **dict(zip(METRICS, values)),
+                )
+                for (course_id, day), values in totals.items()
+            ], batch_size=1000)
+
+        instructor_ids.update(instructors.values())
+        rebuilt += len(ids)
+        last_id = ids[-1]
+
+    if course_ids is None:
+        instructor_ids = set(Instructor.objects.values_list('id', flat=True))
+    rebuild_instructor_rollups(instructor_ids)
+    refresh_instructor_totals(instructor_ids)
+    return rebuilt
+
+
+def rebuild_instructor_rollups(instructor_ids):
+    """Recomputes the instructor daily rows as the sum of their courses' daily rows."""
+    with transaction.atomic():
+        InstructorDailyStats.objects.filter(instructor_id__in=instructor_ids).delete()
+        sums = (
+            CourseDailyStats.objects.filter(instructor_id__in=instructor_ids)
+            .values('instructor_id', 'day').annotate(**{f'total_{metric}': Sum(metric) for metric in METRICS})
+        )
+        InstructorDailyStats.objects.bulk_create([
+            InstructorDailyStats(
+                instructor_id=row['instructor_id'], day=row['day'],
+                **{metric: row[f'total_{metric}'] for metric in METRICS},
+            )
+            for row in sums
+        ], batch_size=1000)
+
+
+def dashboard(instructor_id, start, end):
+    """
+    An instructor's daily series and per-course totals between ``start`` and
+    ``end`` (inclusive), read from the rollups only: two indexed range scans.
+    """
+    daily = list(
+        InstructorDailyStats.objects.filter(instructor_id=instructor_id, day__gte=start, day__lte=end)
+        .order_by('day').values('day', *METRICS)
+    )
+    courses = list(
+        CourseDailyStats.objects.filter(instructor_id=instructor_id, day__gte=start, day__lte=end)
+        .values('course_id', 'course__title')
+        .annotate(**{f'total_{metric}': Sum(metric) for metric in METRICS})
+        .order_by('-total_revenue', 'course_id')
+    )
+    totals = dict(zip(METRICS, zero()))
+    for row in daily:
+        for metric in METRICS:
+            totals[metric] += row[metric]
+    return {
+        'totals': totals,
+        'daily': daily,
+        'courses': [
+            {'course': row['course_id'], 'title': row['course__title'], **{metric: row[f'total_{metric}'] for metric in METRICS}}
+            for row in courses
+        ],
+    }
@@ -0,0 +1,36 @@
+from rest_framework import serializers
+
+from core.middleware import TimedSerializerMixin
+
+
+class MetricsSerializer(serializers.Serializer):
+    enrollments = serializers.IntegerField()
+    completions = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    reviews = serializers.IntegerField()
+    average_rating = serializers.SerializerMethodField()
+    watch_minutes = serializers.IntegerField()
+
+    @staticmethod
+    def get_average_rating(row):
+        return round(row['rating_sum'] / row['reviews'], 2) if row['reviews'] else None
+
+
+class DailyMetricsSerializer(MetricsSerializer):
+    day = serializers.DateField()
+
+
+class CourseMetricsSerializer(MetricsSerializer):
+    course = serializers.IntegerField()
+    title = serializers.CharField()
+
+
+class InstructorDashboardSerializer(TimedSerializerMixin, serializers.Serializer):
+    instructor = serializers.IntegerField()
+    total_students = serializers.IntegerField()
+    rating = serializers.DecimalField(max_digits=3, decimal_places=2)
+    start = serializers.DateField()
+    end = serializers.DateField()
+    totals = MetricsSerializer()
+    daily = DailyMetricsSerializer(many=True)
+    courses = CourseMetricsSerializer(many=True)
@@ -0,0 +1,96 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.analytics.rollups import log_activity, move_course
+from apps.courses.models import Course
+from apps.enrolments.models import Enrollment
+from apps.reviews.models import CourseReview
+
+
+def completion_day(status, completed_at):
+    # only completed enrollments with a completion date are counted, as in the backfill
+    if status == 'completed' and completed_at is not None:
+        return timezone.localdate(completed_at)
+    return None
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_completion(sender, instance, raw=False, **kwargs):
+    instance._previous_completion = None
+    if instance.pk and not raw:
+        previous = Enrollment.objects.filter(pk=instance.pk).values_list('status', 'completed_at').first()
+        if previous:
+            instance._previous_completion = completion_day(*previous)
+
+
+@receiver(post_save, sender=Enrollment)
+def log_enrollment(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    events = []
+    if created:
+        day = timezone.localdate(instance.enrolled_at)
+        events.append((instance.course_id, day, {'enrollments': 1, 'revenue': instance.amount_paid or 0}))
+    previous = getattr(instance, '_previous_completion', None)
+    current = completion_day(instance.status, instance.completed_at)
+    if previous != current:
+        if previous is not None:
+            events.append((instance.course_id, previous, {'completions': -1}))
+        if current is not None:
+            events.append((instance.course_id, current, {'completions': 1}))
+    log_activity(events)
+
+
+@receiver(post_delete, sender=Enrollment)
+def log_unenrollment(sender, instance, **kwargs):
+    events = [(
+        instance.course_id, timezone.localdate(instance.enrolled_at),
+        {'enrollments': -1, 'revenue': -(instance.amount_paid or 0)},
+    )]
+    completed = completion_day(instance.status, instance.completed_at)
+    if completed is not None:
+        events.append((instance.course_id, completed, {'completions': -1}))
+    log_activity(events)
+
+
+@receiver(post_save, sender=CourseReview)
+def log_review(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    day = timezone.localdate(instance.created_at)
+    # (course_id, rating) before the save, remembered by apps.reviews.signals
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        log_activity([(instance.course_id, day, {'reviews': 1, 'rating_sum': instance.rating})])
+        return
+    previous_course_id, previous_rating = previous
+    if previous_course_id != instance.course_id:
+        log_activity([
+            (previous_course_id, day, {'reviews': -1, 'rating_sum': -previous_rating}),
+            (instance.course_id, day, {'reviews': 1, 'rating_sum': instance.rating}),
+        ])
+    else:
+        log_activity([(instance.course_id, day, {'rating_sum': instance.rating - previous_rating})])
+
+
+@receiver(post_delete, sender=CourseReview)
+def log_review_removal(sender, instance, **kwargs):
+    log_activity([(instance.course_id, timezone.localdate(instance.created_at), {'reviews': -1, 'rating_sum': -instance.rating})])
+
+
+@receiver(pre_save, sender=Course)
+def remember_instructor(sender, instance, raw=False, **kwargs):
+    instance._previous_instructor_id = None
+    if instance.pk and not raw:
+        instance._previous_instructor_id = (
+            Course.objects.filter(pk=instance.pk).values_list('instructor_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Course)
+def move_course_rollups(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_instructor_id', None)
+    if raw or created or previous is None or previous == instance.instructor_id:
+        return
+    move_course(instance.pk, previous, instance.instructor_id)
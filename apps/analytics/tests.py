@@ -0,0 +1,104 @@
+from django.contrib.auth.models import User
+from django.db.models import Q, Sum
+
+from apps.analytics import urls as analytics_urls
+from apps.analytics.models import METRICS, CourseDailyStats, InstructorDailyStats
+from apps.analytics.rollups import backfill, process_activity
+from apps.courses.models import Course, CourseStats, Instructor
+from apps.enrolments.models import Enrollment
+from apps.reviews.models import CourseReview
+from core.testing import CatalogueTestCase, QueryBudgetMixin
+
+# a rollup row with every metric at zero carries nothing; incremental processing can leave them behind
+EMPTY = Q(**{metric: 0 for metric in METRICS})
+
+
+class QueryBudgetTests(QueryBudgetMixin, CatalogueTestCase):
+    urls = analytics_urls
+
+    def url_kwargs(self):
+        return {'pk': self.course.instructor_id}
+
+
+class RollupTests(CatalogueTestCase):
+
+    def rollups(self):
+        """Both rollup tables without empty rows, in a comparable form."""
+        return (
+            sorted(CourseDailyStats.objects.exclude(EMPTY).values_list('course_id', 'instructor_id', 'day', *METRICS)),
+            sorted(InstructorDailyStats.objects.exclude(EMPTY).values_list('instructor_id', 'day', *METRICS)),
+        )
+
+    def assertMatchesBackfill(self):
+        while process_activity():
+            pass
+        incremental = self.rollups()
+        backfill()
+        self.assertEqual(incremental, self.rollups())
+
+    def enroll(self, username, course):
+        return Enrollment.objects.create(student=User.objects.create(username=username), course=course)
+
+    def test_enrollments_refunds_and_reviews(self):
+        first = self.enroll('first', self.course)
+        # a price change between enrolling and the refund must not change what is taken back
+        self.course.price += 25
+        self.course.save()
+        second = self.enroll('second', self.course)
+        self.assertNotEqual(first.amount_paid, second.amount_paid)
+        CourseReview.objects.create(course=self.course, student=second.student, rating=4, title='Good', comment='...')
+        first.delete()
+        self.assertMatchesBackfill()
+
+        # the refund takes back what ``first`` paid, not today's price
+        revenue = CourseDailyStats.objects.get(course=self.course, day=second.enrolled_at.date()).revenue
+        self.assertEqual(revenue, Enrollment.objects.filter(
+            course=self.course, enrolled_at__date=second.enrolled_at.date(),
+        ).aggregate(paid=Sum('amount_paid'))['paid'])
+
+    def test_backfill_keeps_the_price_paid(self):
+        enrollment = self.enroll('early', self.course)
+        paid = enrollment.amount_paid
+        while process_activity():
+            pass
+        self.course.price *= 2
+        self.course.save()
+        backfill(course_ids=[self.course.pk])
+        self.assertEqual(
+            CourseDailyStats.objects.filter(course=self.course).aggregate(revenue=Sum('revenue'))['revenue'],
+            Enrollment.objects.filter(course=self.course).aggregate(paid=Sum('amount_paid'))['paid'],
+        )
+        enrollment.refresh_from_db()
+        self.assertEqual(enrollment.amount_paid, paid)
+
+    def test_reassigning_a_course_moves_its_rollups(self):
+        previous = self.course.instructor
+        other = Instructor.objects.exclude(pk=previous.pk).first()
+        self.enroll('before-move', self.course)
+        while process_activity():
+            pass
+
+        self.course.instructor = other
+        self.course.save()
+        self.assertFalse(CourseDailyStats.objects.filter(course=self.course, instructor=previous).exists())
+        self.assertFalse(InstructorDailyStats.objects.filter(EMPTY).exists())
+        for instructor in (previous, other):
+            instructor.refresh_from_db()
+            self.assertEqual(
+                instructor.total_students,
+                CourseStats.objects.filter(course__instructor=instructor).aggregate(n=Sum('students_count'))['n'] or 0,
+            )
+
+        self.enroll('after-move', self.course)
+        self.assertMatchesBackfill()
+
+    def test_instructor_with_a_single_course_is_left_without_rows(self):
+        lone = Instructor.objects.create(user=User.objects.create(username='lone'), bio='...', profile_image='https://example.com/a.png', expertise='Go')
+        Course.objects.filter(pk=self.course.pk).update(instructor=lone)
+        backfill()
+        self.assertTrue(InstructorDailyStats.objects.filter(instructor=lone).exists())
+
+        self.course.refresh_from_db()
+        self.course.instructor = Instructor.objects.exclude(pk=lone.pk).first()
+        self.course.save()
+        self.assertFalse(InstructorDailyStats.objects.filter(instructor=lone).exists())
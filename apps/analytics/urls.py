@@ -0,0 +1,9 @@
+from django.urls import path
+
+from apps.analytics.views import InstructorDashboardAPIView
+
+app_name = 'analytics'
+
+urlpatterns = [
+    path('instructors/<int:pk>/dashboard/', InstructorDashboardAPIView.as_view(), name='instructor-dashboard'),
+]
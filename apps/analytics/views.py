@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.analytics.rollups import dashboard
+from apps.analytics.serializer import InstructorDashboardSerializer
+from apps.courses.models import Instructor
+from core.openapi import openapi, swagger_auto_schema
+
+
+class InstructorDashboardAPIView(APIView):
+    # the instructor, then the two rollup range scans
+    query_budget = 3
+    default_days = 30
+    max_days = 366
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('start', openapi.IN_QUERY, description="Boshlanish sanasi, YYYY-MM-DD (standart: oxirgi 30 kun)", type=openapi.TYPE_STRING),
+            openapi.Parameter('end', openapi.IN_QUERY, description="Tugash sanasi, YYYY-MM-DD (standart: bugun)", type=openapi.TYPE_STRING),
+        ],
+        responses={200: InstructorDashboardSerializer},
+    )
+    def get(self, request, pk):
+        start, end = self.get_range(request)
+        instructor = Instructor.objects.filter(pk=pk).values('id', 'total_students', 'rating').first()
+        if instructor is None:
+            return Response({"error": "Instructor not found"}, status=404)
+
+        data = {
+            'instructor': instructor['id'], 'total_students': instructor['total_students'],
+            'rating': instructor['rating'], 'start': start, 'end': end, **dashboard(pk, start, end),
+        }
+        return Response(InstructorDashboardSerializer(data).data)
+
+    def get_range(self, request):
+        try:
+            end = self.parse(request, 'end') or timezone.localdate()
+            start = self.parse(request, 'start') or end - timedelta(days=self.default_days - 1)
+        except ValueError:
+            raise ValidationError({"date": "Dates must be valid and in YYYY-MM-DD format."})
+        if start > end:
+            raise ValidationError({"start": "start must not be after end."})
+        if (end - start).days >= self.max_days:
+            raise ValidationError({"start": f"The range can span at most {self.max_days} days."})
+        return start, end
+
+    @staticmethod
+    def parse(request, name):
+        value = request.query_params.get(name)
+        if not value:
+            return None
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        return day
@@ -0,0 +1,129 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from apps.courses.cache import course_deps, course_summary_cache, curriculum_cache, fieldset_key, get_versions
+from apps.courses.concurrency import run_concurrently
+from apps.courses.facets import course_facets_cache, parse_facets
+from apps.courses.listing import STATS_FIELDS
+from apps.courses.models import Course, CourseStats
+from apps.courses.renderers import FastJSONRenderer
+from apps.courses.serializer import CourseDetailSerializer, CurriculumLessonSerializer, CurriculumSerializer
+from apps.courses.views import CourseListAPIView
+from apps.reviews.models import CourseReview
+from apps.reviews.serializer import RECENT_REVIEWS, RatingSummarySerializer, RecentReviewSerializer
+
+
+def json_response(data, status=200):
+    # rendered by DRF's JSONRenderer, so the bytes match the synchronous APIViews
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json', status=status)
+
+
+class AsyncCourseListView(View):
+    """``CourseListAPIView`` on the async ORM: same filters, orderings, cursors, facets and payload."""
+
+    replica_reads = True
+
+    async def get(self, request):
+        request = Request(request)
+        list_view = CourseListAPIView()
+        facets = request.query_params.get('facets')
+        if facets is not None:
+            try:
+                entry, cache_status = await sync_to_async(list_view.facets_entry)(request, parse_facets(facets))
+            except ValidationError as exc:
+                return json_response(exc.detail, status=400)
+            return course_facets_cache.http_response(request, entry, cache_status)
+
+        try:
+            # the category filter may rebuild the in-memory category tree, which queries
+            courses, serializer_class, paginator, fields = await sync_to_async(list_view.filter_courses)(request)
+            page = await paginator.apaginate_queryset(courses, request)
+        except ValidationError as exc:
+            return json_response(exc.detail, status=400)
+
+        if not page and paginator.is_first_page:
+            return json_response({"message": "Hech qanday kurs topilmadi"}, status=404)
+
+        data = list_view.page_data(page, serializer_class, paginator, fields)
+        return HttpResponse(FastJSONRenderer().render(data), content_type='application/json')
+
+
+class AsyncCourseDetailView(View):
+    """
+    Course detail plus a reviews summary. The course, its stats and its
+    latest reviews don't depend on each other, so they are loaded at the
+    same time on separate connections.
+    """
+
+    replica_reads = True
+
+    async def get(self, request, pk):
+        try:
+            fields = CourseDetailSerializer.parse_fieldset(request.GET)
+        except ValidationError as exc:
+            return json_response(exc.detail, status=400)
+        cache_key = pk if fields is None else f"{pk}:{fieldset_key(fields)}"
+        entry = await sync_to_async(course_summary_cache.get)(cache_key)
+        if entry is not None:
+            return course_summary_cache.http_response(request, entry, 'HIT')
+
+        courses = Course.objects.select_related('category', 'instructor__user')
+        if fields is not None:
+            # the stats row is loaded on its own below
+            courses = CourseDetailSerializer.sparse_queryset(Course.objects.all(), fields - set(STATS_FIELDS))
+        course_version = await sync_to_async(get_versions)({'course': pk})
+        try:
+            course, stats, reviews = await run_concurrently(
+                lambda: courses.get(pk=pk),
+                lambda: CourseStats.objects.filter(pk=pk).first(),
+                lambda: list(
+                    CourseReview.objects.filter(course_id=pk).select_related('student')
+                    .order_by('-created_at', '-id')[:RECENT_REVIEWS]
+                ),
+            )
+        except Course.DoesNotExist:
+            return json_response({"error": "Course not found"}, status=404)
+
+        course.stats = stats
+        body = CourseDetailSerializer(course, context={'fields': fields}).data
+        body['reviews_summary'] = {
+            'count': stats.reviews_count if stats else 0,
+            'average_rating': stats.average_rating if stats else 0.0,
+            'histogram': RatingSummarySerializer.get_histogram(stats) if stats else {},
+            'recent': RecentReviewSerializer(reviews, many=True).data,
+        }
+
+        deps = course_deps(course)
+        versions = await sync_to_async(get_versions)(deps)
+        entry = await sync_to_async(course_summary_cache.set)(cache_key, deps, body, versions={**versions, **course_version})
+        return course_summary_cache.http_response(request, entry, 'MISS')
+
+
+class AsyncCourseCurriculumView(View):
+    """``CourseCurriculumAPIView`` on the async ORM, sharing its cache entries."""
+
+    replica_reads = True
+
+    async def get(self, request, pk):
+        include = sorted(
+            set(filter(None, request.GET.get('include', '').split(','))) & set(CurriculumLessonSerializer.heavy_fields)
+        )
+        cache_key = f"{pk}:{','.join(include)}"
+        entry = await sync_to_async(curriculum_cache.get)(cache_key)
+        if entry is not None:
+            return curriculum_cache.http_response(request, entry, 'HIT')
+
+        deps = {'curriculum': pk}
+        versions = await sync_to_async(get_versions)(deps)
+        try:
+            course = await CurriculumSerializer.setup_eager_loading(Course.objects.all(), include).aget(pk=pk)
+        except Course.DoesNotExist:
+            return json_response({"error": "Course not found"}, status=404)
+
+        body = CurriculumSerializer(course, context={'include': include}).data
+        entry = await sync_to_async(curriculum_cache.set)(cache_key, deps, body, versions=versions)
+        return curriculum_cache.http_response(request, entry, 'MISS')
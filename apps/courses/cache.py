@@ -0,0 +1,133 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from core.db_router import read_from_primary
+
+ENTRY_TIMEOUT = 60 * 60
+
+
+def _version_key(kind, pk):
+    return f'version:{kind}:{pk}'
+
+
+def get_versions(deps):
+    """
+    Current version of every ``{kind: pk}`` dependency.
+
+    A missing version (never bumped, or evicted) is initialised to the
+    current time rather than 0, so a version can never go back to a value an
+    older cache entry was stored under.
+    """
+    keys = {kind: _version_key(kind, pk) for kind, pk in deps.items()}
+    found = cache.get_many(keys.values())
+    versions = {}
+    for kind, key in keys.items():
+        if key not in found:
+            cache.add(key, time.time_ns(), timeout=None)
+            found[key] = cache.get(key)
+        versions[kind] = found[key]
+    return versions
+
+
+def bump_version(kind, pk):
+    key = _version_key(kind, pk)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+class VersionedResponseCache:
+    """
+    Caches a response body together with the versions of everything it was
+    built from. An entry is only served while all of those versions are
+    unchanged, so writers invalidate it by bumping a version instead of
+    having to know which cache keys depend on the object.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def _entry_key(self, pk):
+        return f'{self.name}:{pk}'
+
+    def get(self, pk):
+        entry = cache.get(self._entry_key(pk))
+        if entry is not None and get_versions(entry['deps']) != entry['versions']:
+            entry = None
+        self.record(hit=entry is not None)
+        if entry is None:
+            # the caller builds the entry next: from a lagging replica it would be stored
+            # under the post-write versions and served stale to everyone until it expires
+            read_from_primary()
+        return entry
+
+    def set(self, pk, deps, body, versions=None):
+        if versions is None:
+            versions = get_versions(deps)
+        fingerprint = ':'.join(f'{kind}={versions[kind]}' for kind in sorted(versions))
+        etag = quote_etag(hashlib.sha1(f'{self.name}:{pk}:{fingerprint}'.encode()).hexdigest()[:20])
+        entry = {'deps': deps, 'versions': versions, 'etag': etag, 'body': body}
+        cache.set(self._entry_key(pk), entry, ENTRY_TIMEOUT)
+        return entry
+
+    def record(self, hit):
+        key = f'{self.name}:{"hits" if hit else "misses"}'
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, 1, timeout=None)
+
+    def metrics(self):
+        counts = cache.get_many([f'{self.name}:hits', f'{self.name}:misses'])
+        hits, misses = counts.get(f'{self.name}:hits', 0), counts.get(f'{self.name}:misses', 0)
+        total = hits + misses
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+    @staticmethod
+    def not_modified(request, entry):
+        header = request.headers.get('If-None-Match')
+        if not header or entry is None:
+            return False
+        etags = parse_etags(header)
+        return '*' in etags or entry['etag'] in etags
+
+    def response(self, request, entry, cache_status):
+        headers = {'ETag': entry['etag'], 'X-Cache': cache_status}
+        if self.not_modified(request, entry):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(entry['body'], headers=headers)
+
+    def http_response(self, request, entry, cache_status):
+        """``response`` for plain (async) Django views, rendered the same way DRF would."""
+        headers = {'ETag': entry['etag'], 'X-Cache': cache_status}
+        if self.not_modified(request, entry):
+            return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return HttpResponse(JSONRenderer().render(entry['body']), content_type='application/json', headers=headers)
+
+
+course_detail_cache = VersionedResponseCache('course-detail')
+# the async detail also carries a reviews summary, so it is cached apart
+course_summary_cache = VersionedResponseCache('course-detail-summary')
+curriculum_cache = VersionedResponseCache('course-curriculum')
+
+
+def fieldset_key(fields):
+    """Short, order-independent cache key part for a ``fields=`` / ``exclude=`` selection."""
+    return hashlib.sha1(','.join(sorted(fields)).encode()).hexdigest()[:16]
+
+
+def course_deps(course):
+    return {
+        'course': course.pk,
+        'instructor': course.instructor_id,
+        'user': course.instructor.user_id,
+        'category': course.category_id,
+    }
@@ -0,0 +1,28 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def _in_own_thread(query):
+    def run():
+        try:
+            return query()
+        finally:
+            # the worker thread keeps its connection only as long as CONN_MAX_AGE allows
+            close_old_connections()
+    return sync_to_async(run, thread_sensitive=False)
+
+
+async def run_concurrently(*queries):
+    """
+    Runs blocking ORM callables at the same time and returns their results in order.
+
+    The async ORM (``aget``, ``afirst``...) runs every query of a request on
+    the same thread, one after another, so gathering those calls overlaps
+    nothing. Here each callable gets a thread and therefore a database
+    connection of its own, so independent lookups really wait on the
+    database in parallel. They don't share a transaction, so only use it for
+    reads that don't need one snapshot.
+    """
+    return await asyncio.gather(*(_in_own_thread(query)() for query in queries))
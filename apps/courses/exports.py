@@ -0,0 +1,111 @@
+import csv
+import datetime
+import io
+import zlib
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.courses.models import Course
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _enrollments():
+    from apps.enrolments.models import Enrollment
+    return Enrollment.objects.all()
+
+
+def _progress():
+    from apps.enrolments.models import LessonProgress
+    return LessonProgress.objects.all()
+
+
+# name -> (queryset factory, exported columns); ``id`` always comes first and is the resume cursor
+DATASETS = {
+    'courses': (Course.objects.all, [
+        'id', 'title', 'slug', 'instructor_id', 'category_id', 'level', 'status', 'language', 'price',
+        'discount_percentage', 'final_price_value', 'duration_hours', 'is_featured', 'created_at', 'updated_at',
+        'stats__students_count', 'stats__reviews_count', 'stats__average_rating', 'stats__total_lessons',
+    ]),
+    'enrollments': (_enrollments, [
+        'id', 'student_id', 'course_id', 'status', 'progress_percentage', 'completed_lessons',
+        'enrolled_at', 'completed_at',
+    ]),
+    'progress': (_progress, [
+        'id', 'enrollment_id', 'lesson_id', 'is_completed', 'watch_time_minutes', 'completed_at',
+    ]),
+}
+
+
+def header_name(column):
+    return column.replace('stats__', '')
+
+
+def iter_rows(dataset, after=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yields lists of value tuples, one list per chunk. Every chunk is its own
+    ``id > last`` query, so no cursor stays open between chunks, memory is
+    bounded by ``chunk_size`` and an export can resume from the last id seen.
+    """
+    factory, columns = DATASETS[dataset]
+    queryset = factory().order_by('id').values_list(*columns)
+    last_id = after
+    while True:
+        rows = list(queryset.filter(id__gt=last_id)[:chunk_size])
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+_json = DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def _csv_value(value):
+    # same text as the NDJSON export and the API
+    if isinstance(value, (datetime.date, datetime.time)):
+        return _json.default(value)
+    return value
+
+
+def encode_csv(dataset, chunks, header=True):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow([header_name(column) for column in DATASETS[dataset][1]])
+    for rows in chunks:
+        writer.writerows([_csv_value(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def encode_ndjson(dataset, chunks):
+    names = [header_name(column) for column in DATASETS[dataset][1]]
+    for rows in chunks:
+        yield ''.join(_json.encode(dict(zip(names, row))) + '\n' for row in rows).encode('utf-8')
+
+
+def gzip_stream(parts):
+    compressor = zlib.compressobj(wbits=31)  # 16 + MAX_WBITS: gzip container
+    for part in parts:
+        compressed = compressor.compress(part)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(dataset, fmt, after=0, chunk_size=DEFAULT_CHUNK_SIZE, compress=False):
+    """Byte chunks of ``dataset`` as CSV or NDJSON, optionally gzipped. A resumed CSV export has no header."""
+    chunks = iter_rows(dataset, after=after, chunk_size=chunk_size)
+    if fmt == 'csv':
+        parts = encode_csv(dataset, chunks, header=not after)
+    else:
+        parts = encode_ndjson(dataset, chunks)
+    return gzip_stream(parts) if compress else parts
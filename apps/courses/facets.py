@@ -0,0 +1,131 @@
+import hashlib
+from decimal import Decimal, InvalidOperation
+from urllib.parse import urlencode
+
+from django.db.models import Case, CharField, Count, F, Value, When
+from django.db.models.functions import Cast
+from rest_framework.exceptions import ValidationError
+
+from apps.courses.cache import VersionedResponseCache
+from apps.courses.models import Course
+from apps.courses.search import search_terms
+from apps.courses.tree import TREE_VERSION, subtree_counts
+
+# (label, exclusive upper bound of the price); the last bucket is open-ended
+PRICE_BUCKETS = [('free', Decimal('0.01')), ('under_20', 20), ('20_50', 50), ('50_100', 100), ('100_plus', None)]
+
+PRICE_BUCKET = Case(
+    *(When(price__lt=upper, then=Value(label)) for label, upper in PRICE_BUCKETS if upper is not None),
+    default=Value(PRICE_BUCKETS[-1][0]),
+    output_field=CharField(),
+)
+
+# facet name -> the value each course is counted under, as text so every facet fits one UNION ALL column
+FACETS = {
+    'level': F('level'),
+    'category': Cast('category_id', CharField()),
+    'price': PRICE_BUCKET,
+    'featured': Case(When(is_featured=True, then=Value('true')), default=Value('false'), output_field=CharField()),
+    'language': F('language'),
+}
+
+# every course write bumps it, see apps/courses/signals.py
+CATALOGUE_VERSION = {'catalogue': 'all'}
+# review writes move average ratings, which only the min_rating filter reads
+RATINGS_VERSION = {'course-ratings': 'all'}
+
+course_facets_cache = VersionedResponseCache('course-facets')
+
+
+def parse_facets(value):
+    """Requested facet names in a fixed order; an empty value or ``all`` asks for every facet."""
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    if not names or names == {'all'}:
+        return list(FACETS)
+    unknown = names - set(FACETS)
+    if unknown:
+        raise ValidationError({"facets": f"Unknown facet(s): {', '.join(sorted(unknown))}. Use: {', '.join(FACETS)}."})
+    return [name for name in FACETS if name in names]
+
+
+def _decimal(value):
+    try:
+        return str(Decimal(value).normalize())
+    except InvalidOperation:
+        return value
+
+
+# how each filter of CourseListAPIView.apply_filters is normalized: only spellings it treats alike are merged;
+# empty values are not applied there
+NORMALIZERS = {
+    'category': lambda value: str(int(value)) if value.strip().isdigit() else value,
+    'instructor': lambda value: str(int(value)) if value.strip().isdigit() else value,
+    'level': str,
+    'status': str,
+    'min_price': _decimal,
+    'max_price': _decimal,
+    'min_rating': _decimal,
+    'is_featured': lambda value: value.lower() if value.lower() in ('true', 'false') else '',
+    'search': lambda value: ' '.join(search_terms(value)) or '-',
+}
+
+
+def normalized_filters(params):
+    filters = {}
+    for name, normalize in NORMALIZERS.items():
+        value = params.get(name)
+        if value:
+            value = normalize(value)
+            if value:
+                filters[name] = value
+    return filters
+
+
+def cache_key(params, names):
+    """Equal for query strings that filter the same way, whatever their order, spelling of numbers or paging."""
+    query = urlencode(sorted(normalized_filters(params).items()))
+    return hashlib.sha1(f"{query}|{','.join(names)}".encode()).hexdigest()
+
+
+def facet_deps(params):
+    deps = {**CATALOGUE_VERSION, **TREE_VERSION}
+    if params.get('min_rating'):
+        deps.update(RATINGS_VERSION)
+    return deps
+
+
+def facet_counts(queryset, names):
+    """
+    ``{'count': total, 'facets': {name: {value: count}}}`` for the filtered
+    ``queryset``. Each facet is grouped on its own, so the rows grow with the
+    values of each facet rather than with their cross-product; the groups
+    come back in one query as a UNION ALL. Category counts include
+    subcategories, as the category filter does.
+    """
+    queryset = queryset.order_by()
+    groups = [
+        queryset.values(facet=Value(name, output_field=CharField()), value=FACETS[name])
+        .annotate(n=Count('pk')).values_list('facet', 'value', 'n')
+        for name in names
+    ]
+    counts = {name: {} for name in names}
+    for name, value, n in groups[0].union(*groups[1:], all=True):
+        counts[name][value] = n
+    # every facet puts each course in exactly one group
+    total = sum(counts[names[0]].values())
+
+    facets = {}
+    for name in names:
+        found = counts[name]
+        if name == 'level':
+            facets[name] = {level: found.get(level, 0) for level, _ in Course.LEVEL_CHOICES}
+        elif name == 'price':
+            facets[name] = {label: found.get(label, 0) for label, _ in PRICE_BUCKETS}
+        elif name == 'featured':
+            facets[name] = {'true': found.get('true', 0), 'false': found.get('false', 0)}
+        elif name == 'category':
+            found = {int(category_id): n for category_id, n in found.items()}
+            facets[name] = {str(category_id): n for category_id, n in subtree_counts(found).items()}
+        else:
+            facets[name] = dict(sorted(found.items(), key=lambda item: (-item[1], item[0])))
+    return {'count': total, 'facets': facets}
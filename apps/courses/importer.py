@@ -0,0 +1,220 @@
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from apps.courses.cache import bump_version
+from apps.courses.models import Lesson, Section
+from apps.courses.serializer import CourseModelSerializer
+from apps.courses.stats import rebuild_stats
+
+
+class SectionImportSerializer(serializers.ModelSerializer):
+    ref = serializers.CharField(required=False, write_only=True)
+
+    class Meta:
+        model = Section
+        fields = ['ref', 'title', 'description', 'order']
+
+
+class LessonImportSerializer(serializers.ModelSerializer):
+    section = serializers.CharField(write_only=True)
+
+    class Meta:
+        model = Lesson
+        fields = ['section', 'title', 'content', 'video_url', 'duration_minutes', 'order', 'is_preview', 'resources']
+
+
+def items_from_tree(tree):
+    """
+    Flattens ``{...course fields, "sections": [{..., "lessons": [...]}]}`` into
+    the same item stream an NDJSON upload produces. Malformed parts become
+    error items at their position, as malformed NDJSON lines do, naming the
+    offending ``field``.
+    """
+    course = tree.get('course', tree)
+    if not isinstance(course, dict):
+        yield 1, {'type': None, 'field': 'course', 'error': "Must be an object."}
+        return
+    tree = dict(course)
+    sections = tree.pop('sections', [])
+    yield 1, {'type': 'course', **tree}
+    position = 1
+    if not isinstance(sections, list):
+        yield position + 1, {'type': None, 'field': 'sections', 'error': "Must be a list of objects."}
+        return
+    for section_index, section in enumerate(sections, start=1):
+        position += 1
+        if not isinstance(section, dict):
+            yield position, {'type': None, 'field': f'sections[{section_index - 1}]', 'error': "Must be an object."}
+            continue
+        section = dict(section)
+        lessons = section.pop('lessons', [])
+        ref = str(section.pop('ref', section_index))
+        yield position, {'type': 'section', 'ref': ref, **section}
+        if not isinstance(lessons, list):
+            position += 1
+            yield position, {
+                'type': None, 'field': f'sections[{section_index - 1}].lessons', 'error': "Must be a list of objects.",
+            }
+            continue
+        for lesson_index, lesson in enumerate(lessons):
+            position += 1
+            if not isinstance(lesson, dict):
+                yield position, {
+                    'type': None, 'field': f'sections[{section_index - 1}].lessons[{lesson_index}]',
+                    'error': "Must be an object.",
+                }
+                continue
+            yield position, {'type': 'lesson', 'section': ref, **lesson}
+
+
+def items_from_ndjson(lines):
+    """One JSON object per line: a course first, then sections and lessons."""
+    for line_no, line in enumerate(lines, start=1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as exc:
+            item = {'type': None, 'error': f"Invalid JSON: {exc}"}
+        if not isinstance(item, dict):
+            item = {'type': None, 'error': "Each line must be a JSON object."}
+        yield line_no, item
+
+
+class CurriculumImporter:
+    """
+    Imports one course with its sections and lessons inside a single transaction.
+
+    Items are validated and written with ``bulk_create`` in batches, so memory
+    is bounded by ``batch_size`` whatever the size of the upload. After the
+    first invalid item nothing more is written, but validation carries on so
+    the caller gets every error (up to ``max_errors``) in one go, and the
+    transaction is rolled back.
+    """
+
+    def __init__(self, batch_size=500, max_errors=100):
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+
+    def run(self, items):
+        self.course = None
+        self.course_seen = False
+        self.errors = []
+        self.section_ids = {}
+        self.lesson_positions = {}
+        self.counts = {'sections': 0, 'lessons': 0}
+        buffer = []
+
+        with transaction.atomic():
+            for line_no, item in items:
+                if len(self.errors) >= self.max_errors:
+                    break
+                if not self.course_seen:
+                    self.course_seen = True
+                    self.import_course(line_no, item)
+                    continue
+                buffer.append((line_no, item))
+                if len(buffer) >= self.batch_size:
+                    self.flush(buffer)
+                    buffer = []
+            self.flush(buffer)
+
+            if self.course is None and not self.errors:
+                self.errors.append({'line': None, 'errors': {'course': ["The import contains no course."]}})
+            if self.errors:
+                transaction.set_rollback(True)
+                return {'errors': sorted(self.errors, key=lambda error: error['line'] or 0)}
+
+            rebuild_stats(course_ids=[self.course.pk])
+            bump_version('curriculum', self.course.pk)
+        return {'id': self.course.pk, 'slug': self.course.slug, **self.counts}
+
+    def import_course(self, line_no, item):
+        if item.get('type') != 'course':
+            self.add_error(line_no, {item.get('field', 'type'): [item.get('error') or "The first item must be the course."]})
+            return
+        serializer = CourseModelSerializer(data=self.fields_of(item))
+        if serializer.is_valid():
+            self.course = serializer.save()
+        else:
+            self.add_error(line_no, serializer.errors)
+
+    def flush(self, buffer):
+        sections, lessons = [], []
+        for line_no, item in buffer:
+            kind = item.get('type')
+            if kind == 'section':
+                if self.register_section(line_no, item):
+                    sections.append((line_no, item))
+            elif kind == 'lesson':
+                if str(item.get('section')) in self.section_ids:
+                    lessons.append((line_no, item))
+                else:
+                    self.add_error(line_no, {'section': [f"Unknown section ref '{item.get('section')}'."]})
+            else:
+                self.add_error(line_no, {item.get('field', 'type'): [item.get('error') or "Type must be 'section' or 'lesson'."]})
+
+        new_sections = self.validate(SectionImportSerializer, sections)
+        if new_sections is not None:
+            self.save_sections(new_sections)
+        new_lessons = self.validate(LessonImportSerializer, lessons)
+        if new_lessons is not None:
+            self.save_lessons(new_lessons)
+
+    def register_section(self, line_no, item):
+        # refs are claimed before validation, so lessons of an invalid section
+        # are not reported a second time as pointing at an unknown section
+        self.counts['sections'] += 1
+        item['ref'] = str(item.get('ref', self.counts['sections']))
+        item.setdefault('order', self.counts['sections'])
+        if item['ref'] in self.section_ids:
+            self.add_error(line_no, {'ref': [f"Section ref '{item['ref']}' is used more than once."]})
+            return False
+        self.section_ids[item['ref']] = None
+        return True
+
+    def validate(self, serializer_class, entries):
+        if not entries:
+            return []
+        serializer = serializer_class(data=[self.fields_of(item) for _, item in entries], many=True)
+        if serializer.is_valid():
+            return [(line_no, data) for (line_no, _), data in zip(entries, serializer.validated_data)]
+        # a list aligned with the input on older DRF versions, a dict keyed by index on newer ones
+        errors = serializer.errors
+        for index, item_errors in (errors.items() if isinstance(errors, dict) else enumerate(errors)):
+            if item_errors:
+                self.add_error(entries[index][0], item_errors)
+        return None
+
+    def save_sections(self, entries):
+        if self.errors:
+            return
+        objects = [(data.pop('ref'), Section(course=self.course, **data)) for _, data in entries]
+        Section.objects.bulk_create([section for _, section in objects])
+        for ref, section in objects:
+            self.section_ids[ref] = section.pk
+
+    def save_lessons(self, entries):
+        objects = []
+        for _, data in entries:
+            ref = data.pop('section')
+            self.lesson_positions[ref] = self.lesson_positions.get(ref, 0) + 1
+            data.setdefault('order', self.lesson_positions[ref])
+            objects.append(Lesson(section_id=self.section_ids[ref], **data))
+        if self.errors:
+            return
+        Lesson.objects.bulk_create(objects)
+        self.counts['lessons'] += len(objects)
+
+    def add_error(self, line_no, errors):
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line_no, 'errors': errors})
+
+    @staticmethod
+    def fields_of(item):
+        return {key: value for key, value in item.items() if key != 'type'}
@@ -0,0 +1,162 @@
+"""
+Course listing built from ``values()`` rows instead of model instances.
+
+``course_list_data`` returns exactly what ``CourseListSerializer`` (and its
+sideload variant) return for the same courses, key order included, so the
+rendered bytes are identical. It skips the instance construction and DRF's
+per-field machinery, which dominate large pages. The column lists below
+mirror the serializers: a field added there has to be added here too (the
+``benchmark_listing`` command fails when the two outputs drift apart).
+``FIELD_COLUMNS`` also drives sparse fieldsets (``fields=`` / ``exclude=``):
+only the columns of the selected fields are read.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name')
+INSTRUCTOR_FIELDS = ('bio', 'profile_image', 'expertise', 'total_students', 'rating', 'is_verified', 'created_at')
+CATEGORY_FIELDS = ('name', 'slug', 'description', 'icon')
+STATS_FIELDS = ('total_lessons', 'total_duration', 'students_count', 'average_rating', 'reviews_count')
+COURSE_FIELDS = (
+    'title', 'slug', 'description', 'thumbnail', 'trailer_url', 'price', 'discount_percentage', 'level', 'status',
+    'duration_hours', 'requirements', 'what_you_learn', 'language', 'created_at',
+)
+# decimal places of the DecimalFields, rendered as fixed-point strings like DRF does
+DECIMALS = {'price': 2, 'duration_hours': 2, 'instructor__rating': 2}
+
+COLUMNS = (
+    'id', *COURSE_FIELDS, 'final_price_value',
+    *(f'stats__{name}' for name in STATS_FIELDS), 'stats__course_id',
+    'category_id', *(f'category__{name}' for name in CATEGORY_FIELDS), 'category__is_active', 'category__parent_id',
+    'instructor_id', *(f'instructor__{name}' for name in INSTRUCTOR_FIELDS),
+    *(f'instructor__user__{name}' for name in USER_FIELDS),
+)
+CATEGORY_COLUMNS = ('category_id', *(f'category__{name}' for name in CATEGORY_FIELDS))
+INSTRUCTOR_COLUMNS = (
+    'instructor_id', *(f'instructor__{name}' for name in INSTRUCTOR_FIELDS),
+    *(f'instructor__user__{name}' for name in USER_FIELDS),
+)
+# output field -> the columns it is built from, in the serializer's field order
+FIELD_COLUMNS = {
+    **{name: (f'stats__{name}',) for name in STATS_FIELDS},
+    'category': CATEGORY_COLUMNS,
+    'instructor': INSTRUCTOR_COLUMNS,
+    'final_price': ('price', 'discount_percentage'),
+    'category_id': (*CATEGORY_COLUMNS, 'category__is_active', 'category__parent_id'),
+    'teach': INSTRUCTOR_COLUMNS,
+    **{name: (name,) for name in COURSE_FIELDS},
+}
+# annotations added by the search backend
+OPTIONAL_COLUMNS = ('search_rank', 'search_snippet')
+
+_QUANTIZERS = {column: Decimal(1).scaleb(-places) for column, places in DECIMALS.items()}
+
+
+def course_list_values(queryset, columns=COLUMNS):
+    """The listing query as ``values()`` rows; filters, ordering and pagination apply as before."""
+    annotations = queryset.query.annotations
+    return queryset.values(*columns, *(name for name in OPTIONAL_COLUMNS if name in annotations))
+
+
+def course_list_data(rows, sideload=False, fields=None):
+    """
+    Returns ``(results, included)`` for a page of ``course_list_values``
+    rows; ``included`` is ``None`` unless ``sideload``. Nested instructors
+    and categories are built once per page and shared between rows.
+    ``fields`` limits the rows (and ``included``) to those output fields,
+    whose columns are all the rows need to carry.
+    """
+    tz = timezone.get_current_timezone()
+    selected = FIELD_COLUMNS.keys() if fields is None else fields
+    stats_fields = [name for name in STATS_FIELDS if name in selected]
+    course_fields = [name for name in COURSE_FIELDS if name in selected]
+    with_category, with_instructor = 'category' in selected, 'instructor' in selected
+    with_final_price = 'final_price' in selected
+    # the sideload serializer has no category_id and teach fields
+    with_full_category = not sideload and 'category_id' in selected
+    with_teach = not sideload and 'teach' in selected
+
+    def datetime_str(value):
+        value = value.astimezone(tz).isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+    def decimal_str(row, column):
+        value = row[column]
+        return None if value is None else format(value.quantize(_QUANTIZERS[column]), 'f')
+
+    instructors, categories, full_categories = {}, {}, {}
+    results = []
+    for row in rows:
+        instructor_id, category_id = row.get('instructor_id'), row.get('category_id')
+
+        instructor = None
+        if with_instructor or with_teach:
+            instructor = instructors.get(instructor_id)
+            if instructor is None:
+                instructor = instructors[instructor_id] = {
+                    'id': instructor_id,
+                    'user': {name: row[f'instructor__user__{name}'] for name in USER_FIELDS},
+                    'bio': row['instructor__bio'],
+                    'profile_image': row['instructor__profile_image'],
+                    'expertise': row['instructor__expertise'],
+                    'total_students': row['instructor__total_students'],
+                    'rating': decimal_str(row, 'instructor__rating'),
+                    'is_verified': row['instructor__is_verified'],
+                    'created_at': datetime_str(row['instructor__created_at']),
+                }
+
+        category = None
+        if with_category or with_full_category:
+            category = categories.get(category_id)
+            if category is None:
+                category = categories[category_id] = {
+                    'id': category_id, **{name: row[f'category__{name}'] for name in CATEGORY_FIELDS},
+                }
+                if with_full_category:
+                    full_categories[category_id] = {
+                        **category, 'is_active': row['category__is_active'], 'parent': row['category__parent_id'],
+                    }
+
+        data = {name: row[f'stats__{name}'] for name in stats_fields}
+        if with_category:
+            data['category'] = category_id if sideload else category
+        if with_instructor:
+            data['instructor'] = instructor_id if sideload else instructor
+        if with_final_price:
+            data['final_price'] = final_price(row['price'], row['discount_percentage'])
+        if with_full_category:
+            data['category_id'] = full_categories[category_id]
+        if with_teach:
+            data['teach'] = instructor
+        for name in course_fields:
+            data[name] = row[name]
+        if 'price' in data:
+            data['price'] = decimal_str(row, 'price')
+        if 'duration_hours' in data:
+            data['duration_hours'] = decimal_str(row, 'duration_hours')
+        if 'created_at' in data:
+            data['created_at'] = datetime_str(row['created_at'])
+        if row.get('search_snippet') is not None:
+            data['search_snippet'] = row['search_snippet']
+        results.append(data)
+
+    included = None
+    if sideload:
+        included = {}
+        if with_instructor:
+            included['instructors'] = list(instructors.values())
+        if with_category:
+            included['categories'] = list(categories.values())
+    return results, included
+
+
+def final_price(price, discount_percentage):
+    """
+    ``CourseListSerializer.get_final_price`` as the float DRF's encoder turns
+    it into. The Decimal product is exact, so computing it as a ratio of
+    integers and dividing once gives the same correctly rounded float
+    without Decimal arithmetic.
+    """
+    numerator, denominator = price.as_integer_ratio()
+    return numerator * (100 - discount_percentage) / (denominator * 100)
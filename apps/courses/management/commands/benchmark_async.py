@@ -0,0 +1,163 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from apps.courses.models import Course
+
+HOST = 'localhost'
+# (label, sync url name, async url name)
+ENDPOINTS = [
+    ('list', 'courses:list-detail-course', 'courses:async-list'),
+    ('detail', 'courses:detail', 'courses:async-detail'),
+    ('curriculum', 'courses:curriculum', 'courses:async-curriculum'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares throughput of the read endpoints served by Django's WSGI handler on a fixed thread pool "
+        "(gunicorn gthread style) against the async views on the ASGI handler with one event loop "
+        "(uvicorn style), for many concurrent connections and an optional artificial per-query latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help="Per endpoint and server.")
+        parser.add_argument('--concurrency', type=int, default=64, help="Simultaneous client connections.")
+        parser.add_argument('--threads', type=int, default=8, help="WSGI worker threads.")
+        parser.add_argument('--db-latency', type=float, default=20.0, help="Milliseconds added to every query.")
+        parser.add_argument('--warm-cache', action='store_true', help="Keep the response caches on.")
+
+    def handle(self, *args, **options):
+        pk = Course.objects.order_by('id').values_list('id', flat=True).first()
+        if pk is None:
+            raise CommandError("No courses to benchmark; run the seed_data command first.")
+
+        overrides = {
+            'ALLOWED_HOSTS': [HOST],
+            'REQUEST_INSTRUMENTATION': {'SAMPLE_RATE': 0},
+        }
+        if not options['warm_cache']:
+            overrides['CACHES'] = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+        latency = options['db_latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            # stands in for network round trips to a remote database
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        if latency:
+            connection_created.connect(add_latency)
+        try:
+            with override_settings(**overrides):
+                self.run(pk, options)
+        finally:
+            connection_created.disconnect(add_latency)
+
+    def run(self, pk, options):
+        wsgi, asgi = WSGIHandler(), ASGIHandler()
+        self.stdout.write(
+            f"{options['requests']} requests per run, {options['concurrency']} connections, "
+            f"{options['threads']} WSGI threads, {options['db_latency']} ms per query"
+        )
+        self.stdout.write(f"{'endpoint':<12}{'server':<14}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'errors':>8}")
+        for label, sync_name, async_name in ENDPOINTS:
+            kwargs = {} if label == 'list' else {'pk': pk}
+            sync_url, async_url = reverse(sync_name, kwargs=kwargs), reverse(async_name, kwargs=kwargs)
+            runs = [
+                ('WSGI sync', self.run_wsgi(wsgi, sync_url, options)),
+                ('ASGI sync', self.run_asgi(asgi, sync_url, options)),
+                ('ASGI async', self.run_asgi(asgi, async_url, options)),
+            ]
+            for server, (elapsed, latencies, errors) in runs:
+                latencies.sort()
+                self.stdout.write(
+                    f"{label:<12}{server:<14}{len(latencies) / elapsed:>9.1f}"
+                    f"{statistics.median(latencies):>10.1f}{latencies[int(len(latencies) * 0.95) - 1]:>10.1f}{errors:>8}"
+                )
+
+    def run_wsgi(self, handler, url, options):
+        """Clients queue on a fixed pool of worker threads, as with a threaded WSGI server."""
+        factory = RequestFactory(HTTP_HOST=HOST)
+        errors = []
+        lock = threading.Lock()
+
+        def call(_):
+            environ = factory.get(url).environ
+            statuses = []
+            started = time.perf_counter()
+            body = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+            b''.join(body)
+            if hasattr(body, 'close'):
+                body.close()
+            elapsed = (time.perf_counter() - started) * 1000
+            if not statuses[0].startswith('200'):
+                with lock:
+                    errors.append(statuses[0])
+            return elapsed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            latencies = list(pool.map(call, range(options['requests'])))
+        return time.perf_counter() - started, latencies, len(errors)
+
+    def run_asgi(self, application, url, options):
+        """Every client connection is a coroutine on one event loop, as under uvicorn."""
+        async def call():
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+                'scheme': 'http', 'path': url, 'raw_path': url.encode(), 'query_string': b'', 'root_path': '',
+                'headers': [(b'host', HOST.encode())], 'client': ('127.0.0.1', 50000), 'server': (HOST, 80),
+            }
+            request_sent = False
+            disconnect = asyncio.Event()
+
+            async def receive():
+                nonlocal request_sent
+                if not request_sent:
+                    request_sent = True
+                    return {'type': 'http.request', 'body': b'', 'more_body': False}
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            status = []
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            started = time.perf_counter()
+            await application(scope, receive, send)
+            disconnect.set()
+            return (time.perf_counter() - started) * 1000, status[0]
+
+        async def client(remaining, latencies, errors):
+            while remaining:
+                remaining.pop()
+                elapsed, status = await call()
+                latencies.append(elapsed)
+                if status != 200:
+                    errors.append(status)
+
+        async def main():
+            remaining = list(range(options['requests']))
+            latencies, errors = [], []
+            started = time.perf_counter()
+            await asyncio.gather(*(client(remaining, latencies, errors) for _ in range(options['concurrency'])))
+            return time.perf_counter() - started, latencies, len(errors)
+
+        return asyncio.run(main())
@@ -0,0 +1,223 @@
+import json
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+
+from apps.courses import urls as course_urls
+from apps.courses.models import Course
+
+# extra query strings worth checking per url name, on top of the bare url; the
+# query budget tests in apps/courses/tests.py request them too
+VARIANTS = {
+    'list-detail-course': [
+        'sideload=true', 'ordering=final_price', 'ordering=-price&page_size=100', 'facets=', 'facets=level,price&level=beginner',
+        'fields=title,price,instructor&ordering=-rating', 'exclude=description,requirements,what_you_learn&sideload=true',
+    ],
+    'detail': ['fields=title,price,teach', 'exclude=description,requirements,what_you_learn'],
+    'curriculum': ['include=content,resources'],
+}
+# url kwargs for patterns that take more than a pk
+URL_KWARGS = {
+    'export': [{'dataset': 'courses', 'fmt': 'csv'}, {'dataset': 'enrollments', 'fmt': 'ndjson'}],
+}
+# (method, body factory) for the write endpoints; they run after every GET and are rolled back
+WRITES = {
+    'create-teach': ('post', lambda s, n: {
+        'user': {'username': f'bench-{s["run"]}-{n}', 'email': f'bench{n}@example.com'},
+        'bio': 'Bench', 'profile_image': 'https://example.com/a.png', 'expertise': 'Python',
+    }),
+    'create-cat': ('post', lambda s, n: {'name': f'Bench {s["run"]} {n}', 'description': 'Bench', 'icon': 'book'}),
+    'create-course': ('post', lambda s, n: s['course_payload'](f'Bench course {s["run"]} {n}')),
+    'import-curriculum': ('post', lambda s, n: {
+        **s['course_payload'](f'Bench import {s["run"]} {n}'),
+        'sections': [
+            {'title': f'S{i}', 'lessons': [
+                {'title': f'L{j}', 'content': 'c', 'video_url': 'https://example.com/v.mp4', 'duration_minutes': 5}
+                for j in range(5)
+            ]}
+            for i in range(4)
+        ],
+    }),
+    'update-detail': ('patch', lambda s, n: {'discount_percentage': n % 50}),
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(sorted_values, pct):
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    return statistics.quantiles(sorted_values, n=100, method='inclusive')[pct - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives every endpoint in apps/courses/urls.py through the test client and reports p50/p95/p99 "
+        "latency, SQL queries and allocated memory per request; optionally compares with a stored baseline. "
+        "Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument('--cold', action='store_true', help="Disable the cache so every request runs its SQL.")
+        parser.add_argument('--only', help="Only benchmark url names containing this text.")
+        parser.add_argument('--save-baseline', metavar='PATH', help="Write the results as a JSON baseline.")
+        parser.add_argument('--baseline', metavar='PATH', help="Compare with a baseline and fail on regressions.")
+        parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown/growth, 0.2 = 20%%.")
+
+    def handle(self, *args, **options):
+        samples = self.samples()
+        caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}} if options['cold'] else None
+
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                if caches:
+                    with override_settings(CACHES=caches):
+                        results = self.run(Client(), samples, options)
+                else:
+                    results = self.run(Client(), samples, options)
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+
+        self.report(results)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as fh:
+                json.dump(results, fh, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['save_baseline']}.")
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def samples(self):
+        course = (
+            Course.objects.annotate(sections_count=Count('sections')).filter(sections_count__gt=0)
+            .order_by('id').first() or Course.objects.order_by('id').first()
+        )
+        if course is None:
+            raise CommandError("No courses to benchmark; run the seed_data command first.")
+
+        def course_payload(title):
+            return {
+                'title': title, 'description': 'Benchmark course description. ' * 3, 'instructor': course.instructor_id,
+                'category': course.category_id, 'thumbnail': 'https://example.com/t.png', 'price': '99.00',
+                'level': 'beginner', 'duration_hours': '10.00', 'requirements': 'None', 'what_you_learn': 'Things',
+            }
+
+        return {'pk': course.pk, 'run': uuid.uuid4().hex[:6], 'course_payload': course_payload}
+
+    def cases(self, samples):
+        gets, writes = [], []
+        for pattern in course_urls.urlpatterns:
+            name = pattern.name
+            view = pattern.callback.view_class
+            url_kwargs = URL_KWARGS.get(name) or [{key: samples[key] for key in pattern.pattern.regex.groupindex}]
+            for kwargs in url_kwargs:
+                url = reverse(f'{course_urls.app_name}:{name}', kwargs=kwargs)
+                if name in WRITES:
+                    method, body = WRITES[name]
+                    writes.append((name, url, method, body))
+                elif hasattr(view, 'get'):
+                    for query in [''] + VARIANTS.get(name, []):
+                        gets.append((name, f'{url}?{query}' if query else url, 'get', None))
+        return gets + writes
+
+    def run(self, client, samples, options):
+        # the exports are staff only; the user goes away with the rollback
+        client.force_login(User.objects.create(username=f'bench-staff-{samples["run"]}', is_staff=True))
+        results = {}
+        for name, url, method, body in self.cases(samples):
+            if options['only'] and options['only'] not in name:
+                continue
+            label = f'{method.upper()} {url}'
+
+            def request(n):
+                if body is None:
+                    response = getattr(client, method)(url)
+                else:
+                    response = getattr(client, method)(url, body(samples, n), content_type='application/json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                return response
+
+            for n in range(options['warmup']):
+                request(-n - 1)
+
+            timings, queries = [], []
+            for n in range(options['iterations']):
+                with CaptureQueriesContext(connection) as ctx:
+                    started = time.perf_counter()
+                    response = request(n)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(ctx.captured_queries))
+
+            # allocations are measured in a separate pass so tracemalloc doesn't skew the timings
+            tracemalloc.start()
+            allocations = []
+            for n in range(min(5, options['iterations'])):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                request(options['iterations'] + n)
+                allocations.append(tracemalloc.get_traced_memory()[1] - before)
+            tracemalloc.stop()
+
+            timings.sort()
+            results[label] = {
+                'status': response.status_code,
+                'p50_ms': round(percentile(timings, 50), 3),
+                'p95_ms': round(percentile(timings, 95), 3),
+                'p99_ms': round(percentile(timings, 99), 3),
+                'queries': max(queries),
+                'peak_kb': round(statistics.median(allocations) / 1024, 1),
+            }
+        return results
+
+    def report(self, results):
+        width = max((len(label) for label in results), default=10)
+        self.stdout.write(f"{'endpoint':<{width}}  status   p50 ms   p95 ms   p99 ms  queries  peak KB")
+        for label, row in results.items():
+            self.stdout.write(
+                f"{label:<{width}}  {row['status']:>6} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} "
+                f"{row['p99_ms']:>8.2f} {row['queries']:>8} {row['peak_kb']:>8.1f}"
+            )
+
+    def compare(self, results, path, tolerance):
+        try:
+            with open(path) as fh:
+                baseline = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Can not read the baseline {path}: {exc}")
+
+        regressions = []
+        for label, row in results.items():
+            before = baseline.get(label)
+            if before is None:
+                self.stdout.write(f"{label}: not in the baseline")
+                continue
+            if row['queries'] > before['queries']:
+                regressions.append(f"{label}: {before['queries']} -> {row['queries']} queries")
+            for metric in ('p95_ms', 'peak_kb'):
+                if row[metric] > before[metric] * (1 + tolerance):
+                    regressions.append(f"{label}: {metric} {before[metric]} -> {row[metric]}")
+
+        for line in regressions:
+            self.stdout.write(self.style.ERROR(line))
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) against {path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}."))
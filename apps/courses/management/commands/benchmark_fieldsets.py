@@ -0,0 +1,82 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from apps.courses.models import Course
+
+HEAVY_TEXT = 'description,requirements,what_you_learn'
+# (label, query string) per endpoint; the first one is the full payload the others are compared with
+FIELDSETS = {
+    'list': [
+        ('all fields', ''),
+        ('exclude heavy text', f'exclude={HEAVY_TEXT}'),
+        ('exclude heavy text, nested', f'exclude={HEAVY_TEXT},category_id,teach'),
+        ('card', 'fields=title,slug,thumbnail,final_price,average_rating,instructor'),
+        ('card, sideload', 'fields=title,slug,thumbnail,final_price,average_rating,instructor&sideload=true'),
+    ],
+    'detail': [
+        ('all fields', ''),
+        ('exclude heavy text', f'exclude={HEAVY_TEXT}'),
+        ('header', 'fields=title,price,level,average_rating,teach'),
+        ('title only', 'fields=title'),
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Requests the course list and detail with several fields=/exclude= selections, caching off, and "
+        "reports the payload size, the columns the SQL reads and the median latency against the full payload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--page-size', type=int, default=100)
+
+    def handle(self, *args, **options):
+        course = Course.objects.order_by('id').first()
+        if course is None:
+            raise CommandError("No courses to benchmark; run the seed_data command first.")
+        urls = {
+            'list': f"{reverse('courses:list-detail-course')}?page_size={options['page_size']}",
+            'detail': f"{reverse('courses:detail', kwargs={'pk': course.pk})}?",
+        }
+
+        setup_test_environment()
+        try:
+            caches = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+            with override_settings(CACHES=caches, DATABASE_REPLICAS=[]):
+                client = Client()
+                self.stdout.write(f"{'endpoint':<10}{'fieldset':<30}{'bytes':>9}{'of full':>9}{'columns':>9}{'p50 ms':>9}{'speedup':>9}")
+                for endpoint, fieldsets in FIELDSETS.items():
+                    full = None
+                    for label, query in fieldsets:
+                        url = f"{urls[endpoint]}&{query}" if query else urls[endpoint]
+                        size, columns, p50 = self.measure(client, url, options['iterations'])
+                        full = full or (size, p50)
+                        self.stdout.write(
+                            f"{endpoint:<10}{label:<30}{size:>9}{size / full[0]:>9.0%}{columns:>9}"
+                            f"{p50:>9.2f}{full[1] / p50:>8.2f}x"
+                        )
+        finally:
+            teardown_test_environment()
+
+    def measure(self, client, url, iterations):
+        """Response size, columns selected by the main query and median milliseconds of ``url``."""
+        client.get(url)
+        timings = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise CommandError(f"{url} answered {response.status_code}: {response.content[:200]!r}")
+        sql = next(query['sql'] for query in ctx.captured_queries if 'FROM "courses_course"' in query['sql'])
+        columns = sql.split(' FROM ', 1)[0].count(',') + 1
+        return len(response.content), columns, statistics.median(timings)
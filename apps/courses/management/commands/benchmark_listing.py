@@ -0,0 +1,125 @@
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.courses.renderers import FastJSONRenderer, orjson
+from apps.courses.views import CourseListAPIView
+
+# (label, values() fast path, renderer)
+CONFIGS = [
+    ('serializer + JSONRenderer', False, JSONRenderer),
+    ('values() + JSONRenderer', True, JSONRenderer),
+    ('values() + FastJSONRenderer', True, FastJSONRenderer),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Walks the course listing page by page through CourseListSerializer and through the values() fast "
+        "path, reports rows per second end to end and for building plus rendering alone, and fails if the "
+        "paths render different bytes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help="Rows to list per run.")
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per configuration; the best one counts.")
+        parser.add_argument('--ordering', default='')
+        parser.add_argument('--search', default='')
+        parser.add_argument('--sideload', action='store_true')
+        parser.add_argument('--fields', default='', help="Sparse fieldset, as the fields= query parameter.")
+        parser.add_argument('--exclude', default='', help="As the exclude= query parameter.")
+
+    def handle(self, *args, **options):
+        # allows the test server host name the request factory uses
+        setup_test_environment()
+        try:
+            self.run(options)
+        finally:
+            teardown_test_environment()
+
+    def run(self, options):
+        self.factory = APIRequestFactory()
+        self.url = reverse('courses:list-detail-course')
+        params = {'page_size': options['page_size']}
+        for name in ('ordering', 'search', 'fields', 'exclude'):
+            if options[name]:
+                params[name] = options[name]
+        if options['sideload']:
+            params['sideload'] = 'true'
+
+        if orjson is None:
+            self.stdout.write("orjson is not installed: FastJSONRenderer falls back to JSONRenderer.")
+        self.stdout.write(f"{'configuration':<30}{'rows':>7}{'rows/s':>11}{'build+render rows/s':>22}")
+        reference = None
+        for label, fast_path, renderer in CONFIGS:
+            view = CourseListAPIView.as_view(fast_path=fast_path, renderer_classes=[renderer])
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                bodies, pages, rows = self.walk(view, params, options['rows'])
+                timings.append(time.perf_counter() - started)
+            if not rows:
+                raise CommandError("The listing is empty; run the seed_data command first.")
+
+            if reference is None:
+                reference = bodies
+            else:
+                self.compare(label, reference, bodies)
+
+            stage = min(self.build_render(fast_path, renderer, pages) for _ in range(options['repeat']))
+            self.stdout.write(f"{label:<30}{rows:>7}{rows / min(timings):>11.0f}{rows / stage:>22.0f}")
+        self.stdout.write(self.style.SUCCESS("All configurations rendered identical bytes."))
+
+    def walk(self, view, params, limit):
+        """Follows ``next`` links until ``limit`` rows; returns the bodies, the query of every page and the row count."""
+        query = dict(params)
+        bodies, pages, rows = [], [], 0
+        while rows < limit:
+            response = view(self.factory.get(self.url, query))
+            response.render()
+            if response.status_code != 200:
+                raise CommandError(f"{self.url} answered {response.status_code}: {response.content[:200]!r}")
+            bodies.append(response.content)
+            pages.append(query)
+            rows += len(response.data['results'])
+            if not response.data['next']:
+                break
+            query = dict(parse_qsl(urlsplit(response.data['next']).query))
+        return bodies, pages, rows
+
+    def build_render(self, fast_path, renderer_class, pages):
+        """Seconds spent turning the already fetched pages into bytes, without SQL and request handling."""
+        view = CourseListAPIView(fast_path=fast_path)
+        renderer = renderer_class()
+        fetched = []
+        for query in pages:
+            request = Request(self.factory.get(self.url, query))
+            courses, serializer_class, paginator, fields = view.filter_courses(request)
+            page = paginator.paginate_queryset(courses, request, view=view)
+            fetched.append((page, serializer_class, paginator, fields))
+
+        started = time.perf_counter()
+        for page, serializer_class, paginator, fields in fetched:
+            renderer.render(view.page_data(page, serializer_class, paginator, fields))
+        return time.perf_counter() - started
+
+    def compare(self, label, reference, bodies):
+        if len(reference) != len(bodies):
+            raise CommandError(f"{label}: {len(bodies)} pages instead of {len(reference)}.")
+        for number, (expected, body) in enumerate(zip(reference, bodies), 1):
+            if expected != body:
+                offset = next(
+                    (i for i, (a, b) in enumerate(zip(expected, body)) if a != b), min(len(expected), len(body)),
+                )
+                raise CommandError(
+                    f"{label}: page {number} differs at byte {offset}:\n"
+                    f"  expected {expected[max(0, offset - 80):offset + 80]!r}\n"
+                    f"  got      {body[max(0, offset - 80):offset + 80]!r}"
+                )
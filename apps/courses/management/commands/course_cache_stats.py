@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.cache import course_detail_cache
+
+
+class Command(BaseCommand):
+    help = "Prints hit/miss counters of the course detail response cache."
+
+    def handle(self, *args, **options):
+        metrics = course_detail_cache.metrics()
+        self.stdout.write(
+            f"{course_detail_cache.name}: {metrics['hits']} hits, {metrics['misses']} misses "
+            f"({metrics['hit_rate']:.1%} hit rate)"
+        )
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from apps.courses.exports import DATASETS, DEFAULT_CHUNK_SIZE, FORMATS, export_stream
+
+
+class Command(BaseCommand):
+    help = "Streams a dataset as CSV or NDJSON to a file or stdout with flat memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(DATASETS))
+        parser.add_argument('--format', dest='fmt', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help="File to write; stdout when omitted.")
+        parser.add_argument('--after', type=int, default=0, help="Resume after this id.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--gzip', action='store_true')
+
+    def handle(self, *args, **options):
+        stream = export_stream(
+            options['dataset'], options['fmt'], after=options['after'],
+            chunk_size=options['chunk_size'], compress=options['gzip'],
+        )
+        if options['output']:
+            # resuming appends to what the interrupted run already wrote
+            with open(options['output'], 'ab' if options['after'] else 'wb') as fh:
+                for part in stream:
+                    fh.write(part)
+        else:
+            out = sys.stdout.buffer
+            for part in stream:
+                out.write(part)
+            out.flush()
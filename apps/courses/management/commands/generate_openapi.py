@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.openapi import write_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the OpenAPI schema once and writes it as JSON and YAML to OPENAPI_SCHEMA_DIR, "
+        "from where the docs endpoints serve it. Run on every deploy."
+    )
+
+    def handle(self, *args, **options):
+        if not settings.API_DOCS:
+            raise CommandError("The views are not documented with API_DOCS=0; run this with API_DOCS=1.")
+        started = time.perf_counter()
+        paths = write_schema()
+        for path in paths:
+            self.stdout.write(f"{path} ({path.stat().st_size} bytes)")
+        self.stdout.write(self.style.SUCCESS(f"Schema generated in {time.perf_counter() - started:.2f}s."))
@@ -0,0 +1,33 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.courses.importer import CurriculumImporter, items_from_ndjson, items_from_tree
+
+
+class Command(BaseCommand):
+    help = "Imports a course with its sections and lessons from a JSON tree or an NDJSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['json', 'ndjson'], help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'json')
+        importer = CurriculumImporter(batch_size=options['batch_size'])
+
+        with open(path, encoding='utf-8') as f:
+            if file_format == 'ndjson':
+                result = importer.run(items_from_ndjson(f))
+            else:
+                result = importer.run(items_from_tree(json.load(f)))
+
+        if 'errors' in result:
+            for error in result['errors']:
+                self.stderr.write(f"line {error['line']}: {json.dumps(error['errors'], ensure_ascii=False)}")
+            raise CommandError(f"Import failed with {len(result['errors'])} error(s); nothing was written.")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported course {result['id']} ({result['slug']}): {result['sections']} sections, {result['lessons']} lessons."
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = "Recomputes the denormalized CourseStats rows from enrollments, reviews and lessons."
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', type=int, help="Only rebuild these courses.")
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        rebuilt = rebuild_stats(course_ids=options['course_ids'] or None, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} course(s)."))
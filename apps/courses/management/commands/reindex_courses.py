@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.courses.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the course full-text search index from scratch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        indexed = get_search_backend().reindex(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} course(s)."))
@@ -0,0 +1,272 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.analytics.rollups import backfill
+from apps.courses.cache import bump_version
+from apps.courses.models import Category, Course, Instructor, Lesson, Section
+from apps.courses.search import get_search_backend
+from apps.courses.stats import rebuild_stats
+from apps.enrolments.models import Enrollment, LessonProgress
+from apps.reviews.models import Answer, CourseReview, Question
+
+TOPICS = [
+    'Python', 'Django', 'JavaScript', 'React', 'SQL', 'Data Science', 'Machine Learning', 'Docker',
+    'Linux', 'Go', 'Rust', 'Algorithms', 'UI/UX Design', 'Marketing', 'English', 'Mathematics',
+]
+LEVELS = ['beginner', 'intermediate', 'advanced']
+TITLE_PATTERNS = [
+    "{topic} asoslari", "{topic} — to‘liq kurs", "Amaliy {topic}", "{topic}: noldan professionalgacha",
+    "{topic} bo‘yicha masterklass", "Zamonaviy {topic}",
+]
+WORDS = (
+    "dastur loyiha amaliyot misol kod ma'lumot tahlil server mijoz sahifa funksiya klass modul test "
+    "tizim natija vazifa usul model baza so‘rov interfeys algoritm"
+).split()
+FIRST_NAMES = ['Ali', 'Vali', 'Aziz', 'Dilnoza', 'Madina', 'Sardor', 'Jasur', 'Nodira', 'Bekzod', 'Malika']
+LAST_NAMES = ['Karimov', 'Rahimova', 'Tursunov', 'Yusupova', 'Aliyev', 'Qodirova', 'Ergashev', 'Sobirova']
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates synthetic instructors, a category tree, courses with sections and lessons, students, "
+        "enrollments with progress, reviews and questions using bulk inserts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help="Multiplies every count below.")
+        parser.add_argument('--instructors', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=8, help="Root categories, each with subcategories.")
+        parser.add_argument('--courses', type=int, default=200)
+        parser.add_argument('--sections', type=int, default=5, help="Per course.")
+        parser.add_argument('--lessons', type=int, default=6, help="Per section.")
+        parser.add_argument('--students', type=int, default=1000)
+        parser.add_argument('--enrollments', type=int, default=4, help="Per student.")
+        parser.add_argument('--review-ratio', type=float, default=0.3, help="Share of enrollments with a review.")
+        parser.add_argument('--questions', type=int, default=500)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        # keeps usernames and slugs unique when the command runs more than once
+        self.run_id = uuid.uuid4().hex[:6]
+        scale = options['scale']
+
+        def scaled(name):
+            return max(1, int(options[name] * scale))
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            instructors = self.create_instructors(scaled('instructors'))
+            categories = self.create_categories(scaled('categories'))
+            courses = self.create_courses(scaled('courses'), instructors, categories)
+            lessons = self.create_curriculum(courses, options['sections'], options['lessons'])
+            students = self.create_students(scaled('students'))
+            enrollments = self.create_enrollments(students, courses, min(options['enrollments'], len(courses)))
+            progress = self.create_progress(enrollments, lessons)
+            reviews = self.create_reviews(enrollments, options['review_ratio'])
+            questions = self.create_questions(scaled('questions'), enrollments, lessons, courses)
+
+            course_ids = [course.pk for course in courses]
+            rebuild_stats(course_ids=course_ids, batch_size=self.batch_size)
+            backfill(course_ids=course_ids)
+            get_search_backend().index(courses)
+        bump_version('category-tree', 'all')
+        bump_version('catalogue', 'all')
+
+        counts = {
+            'instructors': len(instructors), 'categories': len(categories), 'courses': len(courses),
+            'lessons': sum(len(course_lessons) for course_lessons in lessons.values()), 'students': len(students),
+            'enrollments': len(enrollments), 'progress': progress, 'reviews': reviews, 'questions': questions,
+        }
+        summary = ', '.join(f'{count} {name}' for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Created {summary} in {time.perf_counter() - started:.1f}s."))
+
+    def bulk(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def past(self, max_days):
+        return self.now - timedelta(days=self.rng.random() * max_days)
+
+    def backdate(self, model, objects, field, max_days):
+        # auto_now_add overwrites dates passed to bulk_create, so they are spread afterwards
+        for obj in objects:
+            setattr(obj, field, self.past(max_days))
+        model.objects.bulk_update(objects, [field], batch_size=self.batch_size)
+
+    def sentence(self, words):
+        return ' '.join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+    def create_users(self, prefix, count):
+        # "!" is an unusable password hash: seeded accounts can't log in
+        return self.bulk(User, [
+            User(
+                username=f'{prefix}-{self.run_id}-{n}', email=f'{prefix}{n}.{self.run_id}@example.com',
+                first_name=self.rng.choice(FIRST_NAMES), last_name=self.rng.choice(LAST_NAMES), password='!',
+            )
+            for n in range(count)
+        ])
+
+    def create_instructors(self, count):
+        users = self.create_users('teacher', count)
+        return self.bulk(Instructor, [
+            Instructor(
+                user=user, bio=self.sentence(20), profile_image=f'https://example.com/avatars/{user.pk}.png',
+                expertise=self.rng.choice(TOPICS), is_verified=self.rng.random() < 0.7,
+                rating=Decimal(self.rng.randint(300, 500)) / 100,
+            )
+            for user in users
+        ])
+
+    def create_categories(self, roots):
+        # paths need the ids, so every level is inserted first and its paths filled in after
+        categories = []
+        parents = [None]
+        for depth, fanout in enumerate([roots, 3, 2]):
+            level = [
+                Category(
+                    name=f'{self.rng.choice(TOPICS)} {depth}.{n}', slug=f'cat-{self.run_id}-{depth}-{n}',
+                    description=self.sentence(8), icon='book', parent=parent, is_active=self.rng.random() < 0.95,
+                )
+                for n, parent in enumerate(parent for parent in parents for _ in range(fanout))
+            ]
+            self.bulk(Category, level)
+            for category in level:
+                parent_path = category.parent.path if category.parent else ''
+                category.path = f'{parent_path}{category.pk:0{Category.PATH_STEP}d}/'
+                category.depth = category.path.count('/') - 1
+            Category.objects.bulk_update(level, ['path', 'depth'], batch_size=self.batch_size)
+            categories.extend(level)
+            parents = level
+        return categories
+
+    def create_courses(self, count, instructors, categories):
+        courses = []
+        for n in range(count):
+            topic = self.rng.choice(TOPICS)
+            title = self.rng.choice(TITLE_PATTERNS).format(topic=topic)
+            courses.append(Course(
+                title=title, slug=f'course-{self.run_id}-{n}', description=self.sentence(60),
+                instructor=self.rng.choice(instructors), category=self.rng.choice(categories),
+                thumbnail=f'https://example.com/thumbs/{n}.png', price=Decimal(self.rng.choice([0, 49, 99, 149, 199, 299])),
+                discount_percentage=self.rng.choice([0, 0, 0, 10, 20, 50]), level=self.rng.choice(LEVELS),
+                status=self.rng.choices(['published', 'draft', 'archived'], weights=[8, 1, 1])[0],
+                duration_hours=Decimal(self.rng.randint(2, 80)), requirements=self.sentence(10),
+                what_you_learn=f'{topic}: {self.sentence(15)}', is_featured=self.rng.random() < 0.05,
+            ))
+        self.bulk(Course, courses)
+        self.backdate(Course, courses, 'created_at', 730)
+        return courses
+
+    def create_curriculum(self, courses, sections_per_course, lessons_per_section):
+        sections = self.bulk(Section, [
+            Section(course=course, title=f'{n}-bo‘lim: {self.sentence(3)}', description=self.sentence(12), order=n)
+            for course in courses for n in range(1, sections_per_course + 1)
+        ])
+        lessons = [
+            Lesson(
+                section=section, title=self.sentence(4), content=self.sentence(80),
+                video_url=f'https://example.com/videos/{section.pk}/{n}.mp4', duration_minutes=self.rng.randint(3, 25),
+                order=n, is_preview=n == 1, resources='[]',
+            )
+            for section in sections for n in range(1, lessons_per_section + 1)
+        ]
+        self.bulk(Lesson, lessons)
+        by_course = {course.pk: [] for course in courses}
+        for lesson in lessons:
+            by_course[lesson.section.course_id].append(lesson.pk)
+        return by_course
+
+    def create_students(self, count):
+        return self.create_users('student', count)
+
+    def create_enrollments(self, students, courses, per_student):
+        enrollments = []
+        for student in students:
+            for course in self.rng.sample(courses, per_student):
+                enrollments.append(Enrollment(student=student, course=course, amount_paid=course.sale_price()))
+        self.bulk(Enrollment, enrollments)
+        self.backdate(Enrollment, enrollments, 'enrolled_at', 365)
+        return enrollments
+
+    def create_progress(self, enrollments, lessons):
+        created = 0
+        batch = []
+        for enrollment in enrollments:
+            course_lessons = lessons[enrollment.course_id]
+            # most students stall early, a few finish
+            done = min(len(course_lessons), int(len(course_lessons) * self.rng.betavariate(0.7, 1.5) * 1.2))
+            enrollment.completed_lessons = done
+            enrollment.progress_percentage = done * 100 // len(course_lessons) if course_lessons else 0
+            if course_lessons and done == len(course_lessons):
+                enrollment.status = 'completed'
+                enrollment.completed_at = self.past(30)
+            for position, lesson_id in enumerate(course_lessons[:done + 1]):
+                completed = position < done
+                batch.append(LessonProgress(
+                    enrollment=enrollment, lesson_id=lesson_id, is_completed=completed,
+                    completed_at=self.past(180) if completed else None, watch_time_minutes=self.rng.randint(1, 25),
+                ))
+            if len(batch) >= self.batch_size:
+                created += len(self.bulk(LessonProgress, batch))
+                batch = []
+        created += len(self.bulk(LessonProgress, batch))
+        Enrollment.objects.bulk_update(
+            enrollments, ['completed_lessons', 'progress_percentage', 'status', 'completed_at'], batch_size=self.batch_size,
+        )
+        return created
+
+    def create_reviews(self, enrollments, ratio):
+        reviews = [
+            CourseReview(
+                course_id=enrollment.course_id, student_id=enrollment.student_id,
+                rating=self.rng.choices([1, 2, 3, 4, 5], weights=[1, 1, 3, 8, 12])[0],
+                title=self.sentence(3), comment=self.sentence(30),
+            )
+            for enrollment in enrollments if self.rng.random() < ratio
+        ]
+        self.bulk(CourseReview, reviews)
+        self.backdate(CourseReview, reviews, 'created_at', 365)
+        return len(reviews)
+
+    def create_questions(self, count, enrollments, lessons, courses):
+        instructor_users = {course.pk: course.instructor.user_id for course in courses}
+        instructors = {course.pk: course.instructor_id for course in courses}
+        questions = []
+        for _ in range(count):
+            enrollment = self.rng.choice(enrollments)
+            course_lessons = lessons[enrollment.course_id]
+            if not course_lessons:
+                continue
+            questions.append(Question(
+                lesson_id=self.rng.choice(course_lessons), student_id=enrollment.student_id,
+                title=self.sentence(5).rstrip('.') + '?', content=self.sentence(25),
+                instructor_id=instructors[enrollment.course_id],
+            ))
+            questions[-1].course_id = enrollment.course_id
+        self.bulk(Question, questions)
+        self.backdate(Question, questions, 'created_at', 180)
+
+        answers = []
+        for question in questions:
+            for _ in range(self.rng.choice([0, 0, 1, 1, 2, 3])):
+                by_instructor = self.rng.random() < 0.4
+                answers.append(Answer(
+                    question=question, content=self.sentence(20), is_instructor_answer=by_instructor,
+                    user_id=instructor_users[question.course_id] if by_instructor else self.rng.choice(enrollments).student_id,
+                ))
+                question.answer_count += 1
+                question.has_instructor_answer |= by_instructor
+        self.bulk(Answer, answers)
+        Question.objects.bulk_update(questions, ['answer_count', 'has_instructor_answer'], batch_size=500)
+        return len(questions)
@@ -0,0 +1,47 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the primary SQLite database onto every replica listed in DATABASE_REPLICAS with SQLite's "
+        "online backup API. Stands in for streaming replication when running locally; with --loop the "
+        "replicas lag the primary by about --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep syncing until interrupted.")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between syncs with --loop.")
+        parser.add_argument('--pages', type=int, default=-1, help="Pages copied per backup step, -1 copies all at once.")
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("sync_replicas only copies SQLite databases; use the database's own replication.")
+        replicas = {alias: settings.DATABASES[alias]['NAME'] for alias in getattr(settings, 'DATABASE_REPLICAS', [])}
+        if not replicas:
+            raise CommandError("No replicas configured, set DATABASE_REPLICA_FILES.")
+
+        while True:
+            started = time.perf_counter()
+            self.sync(primary['NAME'], replicas, options['pages'])
+            self.stdout.write(f"Synced {len(replicas)} replica(s) in {time.perf_counter() - started:.2f}s.")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def sync(self, source, replicas, pages):
+        src = sqlite3.connect(source)
+        try:
+            for target in replicas.values():
+                dst = sqlite3.connect(target)
+                try:
+                    src.backup(dst, pages=pages)
+                finally:
+                    dst.close()
+        finally:
+            src.close()
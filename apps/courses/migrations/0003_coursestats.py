@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def create_stats(apps, schema_editor):
+    # enrolments and reviews are installed together with this migration, so
+    # only the lesson totals can be non-zero for existing courses
+    Course = apps.get_model('courses', 'Course')
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    Lesson = apps.get_model('courses', 'Lesson')
+
+    lessons = {
+        row['section__course_id']: row
+        for row in Lesson.objects.values('section__course_id').annotate(n=Count('id'), minutes=Sum('duration_minutes'))
+    }
+    CourseStats.objects.bulk_create(
+        [
+            CourseStats(
+                course_id=course_id,
+                total_lessons=lessons.get(course_id, {}).get('n', 0),
+                total_duration=lessons.get(course_id, {}).get('minutes') or 0,
+            )
+            for course_id in Course.objects.values_list('id', flat=True).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0002_course_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='courses.course')),
+                ('students_count', models.IntegerField(default=0)),
+                ('reviews_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0)),
+                ('total_lessons', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['average_rating', 'course'], name='coursestats_rating_idx'), models.Index(fields=['students_count', 'course'], name='coursestats_students_idx')],
+            },
+        ),
+        migrations.RunPython(create_stats, migrations.RunPython.noop),
+    ]
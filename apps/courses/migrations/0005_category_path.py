@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:47
+
+from django.db import migrations, models
+
+PATH_STEP = 10
+
+
+def build_paths(apps, schema_editor):
+    Category = apps.get_model('courses', 'Category')
+    children = {}
+    for pk, parent_id in Category.objects.values_list('id', 'parent_id'):
+        children.setdefault(parent_id, []).append(pk)
+
+    updates = []
+    stack = [(pk, '') for pk in children.get(None, [])]
+    while stack:
+        pk, parent_path = stack.pop()
+        path = f'{parent_path}{pk:0{PATH_STEP}d}/'
+        updates.append(Category(id=pk, path=path, depth=path.count('/') - 1))
+        stack.extend((child, path) for child in children.get(pk, []))
+    Category.objects.bulk_update(updates, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0004_course_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(build_paths, migrations.RunPython.noop),
+    ]
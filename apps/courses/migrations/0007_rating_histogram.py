@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_ratings(apps, schema_editor):
+    CourseStats = apps.get_model('courses', 'CourseStats')
+    CourseReview = apps.get_model('reviews', 'CourseReview')
+    histograms = {}
+    for course_id, rating, n in (
+        CourseReview.objects.filter(rating__gte=1, rating__lte=5)
+        .values('course_id', 'rating').annotate(n=Count('id')).values_list('course_id', 'rating', 'n')
+    ):
+        histograms.setdefault(course_id, CourseStats(course_id=course_id))
+        setattr(histograms[course_id], f'rating_{rating}', n)
+    CourseStats.objects.bulk_update(
+        histograms.values(), [f'rating_{stars}' for stars in range(1, 6)], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_catalogue_indexes'),
+        ('reviews', '0003_question_threads'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_1',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_2',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_3',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_4',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='coursestats',
+            name='rating_5',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_ratings, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,11 @@
-from django.db import models
+import re
+from decimal import Decimal
+
+from django.db import models, transaction
+from django.db.models.functions import Concat, Substr
 from django.contrib.auth.models import User
-from django.utils.text import slugify
+
+from apps.courses.slugs import base_slug, save_with_unique_slug
 
 
 class Instructor(models.Model):
@@ -18,19 +23,53 @@ class Instructor(models.Model):
 
 
 class Category(models.Model):
+    PATH_STEP = 10  # digits per ancestor id in ``path``
+
     name = models.CharField(max_length=100)
     slug = models.SlugField(unique=True)
     description = models.TextField()
     icon = models.CharField(max_length=50)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='subcategories')
     is_active = models.BooleanField(default=True)
+    # materialized path: zero-padded ids from the root down to this category, e.g. "0000000001/0000000007/"
+    path = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    depth = models.IntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.name
 
     def save(self, *args, **kwargs):
-        self.slug = f"{self.name}-{self.pk}"
-        super().save(*args, **kwargs)
+        # read from the database: in-memory paths go stale when an ancestor moves
+        paths = dict(Category.objects.filter(pk__in=[self.pk, self.parent_id]).values_list('id', 'path'))
+        parent_path, stored_path = paths.get(self.parent_id, ''), paths.get(self.pk, '')
+        if stored_path and parent_path.startswith(stored_path):
+            raise ValueError("A category can not be moved under itself or its subcategories.")
+
+        with transaction.atomic():
+            base = base_slug(Category, self.name)
+            if self.slug and re.fullmatch(rf'{base}(-[0-9]+)?', self.slug):
+                super().save(*args, **kwargs)
+            else:
+                def save(slug):
+                    self.slug = slug
+                    super(Category, self).save(*args, **kwargs)
+
+                save_with_unique_slug(Category, self.name, save, exclude_pk=self.pk)
+            self._sync_path(parent_path, stored_path)
+
+    def _sync_path(self, parent_path, stored_path):
+        path = f'{parent_path}{self.pk:0{self.PATH_STEP}d}/'
+        self.path, self.depth = path, path.count('/') - 1
+        if path == stored_path:
+            return
+        old_path, old_depth = stored_path, stored_path.count('/') - 1
+        Category.objects.filter(pk=self.pk).update(path=self.path, depth=self.depth)
+        if old_path:
+            # re-root the whole subtree in one statement
+            Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(models.Value(path), Substr('path', len(old_path) + 1)),
+                depth=models.F('depth') + (self.depth - old_depth),
+            )
 
 class Course(models.Model):
     LEVEL_CHOICES = [
@@ -63,10 +102,46 @@ class Course(models.Model):
     is_featured = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # stored so that ordering/paginating by final price can use an index
+    final_price_value = models.GeneratedField(
+        expression=models.F('price') * (100 - models.F('discount_percentage')) / models.Value(100.0),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['price', 'id'], name='course_price_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='course_created_id_idx'),
+            models.Index(fields=['title', 'id'], name='course_title_id_idx'),
+            models.Index(fields=['final_price_value', 'id'], name='course_final_price_id_idx'),
+            # equality filters of the listing followed by its default ordering
+            models.Index(fields=['level', 'created_at', 'id'], name='course_level_created_idx'),
+            models.Index(fields=['level', 'price', 'id'], name='course_level_price_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], name='course_category_created_idx'),
+            models.Index(fields=['instructor', 'created_at', 'id'], name='course_instr_created_idx'),
+            # partial indexes: the public catalogue only ever reads published (and featured) rows
+            models.Index(
+                fields=['created_at', 'id'], name='course_published_created_idx',
+                condition=models.Q(status='published'),
+            ),
+            models.Index(
+                fields=['price', 'id'], name='course_published_price_idx',
+                condition=models.Q(status='published'),
+            ),
+            models.Index(
+                fields=['created_at', 'id'], name='course_featured_created_idx',
+                condition=models.Q(is_featured=True),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
+    def sale_price(self):
+        """What one enrollment costs now: the price after the discount, to the cent."""
+        return (self.price * (100 - self.discount_percentage) / 100).quantize(Decimal('0.01'))
+
 
 class Section(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='sections')
@@ -90,3 +165,52 @@ class Lesson(models.Model):
 
     def __str__(self):
         return f"{self.section.course.title} - {self.title}"
+
+
+RATINGS = range(1, 6)
+
+
+class CourseStats(models.Model):
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    students_count = models.IntegerField(default=0)
+    reviews_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    # how many reviews gave 1 to 5 stars
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    total_lessons = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)  # minutes
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['average_rating', 'course'], name='coursestats_rating_idx'),
+            models.Index(fields=['students_count', 'course'], name='coursestats_students_idx'),
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.course_id}"
+
+    def rating_histogram(self):
+        return {stars: getattr(self, f'rating_{stars}') for stars in RATINGS}
+
+
+class CourseSearchIndex(models.Model):
+    """
+    The SQLite FTS5 table kept by apps/courses/search.py, mapped so searches
+    join it on its rowid. Created by migration 0004 and written with raw SQL.
+    """
+    course = models.OneToOneField(
+        Course, on_delete=models.DO_NOTHING, primary_key=True, db_column='rowid', db_constraint=False,
+        related_name='search_index',
+    )
+    # FTS5's hidden column named after the table: MATCH on it searches every
+    # column, and bm25() and snippet() take it as their first argument
+    document = models.TextField(db_column='courses_course_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'courses_course_fts'
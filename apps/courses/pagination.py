@@ -0,0 +1,220 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import GeneratedField, Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _positive_int(value, default, cutoff):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    if value <= 0:
+        return default
+    return min(value, cutoff)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over a whitelisted ordering with an ``id`` tiebreaker.
+
+    Every page, the first one included, is a single range query of the form
+    ``field >= value AND (field > value OR id > last_id)`` so deep pages cost
+    the same as the first page and never use OFFSET.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_query_param = 'ordering'
+    page_size = 20
+    max_page_size = 100
+    tiebreaker = 'id'
+
+    # public ordering name -> model field or annotation (``__`` follows relations),
+    # or a ``(field, tiebreaker)`` pair when another column identifies the row
+    # better for the index being walked (e.g. ``stats__course_id``)
+    orderings = {}
+    default_ordering = None
+
+    def __init__(self, orderings=None, default_ordering=None, page_size=None):
+        if orderings is not None:
+            self.orderings = orderings
+        if default_ordering is not None:
+            self.default_ordering = default_ordering
+        if page_size is not None:
+            self.page_size = page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.prepare(queryset, request)
+        return self.finish(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Same as ``paginate_queryset``, fetching the page with the async ORM."""
+        queryset = self.prepare(queryset, request)
+        return self.finish([obj async for obj in queryset])
+
+    def prepare(self, queryset, request):
+        """Parses the request and returns the still unevaluated page query (one row more than a page)."""
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.page_size_value = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        self.is_first_page = cursor is None
+        self.cursor = cursor
+        reverse = bool(cursor and cursor['r'])
+        field, tiebreaker, descending = self._split(self.ordering)
+        if reverse:
+            descending = not descending
+
+        if cursor is not None:
+            value = self._coerce(queryset, field, cursor['v'])
+            queryset = queryset.filter(self._after(field, tiebreaker, descending, value, cursor['i']))
+
+        prefix = '-' if descending else ''
+        queryset = queryset.order_by(f'{prefix}{field}', f'{prefix}{tiebreaker}')
+        return queryset[:self.page_size_value + 1]
+
+    def finish(self, rows):
+        cursor = self.cursor
+        reverse = bool(cursor and cursor['r'])
+        has_more = len(rows) > self.page_size_value
+        rows = rows[:self.page_size_value]
+        if reverse:
+            rows.reverse()
+
+        self.page = rows
+        if reverse:
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param) or self.default_ordering
+        if ordering.removeprefix('-') not in self.orderings:
+            allowed = ', '.join(sorted(self.orderings))
+            raise ValidationError({'ordering': f"Ordering must be one of: {allowed} (prefix with '-' for descending)."})
+        return ordering
+
+    def get_page_size(self, request):
+        return _positive_int(
+            request.query_params.get(self.page_size_query_param), self.page_size, self.max_page_size
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self._link(self.page[0], reverse=True)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            cursor = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            cursor = {'o': cursor['o'], 'v': cursor['v'], 'i': int(cursor['i']), 'r': bool(cursor.get('r'))}
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        if cursor['o'] != self.ordering:
+            raise ValidationError({'cursor': 'Cursor does not match the requested ordering.'})
+        return cursor
+
+    def encode_cursor(self, value, pk, reverse):
+        payload = {'o': self.ordering, 'v': self._dump(value), 'i': pk, 'r': int(reverse)}
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def _link(self, obj, reverse):
+        field, tiebreaker, _ = self._split(self.ordering)
+        cursor = self.encode_cursor(self._value(obj, field), self._value(obj, tiebreaker), reverse)
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, cursor)
+        if self.ordering == self.default_ordering:
+            url = remove_query_param(url, self.ordering_query_param)
+        return url
+
+    def _split(self, ordering):
+        descending = ordering.startswith('-')
+        field = self.orderings[ordering.removeprefix('-')]
+        field, tiebreaker = field if isinstance(field, tuple) else (field, self.tiebreaker)
+        return field, tiebreaker, descending
+
+    def _after(self, field, tiebreaker, descending, value, pk):
+        op, strict = ('lte', 'lt') if descending else ('gte', 'gt')
+        return Q(**{f'{field}__{op}': value}) & (
+            Q(**{f'{field}__{strict}': value}) | Q(**{f'{tiebreaker}__{strict}': pk})
+        )
+
+    @staticmethod
+    def _output_field(queryset, field):
+        """The model field (or annotation output field) ``field`` orders by."""
+        if field in queryset.query.annotations:
+            return queryset.query.annotations[field].output_field
+        model, path = queryset.model, field.split('__')
+        for name in path[:-1]:
+            model = model._meta.get_field(name).related_model
+        model_field = model._meta.get_field(path[-1])
+        return model_field.output_field if isinstance(model_field, GeneratedField) else model_field
+
+    def _coerce(self, queryset, field, value):
+        """The cursor's ``value`` as the Python type of ``field``; a tampered cursor is a 400, not a 500."""
+        if not isinstance(value, (str, int, float)) or isinstance(value, bool):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+        try:
+            return self._output_field(queryset, field).to_python(value)
+        except (DjangoValidationError, FieldDoesNotExist):
+            raise ValidationError({'cursor': 'Invalid cursor.'})
+
+    @staticmethod
+    def _value(obj, field):
+        if isinstance(obj, dict):
+            # a values() row, keyed by the full lookup
+            return obj[field]
+        for attr in field.split('__'):
+            obj = getattr(obj, attr)
+        return obj
+
+    @staticmethod
+    def _dump(value):
+        if isinstance(value, Decimal):
+            return str(value)
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        return value
@@ -0,0 +1,151 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, CharField, F, FloatField, Func, Lookup, Q, Value, When
+from django.utils.module_loading import import_string
+
+from apps.courses.models import Course, CourseSearchIndex
+
+MAX_TERMS = 10
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+@CourseSearchIndex._meta.get_field('document').register_lookup
+class Match(Lookup):
+    """``search_index__document__match=query``: an FTS5 MATCH on the joined index."""
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+class BaseSearchBackend:
+    """
+    Keeps a search index of courses and applies ``search`` to a Course queryset.
+
+    ``search`` must return the queryset narrowed to matching courses and
+    annotated with ``search_rank`` (lower is more relevant) and
+    ``search_snippet`` (may be None), so it combines with any other filters.
+    """
+
+    def index(self, courses):
+        pass
+
+    def remove(self, course_ids):
+        pass
+
+    def reindex(self, batch_size=1000):
+        return 0
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    @staticmethod
+    def no_results(queryset):
+        return queryset.annotate(
+            search_rank=Value(0.0, output_field=FloatField()),
+            search_snippet=Value(None, output_field=CharField()),
+        ).none()
+
+
+class DatabaseSearchBackend(BaseSearchBackend):
+    """Unindexed LIKE matching; for databases without a full-text engine."""
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.no_results(queryset)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term) | Q(what_you_learn__icontains=term)
+            )
+        return queryset.annotate(
+            search_rank=Case(When(title__icontains=terms[0], then=Value(0.0)), default=Value(1.0), output_field=FloatField()),
+            search_snippet=Value(None, output_field=CharField()),
+        )
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    SQLite FTS5 inverted index over title, description and what_you_learn.
+
+    The index table is created by the courses migrations; its rowid is the
+    course id. Title matches weigh the most in the bm25 ranking.
+    """
+    table = 'courses_course_fts'
+    columns = ('title', 'description', 'what_you_learn')
+    weights = (10.0, 1.0, 3.0)
+    snippet_tokens = 16
+
+    def index(self, courses):
+        rows = [(course.pk, course.title, course.description, course.what_you_learn) for course in courses]
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {self.table} (rowid, title, description, what_you_learn) VALUES (%s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, course_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {self.table} WHERE rowid = %s', [(pk,) for pk in course_ids])
+
+    def reindex(self, batch_size=1000):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table}')
+
+        indexed = 0
+        last_id = 0
+        courses = Course.objects.order_by('id').only('id', *self.columns)
+        while True:
+            batch = list(courses.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            self.index(batch)
+            indexed += len(batch)
+            last_id = batch[-1].pk
+
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table} ({self.table}) VALUES ('optimize')")
+        return indexed
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return self.no_results(queryset)
+
+        document = F('search_index__document')
+        # the index is joined on rowid, so MATCH runs once per query and bm25()
+        # and snippet() read the matched row instead of searching again per course
+        return queryset.filter(search_index__document__match=match).annotate(
+            search_rank=Func(document, *(Value(weight) for weight in self.weights), function='bm25', output_field=FloatField()),
+            search_snippet=Func(
+                document, Value(-1), Value('<mark>'), Value('</mark>'), Value('…'), Value(self.snippet_tokens),
+                function='snippet', output_field=CharField(),
+            ),
+        )
+
+    @staticmethod
+    def match_expression(query):
+        # every term is quoted, so user input can never be parsed as FTS syntax;
+        # the trailing * makes the last term match as a prefix while typing
+        terms = search_terms(query)
+        if not terms:
+            return ''
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    return import_string(settings.COURSE_SEARCH_BACKEND)()
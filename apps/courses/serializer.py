@@ -2,21 +2,36 @@ from decimal import Decimal
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import User
-from django.db.models import Avg
-from django.utils.text import slugify
+from django.db.models import Prefetch
 from rest_framework import serializers
 
-from apps.courses.models import Course, Instructor, Category
+from apps.courses.listing import FIELD_COLUMNS, INSTRUCTOR_COLUMNS, STATS_FIELDS
+from apps.courses.models import Course, Instructor, Category, Section, Lesson
+from apps.courses.slugs import save_with_unique_slug
+from core.middleware import TimedSerializerMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class MemoizedRepresentationMixin:
+    """Serialize each related object once per response, however many rows point at it."""
+
+    def to_representation(self, instance):
+        if instance.pk is None:
+            return super().to_representation(instance)
+        memo = self.root.__dict__.setdefault('_representation_memo', {})
+        key = (type(self), instance.pk)
+        if key not in memo:
+            memo[key] = super().to_representation(instance)
+        return memo[key]
+
+
+class UserSerializer(MemoizedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [ 'username', 'email', 'first_name', 'last_name']
         read_only_fields = ['id']
 
 
-class InstructorSerializer(serializers.ModelSerializer):
+class InstructorSerializer(TimedSerializerMixin, MemoizedRepresentationMixin, serializers.ModelSerializer):
     user = UserSerializer(required=True)
     class Meta:
         model = Instructor
@@ -32,14 +47,14 @@ class InstructorSerializer(serializers.ModelSerializer):
         return instructor
 
 
-class CategoryModelSerializer(serializers.ModelSerializer):
+class CategoryModelSerializer(TimedSerializerMixin, MemoizedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = '__all__'
+        exclude = ('path', 'depth')
         read_only_fields = ['slug']
 
 
-class CourseModelSerializer(serializers.ModelSerializer):
+class CourseModelSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     level = serializers.ChoiceField(choices=['beginner', 'intermediate', 'advanced'])
     instructor = serializers.PrimaryKeyRelatedField(queryset=Instructor.objects.all())
     category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all())
@@ -58,17 +73,10 @@ class CourseModelSerializer(serializers.ModelSerializer):
         read_only_fields = ['id','slug', 'created_at','teach','category_id']
 
     def create(self, validated_data):
-        title = validated_data.get('title')
-        base_slug = slugify(title)
-        slug = base_slug
-        counter = 1
-
-        while Course.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-
-        validated_data['slug'] = slug
-        return super().create(validated_data)
+        create = super().create
+        return save_with_unique_slug(
+            Course, validated_data.get('title'), lambda slug: create({**validated_data, 'slug': slug})
+        )
 
     @staticmethod
     def validate_title(title):
@@ -127,14 +135,14 @@ class CourseModelSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Name can not be empty.")
         return language
 
-class CategoryNestedSerializer(serializers.ModelSerializer):
+class CategoryNestedSerializer(TimedSerializerMixin, MemoizedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = Category
-        exclude = ('parent', 'is_active')
+        exclude = ('parent', 'is_active', 'path', 'depth')
 
 
 
-class InstructorNestedSerializer(serializers.ModelSerializer):
+class InstructorNestedSerializer(TimedSerializerMixin, MemoizedRepresentationMixin, serializers.ModelSerializer):
     user = UserSerializer()
     class Meta:
         model = Instructor
@@ -142,98 +150,235 @@ class InstructorNestedSerializer(serializers.ModelSerializer):
 
 
 
-class CourseListSerializer(serializers.ModelSerializer):
+class CourseStatsFieldsSerializer(serializers.Serializer):
+    # read from the denormalized CourseStats row, select_related as ``stats``
+    total_lessons = serializers.IntegerField(source='stats.total_lessons', read_only=True)
+    total_duration = serializers.IntegerField(source='stats.total_duration', read_only=True)
+    students_count = serializers.IntegerField(source='stats.students_count', read_only=True)
+    average_rating = serializers.FloatField(source='stats.average_rating', read_only=True)
+    reviews_count = serializers.IntegerField(source='stats.reviews_count', read_only=True)
+
+
+class SparseFieldsetMixin:
+    """
+    ``fields=`` / ``exclude=`` support. ``field_columns`` maps every output
+    field to the columns it is built from; a selection drops the other
+    fields from the serializer (``context['fields']``) and becomes
+    ``.only()`` on the queryset, joining just the relations the selected
+    fields go through. Nested serializers render whole.
+    """
+    field_columns = {}
+    # read whatever is selected
+    key_columns = ('id',)
+
+    @classmethod
+    def parse_fieldset(cls, params):
+        """The selected field names, or ``None`` when the query string selects none (every field)."""
+        fields, exclude = params.get('fields'), params.get('exclude')
+        if not fields and not exclude:
+            return None
+        selected = cls._field_names('fields', fields) if fields else set(cls.field_columns)
+        if exclude:
+            selected -= cls._field_names('exclude', exclude)
+        return frozenset(selected)
+
+    @classmethod
+    def _field_names(cls, param, value):
+        names = {name.strip() for name in value.split(',') if name.strip()}
+        unknown = names - cls.field_columns.keys()
+        if unknown:
+            raise serializers.ValidationError(
+                {param: f"Unknown field(s): {', '.join(sorted(unknown))}. Use: {', '.join(cls.field_columns)}."}
+            )
+        return names
+
+    @classmethod
+    def fieldset_columns(cls, fields, extra=()):
+        """The columns ``fields`` are built from, plus ``key_columns`` and ``extra``, without repeats."""
+        columns = [*cls.key_columns, *extra]
+        for name, field_columns in cls.field_columns.items():
+            if name in fields:
+                columns.extend(field_columns)
+        return tuple(dict.fromkeys(columns))
+
+    @classmethod
+    def sparse_queryset(cls, queryset, fields, extra=()):
+        columns = cls.fieldset_columns(fields, extra)
+        relations = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+        return queryset.select_related(*relations).only(*columns)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected = self.context.get('fields')
+        if selected is not None:
+            for field_name in list(fields):
+                if field_name not in selected:
+                    fields.pop(field_name)
+        return fields
+
+
+class CourseListSerializer(TimedSerializerMixin, SparseFieldsetMixin, CourseStatsFieldsSerializer, serializers.ModelSerializer):
     category = CategoryNestedSerializer(read_only=True)
     instructor = InstructorNestedSerializer(read_only=True)
     final_price = serializers.SerializerMethodField(read_only=True)
-    # total_lessons = serializers.SerializerMethodField(read_only=True)
-    # total_duration = serializers.SerializerMethodField(read_only=True)
-    # students_count = serializers.SerializerMethodField(read_only=True)
-    # average_rating = serializers.SerializerMethodField(read_only=True)
-    # reviews_count = serializers.SerializerMethodField(read_only=True)
     category_id = CategoryModelSerializer(source='category', read_only=True)
     teach = InstructorSerializer(source='instructor', read_only=True)
 
     class Meta:
         model = Course
-        exclude = ['id', 'updated_at', 'is_featured']
+        exclude = ['id', 'updated_at', 'is_featured', 'final_price_value']
         read_only_fields = ['id', 'slug', 'created_at']
 
+    # shared with the values() listing, see apps/courses/listing.py
+    field_columns = FIELD_COLUMNS
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None, extra=()):
+        if fields is None:
+            return queryset.select_related('category', 'instructor__user', 'stats')
+        return cls.sparse_queryset(queryset, fields, extra)
+
     @staticmethod
     def get_final_price(value):
         return value.price * (Decimal(1) - Decimal(value.discount_percentage) / Decimal(100))
 
-    # def get_total_lessons(self,value):
-    #     pass
-    #
-    # def get_total_duration(self,value):
-    #     pass
-    #
-    # @staticmethod
-    # def get_students_count(value):
-    #     return value.enrollments.count()
-    #
-    # @staticmethod
-    # def get_average_rating(value):
-    #     return value.reviews.aggregate(avg=Avg('rating'))
-    #
-    # @staticmethod
-    # def get_reviews_count(value):
-    #     return value.reviews.count()
-
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        snippet = getattr(instance, 'search_snippet', None)
+        if snippet is not None:
+            data['search_snippet'] = snippet
+        return data
 
     def create(self, validated_data):
-        title = validated_data.get('title')
-        base_slug = slugify(title)
-        slug = base_slug
-        counter = 1
+        create = super().create
+        return save_with_unique_slug(
+            Course, validated_data.get('title'), lambda slug: create({**validated_data, 'slug': slug})
+        )
+
+
+class CourseListSideloadSerializer(CourseListSerializer):
+    """
+    Rows reference their instructor and category by id; the related objects
+    are rendered once each in the response's ``included`` block.
+    """
+    category = serializers.PrimaryKeyRelatedField(read_only=True)
+    instructor = serializers.PrimaryKeyRelatedField(read_only=True)
+    category_id = None
+    teach = None
 
-        while Course.objects.filter(slug=slug).exists():
-            slug = f"{base_slug}-{counter}"
-            counter += 1
-
-        validated_data['slug'] = slug
-        return super().create(validated_data)
-
-
-
-class CourseDetailSerializer(serializers.ModelSerializer):
+    @staticmethod
+    def get_included(courses, fields=None):
+        included = {}
+        if fields is None or 'instructor' in fields:
+            instructors = {course.instructor_id: course.instructor for course in courses}
+            included['instructors'] = InstructorNestedSerializer(instructors.values(), many=True).data
+        if fields is None or 'category' in fields:
+            categories = {course.category_id: course.category for course in courses}
+            included['categories'] = CategoryNestedSerializer(categories.values(), many=True).data
+        return included
+
+
+class CourseDetailSerializer(TimedSerializerMixin, SparseFieldsetMixin, CourseStatsFieldsSerializer, serializers.ModelSerializer):
     category_id = CategoryModelSerializer(source='category', read_only=True)
     teach = InstructorSerializer(source='instructor', read_only=True)
 
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['final_price_value']
         read_only_fields = ['slug', 'created_at']
 
+    field_columns = {
+        'id': ('id',),
+        **{name: (f'stats__{name}',) for name in STATS_FIELDS},
+        'category_id': FIELD_COLUMNS['category_id'],
+        'teach': INSTRUCTOR_COLUMNS,
+        **{
+            name: (name,) for name in (
+                'title', 'slug', 'description', 'thumbnail', 'trailer_url', 'price', 'discount_percentage', 'level',
+                'status', 'duration_hours', 'requirements', 'what_you_learn', 'language', 'is_featured',
+                'created_at', 'updated_at',
+            )
+        },
+        'instructor': ('instructor_id',),
+        'category': ('category_id',),
+    }
+    # what course_deps reads
+    key_columns = ('id', 'category_id', 'instructor_id', 'instructor__user_id')
+
+    @classmethod
+    def setup_eager_loading(cls, queryset, fields=None):
+        if fields is None:
+            return queryset.select_related('category', 'instructor__user', 'stats')
+        return cls.sparse_queryset(queryset, fields)
+
 
     def update(self, instance, validated_data):
         title = validated_data.get('title', instance.title)
-        if title != instance.title:
-            slug = slugify(title)
-            counter = 1
-            while Course.objects.filter(slug=slug).exists():
-                slug = f"{slugify(title)}-{counter}"
-                counter += 1
-            validated_data['slug'] = slug
-        return super().update(instance, validated_data)
+        if title == instance.title:
+            return super().update(instance, validated_data)
+        update = super().update
+        return save_with_unique_slug(
+            Course, title, lambda slug: update(instance, {**validated_data, 'slug': slug}), exclude_pk=instance.pk
+        )
 
 
-class CourseDetailPutPatchDelete(serializers.ModelSerializer):
+class CourseDetailPutPatchDelete(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Course
-        fields = '__all__'
+        exclude = ['final_price_value']
         read_only_fields = ['slug', 'created_at','category_id','teach']
 
 
     def update(self, instance, validated_data):
         title = validated_data.get('title', instance.title)
-        if title != instance.title:
-            slug = slugify(title)
-            counter = 1
-            while Course.objects.filter(slug=slug).exists():
-                slug = f"{slugify(title)}-{counter}"
-                counter += 1
-            validated_data['slug'] = slug
-        return super().update(instance, validated_data)
\ No newline at end of file
+        if title == instance.title:
+            return super().update(instance, validated_data)
+        update = super().update
+        return save_with_unique_slug(
+            Course, title, lambda slug: update(instance, {**validated_data, 'slug': slug}), exclude_pk=instance.pk
+        )
+
+
+class CurriculumLessonSerializer(serializers.ModelSerializer):
+    heavy_fields = ('content', 'resources')
+
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'video_url', 'duration_minutes', 'order', 'is_preview', 'content', 'resources']
+
+    def get_fields(self):
+        # heavy columns are deferred unless asked for, so they must not be touched either
+        fields = super().get_fields()
+        include = self.context.get('include', ())
+        for field_name in self.heavy_fields:
+            if field_name not in include:
+                fields.pop(field_name)
+        return fields
+
+
+class CurriculumSectionSerializer(serializers.ModelSerializer):
+    lessons = CurriculumLessonSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Section
+        fields = ['id', 'title', 'description', 'order', 'lessons']
+
+
+class CurriculumSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    sections = CurriculumSectionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Course
+        fields = ['id', 'title', 'slug', 'sections']
+
+    @staticmethod
+    def setup_eager_loading(queryset, include=()):
+        lessons = Lesson.objects.order_by('order', 'id')
+        deferred = [name for name in CurriculumLessonSerializer.heavy_fields if name not in include]
+        if deferred:
+            lessons = lessons.defer(*deferred)
+        return queryset.only('id', 'title', 'slug').prefetch_related(
+            Prefetch('sections', queryset=Section.objects.order_by('order', 'id')),
+            Prefetch('sections__lessons', queryset=lessons),
+        )
@@ -0,0 +1,163 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from apps.courses import stats
+from apps.courses.cache import bump_version
+from apps.courses.models import Category, Course, CourseStats, Instructor, Lesson, Section
+from apps.courses.search import get_search_backend
+from apps.courses.tree import invalidate_category_tree
+
+
+# Sections and courses being deleted, from their pre_delete to their post_delete. The
+# deletion collector sends every pre_delete before removing any row, so the lessons
+# cascading with a section are tallied here and uncounted with one UPDATE per section
+# (none when the course, and with it its stats row, goes too) instead of per lesson.
+_deleting = threading.local()
+
+
+def _deleting_marks():
+    if not hasattr(_deleting, 'sections'):
+        # section id -> [course id, lessons, minutes]
+        _deleting.sections, _deleting.courses = {}, set()
+    return _deleting
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CourseStats.objects.get_or_create(course=instance)
+
+
+@receiver(post_save, sender=Course)
+def index_course(sender, instance, raw=False, **kwargs):
+    if not raw:
+        get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Course)
+def unindex_course(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_course(sender, instance, **kwargs):
+    bump_version('course', instance.pk)
+    bump_version('curriculum', instance.pk)
+    # facet counts of any filter set may include the course
+    bump_version('catalogue', 'all')
+
+
+@receiver(pre_delete, sender=Course)
+def mark_course_deleted(sender, instance, **kwargs):
+    _deleting_marks().courses.add(instance.pk)
+
+
+@receiver(post_delete, sender=Course)
+def unmark_course_deleted(sender, instance, **kwargs):
+    _deleting_marks().courses.discard(instance.pk)
+
+
+@receiver(post_save, sender=Instructor)
+@receiver(post_delete, sender=Instructor)
+def invalidate_instructor(sender, instance, **kwargs):
+    bump_version('instructor', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    bump_version('user', instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    bump_version('category', instance.pk)
+    invalidate_category_tree()
+
+
+@receiver(pre_save, sender=Section)
+def remember_section_course(sender, instance, raw=False, **kwargs):
+    instance._previous_course_id = None
+    if instance.pk and not raw:
+        instance._previous_course_id = (
+            Section.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Section)
+@receiver(post_delete, sender=Section)
+def invalidate_section_curriculum(sender, instance, **kwargs):
+    bump_version('curriculum', instance.course_id)
+    previous = getattr(instance, '_previous_course_id', None)
+    if previous is not None and previous != instance.course_id:
+        bump_version('curriculum', previous)
+
+
+@receiver(pre_delete, sender=Section)
+def mark_section_deleted(sender, instance, **kwargs):
+    _deleting_marks().sections[instance.pk] = [instance.course_id, 0, 0]
+
+
+@receiver(post_delete, sender=Section)
+def uncount_section_lessons(sender, instance, **kwargs):
+    marks = _deleting_marks()
+    course_id, lessons, minutes = marks.sections.pop(instance.pk, (instance.course_id, 0, 0))
+    if lessons and course_id not in marks.courses:
+        stats.adjust_lessons(course_id, -lessons, -minutes)
+
+
+@receiver(post_save, sender=Section)
+def move_section_totals(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_course_id', None)
+    if created or raw or previous is None or previous == instance.course_id:
+        return
+    lessons = instance.lessons.all()
+    count, minutes = lessons.count(), sum(lessons.values_list('duration_minutes', flat=True))
+    stats.adjust_lessons(previous, -count, -minutes)
+    stats.adjust_lessons(instance.course_id, count, minutes)
+
+
+@receiver(pre_save, sender=Lesson)
+def remember_lesson_totals(sender, instance, raw=False, **kwargs):
+    instance._previous_totals = None
+    if instance.pk and not raw:
+        instance._previous_totals = (
+            Lesson.objects.filter(pk=instance.pk).values_list('section__course_id', 'duration_minutes').first()
+        )
+
+
+@receiver(post_save, sender=Lesson)
+def count_lesson(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    course_id = Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True).first()
+    bump_version('curriculum', course_id)
+    previous = getattr(instance, '_previous_totals', None)
+    if created or previous is None:
+        stats.adjust_lessons(course_id, 1, instance.duration_minutes)
+        return
+    previous_course_id, previous_minutes = previous
+    if previous_course_id != course_id:
+        bump_version('curriculum', previous_course_id)
+        stats.adjust_lessons(previous_course_id, -1, -previous_minutes)
+        stats.adjust_lessons(course_id, 1, instance.duration_minutes)
+    elif previous_minutes != instance.duration_minutes:
+        stats.adjust_lessons(course_id, 0, instance.duration_minutes - previous_minutes)
+
+
+@receiver(post_delete, sender=Lesson)
+def uncount_lesson(sender, instance, **kwargs):
+    deleted_with = _deleting_marks().sections.get(instance.section_id)
+    if deleted_with is not None:
+        # uncounted by uncount_section_lessons
+        deleted_with[1] += 1
+        deleted_with[2] += instance.duration_minutes
+        return
+    course_id = Section.objects.filter(pk=instance.section_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        bump_version('curriculum', course_id)
+        stats.adjust_lessons(course_id, -1, -instance.duration_minutes)
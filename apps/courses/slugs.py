@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, IntegerField, Max, Q
+from django.db.models.functions import Cast, Substr
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+
+
+def base_slug(model, text):
+    return slugify(text or '') or model._meta.model_name
+
+
+def next_free_slug(model, base, exclude_pk=None):
+    """
+    ``base`` if it is free, otherwise ``base-N`` with N one past the highest
+    suffix in use, found with a single aggregate query over the prefix.
+    """
+    # ``base`` and every ``base-…``: '-' is the only slug character sorting before '.', and a
+    # range (unlike LIKE 'base-%') is answered from the unique index on slug
+    queryset = model._default_manager.filter(slug__gte=base, slug__lt=f'{base}.')
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    found = queryset.aggregate(
+        taken=Count('pk', filter=Q(slug=base)),
+        last=Max(
+            Cast(Substr('slug', len(base) + 2), IntegerField()),
+            filter=Q(slug__regex=rf'^{base}-[0-9]+$'),
+        ),
+    )
+    if not found['taken']:
+        return base
+    return f"{base}-{(found['last'] or 0) + 1}"
+
+
+def save_with_unique_slug(model, text, save, exclude_pk=None):
+    """
+    Calls ``save(slug)`` with a free slug derived from ``text``.
+
+    Two concurrent writers can pick the same slug; the loser gets an
+    IntegrityError from the unique constraint and simply allocates again.
+    """
+    base = base_slug(model, text)
+    for attempt in range(MAX_ATTEMPTS):
+        slug = next_free_slug(model, base, exclude_pk)
+        try:
+            with transaction.atomic():
+                return save(slug)
+        except IntegrityError:
+            slug_taken = model._default_manager.filter(slug=slug).exclude(pk=exclude_pk).exists()
+            if not slug_taken or attempt == MAX_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,104 @@
+from django.db.models import Case, Count, F, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+
+from apps.courses.cache import bump_version
+from apps.courses.models import RATINGS, Course, CourseStats, Lesson
+
+HISTOGRAM_FIELDS = [f'rating_{stars}' for stars in RATINGS]
+STATS_FIELDS = [
+    'students_count', 'reviews_count', 'rating_sum', 'average_rating', *HISTOGRAM_FIELDS, 'total_lessons', 'total_duration',
+]
+
+
+def adjust_students(course_id, delta):
+    CourseStats.objects.filter(pk=course_id).update(students_count=F('students_count') + delta)
+    bump_version('course', course_id)
+
+
+def adjust_lessons(course_id, lessons_delta, duration_delta):
+    CourseStats.objects.filter(pk=course_id).update(
+        total_lessons=F('total_lessons') + lessons_delta,
+        total_duration=F('total_duration') + duration_delta,
+    )
+    bump_version('course', course_id)
+
+
+def adjust_reviews(course_id, count_delta, rating_delta, stars=None):
+    """``stars`` maps a rating to how many reviews with it were added (or removed, when negative)."""
+    histogram = {
+        f'rating_{rating}': F(f'rating_{rating}') + delta
+        for rating, delta in (stars or {}).items() if delta and rating in RATINGS
+    }
+    # every right-hand side sees the row as it was before the UPDATE,
+    # so the average is computed from the new totals in the same statement
+    CourseStats.objects.filter(pk=course_id).update(
+        **histogram,
+        reviews_count=F('reviews_count') + count_delta,
+        rating_sum=F('rating_sum') + rating_delta,
+        average_rating=Case(
+            When(reviews_count=-count_delta, then=Value(0.0)),
+            default=Cast(F('rating_sum') + rating_delta, FloatField()) / (F('reviews_count') + count_delta),
+            output_field=FloatField(),
+        ),
+    )
+    bump_version('course', course_id)
+    bump_version('course-ratings', 'all')
+
+
+def rebuild_stats(course_ids=None, batch_size=1000):
+    """Recompute stats from scratch in batches of courses; returns the number of courses rebuilt."""
+    from apps.enrolments.models import Enrollment
+    from apps.reviews.models import CourseReview
+
+    courses = Course.objects.order_by('id').values_list('id', flat=True)
+    if course_ids is not None:
+        courses = courses.filter(id__in=course_ids)
+
+    rebuilt = 0
+    last_id = 0
+    while True:
+        ids = list(courses.filter(id__gt=last_id)[:batch_size])
+        if not ids:
+            return rebuilt
+
+        students = dict(
+            Enrollment.objects.filter(course_id__in=ids)
+            .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+        )
+        reviews = {}
+        for course_id, rating, n in (
+            CourseReview.objects.filter(course_id__in=ids)
+            .values('course_id', 'rating').annotate(n=Count('id')).values_list('course_id', 'rating', 'n')
+        ):
+            review = reviews.setdefault(course_id, {'n': 0, 'total': 0, 'stars': {}})
+            review['n'] += n
+            review['total'] += rating * n
+            review['stars'][rating] = n
+        lessons = {
+            row['section__course_id']: row
+            for row in Lesson.objects.filter(section__course_id__in=ids)
+            .values('section__course_id').annotate(n=Count('id'), minutes=Sum('duration_minutes'))
+        }
+
+        rows = []
+        for course_id in ids:
+            review = reviews.get(course_id, {'n': 0, 'total': 0, 'stars': {}})
+            lesson = lessons.get(course_id, {'n': 0, 'minutes': 0})
+            rows.append(CourseStats(
+                course_id=course_id,
+                students_count=students.get(course_id, 0),
+                reviews_count=review['n'],
+                rating_sum=review['total'],
+                average_rating=(review['total'] / review['n']) if review['n'] else 0.0,
+                **{f'rating_{stars}': review['stars'].get(stars, 0) for stars in RATINGS},
+                total_lessons=lesson['n'],
+                total_duration=lesson['minutes'] or 0,
+            ))
+        CourseStats.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['course'], update_fields=STATS_FIELDS
+        )
+        for course_id in ids:
+            bump_version('course', course_id)
+        bump_version('course-ratings', 'all')
+        rebuilt += len(ids)
+        last_id = ids[-1]
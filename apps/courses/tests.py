@@ -1,3 +1,677 @@
-from django.test import TestCase
+import base64
+import json
+import re
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.http import QueryDict
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.courses import urls as course_urls
+from apps.courses.facets import PRICE_BUCKETS, cache_key, parse_facets
+from apps.courses.management.commands.benchmark_endpoints import VARIANTS
+from apps.courses.models import Category, Course, CourseSearchIndex, CourseStats, Lesson, Section
+from apps.courses.search import get_search_backend
+from apps.courses.slugs import next_free_slug
+from apps.courses.views import CourseListAPIView
+from apps.courses.stats import STATS_FIELDS, rebuild_stats
+from apps.enrolments.models import Enrollment, LessonProgress
+from apps.reviews.models import CourseReview
+from core.testing import CatalogueTestCase, QueryBudgetMixin
+
+# url name, url kwargs, query strings; {name} placeholders are filled from sample rows
+ENDPOINTS = [
+    ('courses:list-detail-course', {}, [
+        '', 'level=beginner', 'level=beginner&ordering=price', 'min_price=10&max_price=50&ordering=price',
+        'status=published', 'status=published&ordering=price', 'is_featured=true', 'category={category}',
+        'instructor={instructor}', 'ordering=title', 'ordering=final_price', 'ordering=rating',
+        'ordering=popularity', 'min_rating=4&ordering=rating', 'search=python', 'search=kod&ordering=relevance',
+    ]),
+    ('courses:detail', {'pk': '{course}'}, ['']),
+    ('courses:curriculum', {'pk': '{course}'}, ['']),
+    ('courses:export', {'dataset': 'courses', 'fmt': 'ndjson'}, ['', 'after={course}']),
+    ('courses:export', {'dataset': 'enrollments', 'fmt': 'ndjson'}, ['']),
+    ('courses:export', {'dataset': 'progress', 'fmt': 'ndjson'}, ['']),
+    ('enrolments:course-recommendations', {'pk': '{course}'}, ['']),
+    ('reviews:course-reviews', {'course_id': '{course}'}, ['', 'ordering=created_at']),
+    ('reviews:course-rating', {'course_id': '{course}'}, ['']),
+    ('reviews:lesson-questions', {'lesson_id': '{lesson}'}, ['', 'ordering=created_at']),
+    ('reviews:instructor-questions', {'pk': '{instructor}'}, ['', 'status=all', 'ordering=created_at']),
+]
+
+# hot ORM queries that are not behind a GET endpoint
+QUERYSETS = {
+    'category tree': lambda s: Category.objects.order_by('path').values('id', 'path'),
+    'enrollments of student': lambda s: Enrollment.objects.filter(student_id=s['student']).order_by('-enrolled_at'),
+    'enrollments of course by date': lambda s: Enrollment.objects.filter(course_id=s['course']).order_by('-enrolled_at'),
+    'enrollments since': lambda s: Enrollment.objects.filter(enrolled_at__gte=s['since']).order_by('enrolled_at'),
+    'completed enrollments': lambda s: Enrollment.objects.filter(status='completed', id__gt=0).order_by('id')[:1000],
+    'completed lessons of enrollment': lambda s: LessonProgress.objects.filter(
+        enrollment_id=s['enrollment'], is_completed=True).order_by('-completed_at'),
+    'lesson completions by date': lambda s: LessonProgress.objects.filter(
+        lesson_id=s['lesson'], completed_at__gte=s['since']),
+    'reviews of course': lambda s: CourseReview.objects.filter(course_id=s['course']).order_by('-created_at', '-id')[:20],
+    'reviews of student': lambda s: CourseReview.objects.filter(student_id=s['student']).order_by('-created_at'),
+}
+
+# SQLite "SCAN <table>" and PostgreSQL "Seq Scan on <table>" without an index
+FULL_SCAN = re.compile(r'^\W*(?:SCAN \w+$|Seq Scan on \w+)')
+# walking an index is only cheap when it also gives the order, so LIMIT can stop early
+INDEX_SCAN = re.compile(r'^\W*SCAN \w+ USING (?:COVERING )?INDEX')
+UNORDERED = 'USE TEMP B-TREE FOR ORDER BY'
+
+
+class QueryBudgetTests(QueryBudgetMixin, CatalogueTestCase):
+    urls = course_urls
+    variants = VARIANTS
+
+
+# a cached response runs no SQL, so every request must miss; plans are explained on the primary
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}, DATABASE_REPLICAS=[])
+class QueryPlanTests(CatalogueTestCase):
+    """EXPLAINs every hot endpoint and ORM query and fails if one reads a whole table instead of using an index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        enrollment = Enrollment.objects.order_by('id').first()
+        cls.samples = {
+            'course': cls.course.pk,
+            'instructor': cls.course.instructor_id,
+            'category': cls.course.category_id,
+            'student': User.objects.order_by('id').values_list('id', flat=True).first(),
+            'enrollment': enrollment.pk,
+            'lesson': LessonProgress.objects.order_by('id').values_list('lesson_id', flat=True).first(),
+            'since': timezone.now() - timedelta(days=7),
+        }
+
+    def setUp(self):
+        super().setUp()
+        # the exports are staff only
+        self.client.force_login(self.staff)
+
+    def assertUsesIndex(self, label, sql, params):
+        if not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            plan = [str(row[-1]) for row in cursor.fetchall()]
+        unordered = any(line.strip() == UNORDERED for line in plan)
+        scans = [line for line in plan if FULL_SCAN.match(line) or (unordered and INDEX_SCAN.match(line))]
+        self.assertFalse(scans, '\n'.join([f"{label} falls back to a full scan:", sql, *plan]))
+
+    def test_endpoints_use_indexes(self):
+        samples = self.samples
+        for name, kwargs, queries in ENDPOINTS:
+            url = reverse(name, kwargs={key: str(value).format(**samples) for key, value in kwargs.items()})
+            for query in queries:
+                full_url = f'{url}?{query.format(**samples)}' if query else url
+                with self.subTest(url=full_url):
+                    with CaptureQueriesContext(connection) as ctx:
+                        response = self.client.get(full_url)
+                        # streamed bodies only run their queries while being consumed
+                        if response.streaming:
+                            b''.join(response.streaming_content)
+                    for captured in ctx.captured_queries:
+                        self.assertUsesIndex(full_url, captured['sql'], None)
+
+    def test_querysets_use_indexes(self):
+        for label, build in QUERYSETS.items():
+            with self.subTest(queryset=label):
+                sql, params = build(self.samples).query.sql_with_params()
+                self.assertUsesIndex(label, sql, params)
+
+
+def course_payload(course, title, **fields):
+    """Body of a course create request with ``course``'s instructor and category."""
+    return {
+        'title': title, 'description': 'A course created by the test suite, long enough to validate.',
+        'instructor': course.instructor_id, 'category': course.category_id, 'thumbnail': 'https://example.com/t.png',
+        'price': '99.00', 'level': 'beginner', 'duration_hours': '10.00', 'requirements': 'None',
+        'what_you_learn': 'Things', **fields,
+    }
+
+
+class CourseStatsSignalTests(CatalogueTestCase):
+    """The counters kept by signals must always equal a recount from scratch."""
+
+    def assertStatsRecounted(self, course_id):
+        kept = CourseStats.objects.filter(pk=course_id).values(*STATS_FIELDS).get()
+        rebuild_stats(course_ids=[course_id])
+        self.assertEqual(kept, CourseStats.objects.filter(pk=course_id).values(*STATS_FIELDS).get())
+
+    def test_enrollments_and_reviews(self):
+        student = User.objects.create(username='stats-student')
+        enrollment = Enrollment.objects.create(student=student, course=self.course)
+        self.assertStatsRecounted(self.course.pk)
+
+        review = CourseReview.objects.create(course=self.course, student=student, rating=2, title='Meh', comment='...')
+        self.assertStatsRecounted(self.course.pk)
+        review.rating = 5
+        review.save()
+        self.assertStatsRecounted(self.course.pk)
+        review.delete()
+        self.assertStatsRecounted(self.course.pk)
+
+        enrollment.delete()
+        self.assertStatsRecounted(self.course.pk)
+
+    def test_lessons_and_sections(self):
+        other = Course.objects.exclude(pk=self.course.pk).order_by('id').first()
+        section = Section.objects.create(course=self.course, title='Extra')
+        lesson = Lesson.objects.create(
+            section=section, title='Extra lesson', content='...', video_url='https://example.com/v.mp4', duration_minutes=12,
+        )
+        self.assertStatsRecounted(self.course.pk)
+
+        lesson.section = other.sections.first()
+        lesson.duration_minutes = 20
+        lesson.save()
+        self.assertStatsRecounted(self.course.pk)
+        self.assertStatsRecounted(other.pk)
+
+        # deleting a section cascades to its lessons and uncounts them once
+        other.sections.first().delete()
+        self.assertStatsRecounted(other.pk)
+
+    def test_min_rating_filter(self):
+        url = reverse('courses:list-detail-course')
+        CourseStats.objects.filter(pk=self.course.pk).update(average_rating=4.5)
+        response = self.client.get(url, {'min_rating': '4.5', 'page_size': 100})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {course['slug'] for course in response.json()['results']},
+            set(Course.objects.filter(stats__average_rating__gte=4.5).values_list('slug', flat=True)),
+        )
+        for value in ('x', 'nan', '-1', '5.5'):
+            with self.subTest(min_rating=value):
+                response = self.client.get(url, {'min_rating': value})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('min_rating', response.json())
+
+
+class SlugTests(CatalogueTestCase):
+
+    def test_colliding_titles_get_numbered_slugs(self):
+        url = reverse('courses:create-course')
+        for _ in range(3):
+            response = self.client.post(url, course_payload(self.course, 'Same title'), content_type='application/json')
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted(Course.objects.filter(title='Same title').values_list('slug', flat=True)),
+            ['same-title', 'same-title-1', 'same-title-2'],
+        )
+
+    def test_longer_slugs_sharing_the_prefix_are_not_suffixes(self):
+        Course.objects.filter(pk=self.course.pk).update(slug='python')
+        Course.objects.filter(pk=Course.objects.exclude(pk=self.course.pk).order_by('id').first().pk).update(
+            slug='python-basics',
+        )
+        self.assertEqual(next_free_slug(Course, 'python'), 'python-1')
+        self.assertEqual(next_free_slug(Course, 'python', exclude_pk=self.course.pk), 'python')
+
+    def test_category_slugs(self):
+        first = Category.objects.create(name='Web', description='...', icon='web')
+        second = Category.objects.create(name='Web', description='...', icon='web')
+        self.assertEqual((first.slug, second.slug), ('web', 'web-1'))
+
+
+class CategoryTreeTests(CatalogueTestCase):
+
+    def category(self, name, parent=None):
+        return Category.objects.create(name=name, description='...', icon='folder', parent=parent)
+
+    def test_moving_a_category_rewrites_its_subtree(self):
+        root = self.category('Root')
+        branch = self.category('Branch', root)
+        leaf = self.category('Leaf', branch)
+        other = self.category('Other')
+
+        branch.parent = other
+        branch.save()
+
+        branch.refresh_from_db()
+        leaf.refresh_from_db()
+        self.assertEqual(branch.path, f'{other.path}{branch.pk:010d}/')
+        self.assertEqual(leaf.path, f'{branch.path}{leaf.pk:010d}/')
+        self.assertEqual((branch.depth, leaf.depth), (1, 2))
+        self.assertFalse(Category.objects.filter(path__startswith=f'{root.path}').exclude(pk=root.pk).exists())
+
+    def test_cycles_are_rejected(self):
+        root = self.category('Root')
+        leaf = self.category('Leaf', self.category('Branch', root))
+
+        for parent in (root, leaf):
+            root.parent = parent
+            with self.assertRaises(ValueError):
+                root.save()
+        root.refresh_from_db()
+        self.assertIsNone(root.parent_id)
+
+
+class CurriculumImportTests(CatalogueTestCase):
+    url = reverse('courses:import-curriculum')
+
+    def lesson_body(self, title):
+        return {'title': title, 'content': '...', 'video_url': 'https://example.com/v.mp4', 'duration_minutes': 5}
+
+    def test_import_creates_course_sections_and_lessons(self):
+        body = course_payload(self.course, 'Imported', sections=[
+            {'title': 'One', 'lessons': [self.lesson_body('1.1'), self.lesson_body('1.2')]},
+            {'title': 'Two', 'lessons': [self.lesson_body('2.1')]},
+        ])
+        response = self.client.post(self.url, body, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        course = Course.objects.get(title='Imported')
+        self.assertEqual(course.sections.count(), 2)
+        self.assertEqual(Lesson.objects.filter(section__course=course).count(), 3)
+        self.assertEqual((course.stats.total_lessons, course.stats.total_duration), (3, 15))
+
+    def test_import_from_ndjson(self):
+        lines = [
+            {'type': 'course', **course_payload(self.course, 'Streamed')},
+            {'type': 'section', 'ref': 's1', 'title': 'One'},
+            {'type': 'lesson', 'section': 's1', **self.lesson_body('1.1')},
+        ]
+        response = self.client.post(
+            self.url, '\n'.join(json.dumps(line) for line in lines), content_type='application/x-ndjson',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Lesson.objects.filter(section__course__title='Streamed').count(), 1)
+
+    def test_malformed_parts_are_rejected_with_their_path(self):
+        bodies = {
+            'sections': course_payload(self.course, 'Bad', sections={'title': 'One'}),
+            'sections[0]': course_payload(self.course, 'Bad', sections=['One']),
+            'sections[0].lessons': course_payload(self.course, 'Bad', sections=[{'title': 'One', 'lessons': 'x'}]),
+            'sections[0].lessons[1]': course_payload(
+                self.course, 'Bad', sections=[{'title': 'One', 'lessons': [self.lesson_body('1.1'), 'x']}],
+            ),
+        }
+        for path, body in bodies.items():
+            with self.subTest(path=path):
+                response = self.client.post(self.url, body, content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(path, json.dumps(response.json()))
+        self.assertFalse(Course.objects.filter(title='Bad').exists())
+
+
+class ResponseCacheTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('courses:detail', kwargs={'pk': self.course.pk})
+
+    def test_etag_answers_304(self):
+        first = self.client.get(self.url)
+        self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+
+        cached = self.client.get(self.url)
+        self.assertEqual((cached['X-Cache'], cached['ETag'], cached.content), ('HIT', first['ETag'], first.content))
+
+        response = self.client.get(self.url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_writes_bump_the_versions_the_entry_depends_on(self):
+        etag = self.client.get(self.url)['ETag']
+
+        self.course.title = 'Renamed'
+        self.course.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual((response.status_code, response['X-Cache']), (200, 'MISS'))
+        self.assertEqual(response.json()['title'], 'Renamed')
+
+        # the instructor is part of the payload, so a change to it invalidates the course too
+        etag = response['ETag']
+        instructor = self.course.instructor
+        instructor.expertise = 'Testing'
+        instructor.save()
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class KeysetPaginationTests(CatalogueTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # ties on the ordering column exercise the id tiebreaker
+        Course.objects.filter(pk__in=Course.objects.order_by('id').values('pk')[:4]).update(price=Decimal('10.00'))
+
+    def walk(self, ordering):
+        """Slugs of every page fetched by following ``next`` with two courses per page."""
+        slugs, pages = [], []
+        url = f"{reverse('courses:list-detail-course')}?ordering={ordering}&page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            pages.append(data)
+            slugs += [course['slug'] for course in data['results']]
+            url = data['next']
+        return slugs, pages
+
+    def test_pages_cover_every_course_once_in_order(self):
+        for ordering, order_by in [
+            ('-created_at', ['-created_at', '-id']), ('price', ['price', 'id']), ('-price', ['-price', '-id']),
+            ('title', ['title', 'id']), ('final_price', ['final_price_value', 'id']),
+        ]:
+            with self.subTest(ordering=ordering):
+                slugs, _ = self.walk(ordering)
+                self.assertEqual(slugs, list(Course.objects.order_by(*order_by).values_list('slug', flat=True)))
+
+    def test_previous_returns_the_page_before(self):
+        _, pages = self.walk('price')
+        response = self.client.get(pages[2]['previous'])
+        self.assertEqual(response.json()['results'], pages[1]['results'])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(f"{reverse('courses:list-detail-course')}?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, 400)
+
+    def test_forged_cursor_values_are_rejected(self):
+        url = reverse('courses:list-detail-course')
+        for ordering, value in [
+            ('price', [1]), ('price', 'cheap'), ('-created_at', 'yesterday'), ('-created_at', {'d': 1}),
+            ('title', [1]), ('rating', 'high'), ('final_price', True), ('popularity', 'many'),
+        ]:
+            with self.subTest(ordering=ordering, value=value):
+                cursor = base64.urlsafe_b64encode(json.dumps({'o': ordering, 'v': value, 'i': 1}).encode()).decode()
+                response = self.client.get(url, {'ordering': ordering, 'cursor': cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.json())
+
+
+class ExportPermissionTests(CatalogueTestCase):
+
+    def test_exports_are_staff_only(self):
+        url = reverse('courses:export', kwargs={'dataset': 'enrollments', 'fmt': 'ndjson'})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create(username='student'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(User.objects.create(username='admin', is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), Enrollment.objects.count())
+
+
+class FacetTests(CatalogueTestCase):
+    url = reverse('courses:list-detail-course')
+
+    def facets(self, query):
+        response = self.client.get(f'{self.url}?{query}')
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def expected(self, courses):
+        """What every facet should count for ``courses``, counted one filtered query at a time."""
+        prices = [Q(price__lt=Decimal('0.01')), Q(price__gte=Decimal('0.01'), price__lt=20),
+                  Q(price__gte=20, price__lt=50), Q(price__gte=50, price__lt=100), Q(price__gte=100)]
+        categories = {
+            str(category.pk): courses.filter(category__path__startswith=category.path).count()
+            for category in Category.objects.all()
+        }
+        languages = {
+            language: courses.filter(language=language).count()
+            for language in set(courses.values_list('language', flat=True))
+        }
+        return {
+            'count': courses.count(),
+            'facets': {
+                'level': {level: courses.filter(level=level).count() for level, _ in Course.LEVEL_CHOICES},
+                'category': {pk: n for pk, n in categories.items() if n},
+                'price': {label: courses.filter(q).count() for (label, _), q in zip(PRICE_BUCKETS, prices)},
+                'featured': {'true': courses.filter(is_featured=True).count(), 'false': courses.filter(is_featured=False).count()},
+                'language': languages,
+            },
+        }
+
+    def test_counts_match_the_filtered_courses(self):
+        category = Category.objects.order_by('path').first()
+        cases = {
+            '': Course.objects.all(),
+            'level=beginner': Course.objects.filter(level='beginner'),
+            'min_price=20&max_price=100': Course.objects.filter(price__gte=20, price__lte=100),
+            f'category={category.pk}': Course.objects.filter(category__path__startswith=category.path),
+            'status=published&is_featured=false': Course.objects.filter(status='published', is_featured=False),
+        }
+        for query, courses in cases.items():
+            with self.subTest(query=query):
+                self.assertEqual(self.facets(f'facets=&{query}'), self.expected(courses))
+
+    def test_only_the_requested_facets_are_counted(self):
+        data = self.facets('facets=price,level&level=advanced')
+        self.assertEqual(list(data['facets']), ['level', 'price'])
+        self.assertEqual(data['count'], Course.objects.filter(level='advanced').count())
+        self.assertEqual(self.client.get(f'{self.url}?facets=level,colour').status_code, 400)
+
+    def test_equivalent_query_strings_share_a_cache_entry(self):
+        same = [
+            'level=beginner&min_price=10&facets=price,level',
+            'min_price=10.00&level=beginner&facets=level,price&page_size=5&ordering=-price&max_price=',
+            'level=beginner&min_price=1E1&search=&facets=level,price,level',
+        ]
+        keys = {cache_key(QueryDict(query), parse_facets(QueryDict(query)['facets'])) for query in same}
+        self.assertEqual(len(keys), 1)
+        self.assertNotEqual(
+            cache_key(QueryDict('level=beginner&min_price=11'), parse_facets('level,price')), keys.pop(),
+        )
+
+        responses = [self.client.get(f'{self.url}?{query}') for query in same]
+        self.assertEqual([response['X-Cache'] for response in responses], ['MISS', 'HIT', 'HIT'])
+        self.assertEqual(len({response.content for response in responses}), 1)
+
+
+class SearchTests(CatalogueTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.in_title, cls.in_description, cls.prefixed = Course.objects.order_by('id')[:3]
+        for course, title, description in [
+            (cls.in_title, 'Zebrafish anatomy', 'Fins and gills.'),
+            (cls.in_description, 'Aquarium basics', 'Keeping zebrafish, guppies and tetras.'),
+            (cls.prefixed, 'Zebra crossings', 'Road safety.'),
+        ]:
+            course.title, course.description = title, description
+            course.save()
+
+    def search(self, query):
+        return list(get_search_backend().search(Course.objects.all(), query).order_by('search_rank', 'id'))
+
+    def test_title_matches_rank_first(self):
+        found = self.search('zebrafish')
+        self.assertEqual([course.pk for course in found], [self.in_title.pk, self.in_description.pk])
+        self.assertIn('<mark>Zebrafish</mark>', found[0].search_snippet)
+
+    def test_the_last_term_matches_as_a_prefix(self):
+        self.assertEqual(
+            {course.pk for course in self.search('zeb')}, {self.in_title.pk, self.in_description.pk, self.prefixed.pk},
+        )
+        # only the last term is a prefix
+        self.assertEqual(self.search('zeb anatomy'), [])
+        self.assertEqual([course.pk for course in self.search('zebrafish anat')], [self.in_title.pk])
+
+    def test_fts_syntax_in_the_query_is_searched_for_as_words(self):
+        for query in ['zebrafish OR aquarium', 'zebrafish NOT anatomy', '"zebrafish', 'title:zebrafish', 'NEAR(zebrafish', 'zebra*fish', '-zebrafish']:
+            with self.subTest(query=query):
+                self.assertIsInstance(self.search(query), list)
+        # as FTS syntax this would find both zebrafish courses
+        self.assertEqual(self.search('zebrafish OR seahorse'), [])
+        self.assertEqual(self.search('"" *'), [])
+
+    def test_the_index_follows_saves_and_deletes(self):
+        self.in_title.title = 'Seahorse anatomy'
+        self.in_title.save()
+        self.assertEqual([course.pk for course in self.search('zebrafish')], [self.in_description.pk])
+        self.assertEqual([course.pk for course in self.search('seahorse')], [self.in_title.pk])
+
+        self.in_description.delete()
+        self.assertEqual(self.search('zebrafish'), [])
+        self.assertFalse(CourseSearchIndex.objects.filter(course_id=self.in_description.pk).exists())
+
+    def test_search_runs_match_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.search('zebrafish')
+        self.assertEqual(ctx.captured_queries[0]['sql'].count('MATCH'), 1)
+
+
+
+class AsyncViewTests(TransactionTestCase):
+    """
+    The async views answer like their synchronous counterparts. The detail
+    view reads on connections of its own threads, which only see committed
+    rows, hence a TransactionTestCase.
+    """
+
+    def setUp(self):
+        call_command(
+            'seed_data', instructors=2, categories=2, courses=6, students=6, enrollments=2, questions=2, seed=1,
+            stdout=StringIO(),
+        )
+        cache.clear()
+        self.course = Course.objects.order_by('id').first()
+        self.missing = Course.objects.order_by('-id').values_list('id', flat=True).first() + 1
+
+    def get(self, name, query='', **kwargs):
+        return self.client.get(f"{reverse(f'courses:{name}', kwargs=kwargs)}?{query}")
+
+    def assertSameResponse(self, sync, async_):
+        self.assertEqual(sync.status_code, async_.status_code, async_.content)
+        # links in the async body point at the async urls
+        self.assertEqual(sync.json(), json.loads(async_.content.decode().replace('/async/list/', '/list/')))
+
+    def test_list(self):
+        statuses = {
+            '': 200, 'page_size=2': 200, 'ordering=price&sideload=true': 200, 'fields=title,price': 200,
+            'exclude=description': 200, 'search=kod': 200, 'level=beginner&ordering=-final_price': 200,
+            'facets=': 200, 'facets=level,price&status=published': 200, 'instructor=0': 404,
+            'cursor=bad': 400, 'ordering=colour': 400, 'fields=title,colour': 400, 'min_rating=9': 400,
+            'facets=colour': 400, 'category=abc': 400,
+        }
+        for query, status_code in statuses.items():
+            with self.subTest(query=query):
+                sync, async_ = self.get('list-detail-course', query), self.get('async-list', query)
+                self.assertEqual(sync.status_code, status_code)
+                self.assertSameResponse(sync, async_)
+
+    def test_list_pages_follow_the_same_cursors(self):
+        sync, async_ = self.get('list-detail-course', 'page_size=2'), self.get('async-list', 'page_size=2')
+        pages = 1
+        while sync.json()['next']:
+            sync, async_ = self.client.get(sync.json()['next']), self.client.get(async_.json()['next'])
+            self.assertSameResponse(sync, async_)
+            pages += 1
+        self.assertEqual((pages, async_.json()['next']), (3, None))
+
+    def test_detail(self):
+        for query, status_code in {'': 200, 'fields=title,price,teach': 200, 'exclude=description': 200, 'fields=colour': 400}.items():
+            with self.subTest(query=query):
+                sync = self.get('detail', query, pk=self.course.pk)
+                async_ = self.get('async-detail', query, pk=self.course.pk)
+                self.assertEqual((sync.status_code, async_.status_code), (status_code, status_code), async_.content)
+                body = async_.json()
+                if async_.status_code == 200:
+                    summary = body.pop('reviews_summary')
+                    self.assertEqual(summary['count'], self.course.stats.reviews_count)
+                    self.assertEqual(async_['X-Cache'], 'MISS')
+                    self.assertEqual(self.get('async-detail', query, pk=self.course.pk)['X-Cache'], 'HIT')
+                self.assertEqual(sync.json(), body)
+
+        self.assertEqual(self.get('async-detail', pk=self.missing).status_code, 404)
+        self.assertEqual(self.get('detail', pk=self.missing).status_code, 404)
+
+    def test_curriculum(self):
+        for query in ['', 'include=content,resources']:
+            with self.subTest(query=query):
+                async_ = self.get('async-curriculum', query, pk=self.course.pk)
+                self.assertEqual(async_['X-Cache'], 'MISS')
+                # the two views share their cache entries
+                sync = self.get('curriculum', query, pk=self.course.pk)
+                self.assertEqual((sync['X-Cache'], sync.status_code), ('HIT', 200))
+                self.assertEqual(sync.json(), async_.json())
+                cache.clear()
+                self.assertEqual(self.get('curriculum', query, pk=self.course.pk).json(), async_.json())
+
+        self.assertEqual(self.get('async-curriculum', pk=self.missing).status_code, 404)
+        self.assertEqual(self.get('curriculum', pk=self.missing).status_code, 404)
+
+
+class ListFastPathTests(CatalogueTestCase):
+    url = reverse('courses:list-detail-course')
+
+    def test_values_rows_render_the_same_bytes_as_the_serializers(self):
+        for query in [
+            '', 'sideload=true', 'ordering=-rating', 'ordering=final_price&page_size=3', 'search=kod',
+            'fields=title,price,final_price,instructor,average_rating,students_count', 'exclude=description,requirements,what_you_learn&sideload=true',
+            'fields=title,category&sideload=true&ordering=-popularity',
+        ]:
+            with self.subTest(query=query):
+                fast = self.client.get(f'{self.url}?{query}')
+                with mock.patch.object(CourseListAPIView, 'fast_path', False):
+                    serialized = self.client.get(f'{self.url}?{query}')
+                self.assertEqual(fast.status_code, 200)
+                self.assertEqual(fast.content, serialized.content)
+
+
+class SparseFieldsetTests(CatalogueTestCase):
+    heavy = ('description', 'requirements', 'what_you_learn')
+
+    def get(self, url, query):
+        """The response and the SQL of the course query it ran."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'{url}?{query}')
+        sql = [q['sql'] for q in ctx.captured_queries if 'FROM "courses_course"' in q['sql']]
+        return response, sql[0] if sql else ''
+
+    def assertSelects(self, sql, present=(), absent=()):
+        for column in present:
+            self.assertIn(f'"courses_course"."{column}"', sql)
+        for column in absent:
+            self.assertNotIn(f'"courses_course"."{column}"', sql)
+
+    def test_unknown_names_are_rejected(self):
+        for url in [reverse('courses:list-detail-course'), reverse('courses:detail', kwargs={'pk': self.course.pk})]:
+            for param in ('fields', 'exclude'):
+                with self.subTest(url=url, param=param):
+                    response = self.client.get(f'{url}?{param}=title,colour')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('colour', response.json()[param])
+
+    def test_list_reads_only_the_selected_columns(self):
+        response, sql = self.get(reverse('courses:list-detail-course'), 'fields=title,price')
+        self.assertEqual({tuple(sorted(row)) for row in response.json()['results']}, {('price', 'title')})
+        self.assertSelects(sql, present=('title', 'price'), absent=self.heavy + ('level',))
+        self.assertNotIn('JOIN', sql)
+
+        response, sql = self.get(reverse('courses:list-detail-course'), f"exclude={','.join(self.heavy)}")
+        self.assertFalse(set(self.heavy) & set(response.json()['results'][0]))
+        self.assertSelects(sql, present=('title', 'level'), absent=self.heavy)
+
+    def test_detail_reads_only_the_selected_columns(self):
+        url = reverse('courses:detail', kwargs={'pk': self.course.pk})
+        response, sql = self.get(url, 'fields=title,teach')
+        self.assertEqual(sorted(response.json()), ['teach', 'title'])
+        self.assertSelects(sql, present=('title',), absent=self.heavy + ('price',))
+        self.assertIn('"courses_instructor"', sql)
+        self.assertNotIn('"courses_category"', sql)
+
+        response, sql = self.get(url, f"exclude={','.join(self.heavy)}")
+        self.assertFalse(set(self.heavy) & set(response.json()))
+        self.assertSelects(sql, present=('title', 'price'), absent=self.heavy)
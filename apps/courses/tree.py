@@ -0,0 +1,74 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from apps.courses.cache import bump_version, get_versions
+from apps.courses.models import Category
+
+TREE_VERSION = {'category-tree': 'all'}
+
+_lock = threading.Lock()
+# replaced as a whole, never mutated, so readers outside the lock always see one consistent build
+_memo = {'version': None, 'roots': [], 'active_roots': [], 'subtrees': {}}
+
+
+def invalidate_category_tree():
+    # after commit, so no worker can rebuild from rows that are about to change
+    transaction.on_commit(lambda: bump_version('category-tree', 'all'))
+
+
+def _build():
+    nodes = {}
+    roots = []
+    subtrees = {}
+    # kept until the next category write, so never built from a lagging replica
+    rows = Category.objects.using(DEFAULT_DB_ALIAS).order_by('path').values('id', 'name', 'slug', 'icon', 'parent_id', 'path', 'depth', 'is_active')
+    for row in rows:
+        node = {
+            'id': row['id'], 'name': row['name'], 'slug': row['slug'], 'icon': row['icon'],
+            'depth': row['depth'], 'is_active': row['is_active'], 'children': [],
+        }
+        nodes[row['id']] = node
+        # ordered by path, so every ancestor has been seen already
+        for ancestor in row['path'].split('/')[:-1]:
+            subtrees.setdefault(int(ancestor), []).append(row['id'])
+        parent = nodes.get(row['parent_id'])
+        (parent['children'] if parent else roots).append(node)
+    return roots, subtrees
+
+
+def _prune_inactive(nodes):
+    return [{**node, 'children': _prune_inactive(node['children'])} for node in nodes if node['is_active']]
+
+
+def _current():
+    global _memo
+    version = get_versions(TREE_VERSION)['category-tree']
+    memo = _memo
+    if memo['version'] != version:
+        with _lock:
+            memo = _memo
+            if memo['version'] != version:
+                roots, subtrees = _build()
+                memo = {'version': version, 'roots': roots, 'active_roots': _prune_inactive(roots), 'subtrees': subtrees}
+                _memo = memo
+    return memo
+
+
+def get_category_tree(active_only=True):
+    return _current()['active_roots' if active_only else 'roots']
+
+
+def subtree_ids(category_id):
+    """Ids of the category and all of its descendants, resolved from memory."""
+    return _current()['subtrees'].get(category_id, [category_id])
+
+
+def subtree_counts(counts):
+    """Rolls ``{category_id: n}`` up the tree: ``{category_id: n over its subtree}`` for every non-zero subtree."""
+    totals = {}
+    for category_id, subtree in _current()['subtrees'].items():
+        total = sum(counts.get(member, 0) for member in subtree)
+        if total:
+            totals[category_id] = total
+    return totals
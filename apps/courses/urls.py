@@ -1,7 +1,9 @@
-from django.urls import path
+from django.urls import path, re_path
 
+from apps.courses.async_views import AsyncCourseCurriculumView, AsyncCourseDetailView, AsyncCourseListView
 from apps.courses.views import CourseCreateAPIView, InstructorCreateAPIView, CategoryCreateAPIView, CourseListAPIView, \
-    CourseDetailPutPatchDeleteAPIView, CourseDetailAPIView
+    CourseDetailPutPatchDeleteAPIView, CourseDetailAPIView, CategoryTreeAPIView, CurriculumImportAPIView, \
+    CourseCurriculumAPIView, ExportAPIView
 
 app_name = 'courses'
 
@@ -10,12 +12,21 @@ urlpatterns = [
     path('',CourseCreateAPIView.as_view(),name='create-course'),
     path('create-cat/',CategoryCreateAPIView.as_view(),name='create-cat'),
     path('create-teach/',InstructorCreateAPIView.as_view(),name='create-teach'),
+    path('import/',CurriculumImportAPIView.as_view(),name='import-curriculum'),
 
     #get
     path('list/',CourseListAPIView.as_view(),name='list-detail-course'),
+    path('categories/tree/',CategoryTreeAPIView.as_view(),name='category-tree'),
+    re_path(r'^export/(?P<dataset>[a-z]+)\.(?P<fmt>csv|ndjson)$',ExportAPIView.as_view(),name='export'),
 
     #detail
     path('update-detail/<int:pk>/', CourseDetailPutPatchDeleteAPIView.as_view(), name='update-detail'),
     path('detail/<int:pk>/', CourseDetailAPIView.as_view(), name='detail'),
+    path('detail/<int:pk>/curriculum/', CourseCurriculumAPIView.as_view(), name='curriculum'),
+
+    #async (ASGI) reads
+    path('async/list/', AsyncCourseListView.as_view(), name='async-list'),
+    path('async/detail/<int:pk>/', AsyncCourseDetailView.as_view(), name='async-detail'),
+    path('async/detail/<int:pk>/curriculum/', AsyncCourseCurriculumView.as_view(), name='async-curriculum'),
 
 ]
\ No newline at end of file
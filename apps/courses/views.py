@@ -1,14 +1,28 @@
+from django.http import StreamingHttpResponse
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import CreateAPIView
+from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
 
 
+from apps.courses.exports import DATASETS, FORMATS, export_stream
+from apps.courses.importer import CurriculumImporter, items_from_ndjson, items_from_tree
+from apps.courses.listing import COLUMNS, course_list_data, course_list_values
+from apps.courses.cache import course_deps, course_detail_cache, curriculum_cache, fieldset_key, get_versions
+from apps.courses.facets import cache_key, course_facets_cache, facet_counts, facet_deps, parse_facets
 from apps.courses.models import Course, Category, Instructor, Lesson
+from apps.courses.pagination import KeysetPagination
+from apps.courses.renderers import FastJSONRenderer
+from apps.courses.search import get_search_backend
+from apps.courses.tree import get_category_tree, subtree_ids
 from apps.courses.serializer import CourseModelSerializer, CategoryModelSerializer, InstructorSerializer, \
-    CourseListSerializer, CourseDetailSerializer, CourseDetailPutPatchDelete
+    CourseListSerializer, CourseDetailSerializer, CourseDetailPutPatchDelete, CourseListSideloadSerializer, \
+    CurriculumLessonSerializer, CurriculumSerializer
+from core.middleware import timed_serialization
+from core.openapi import openapi, swagger_auto_schema
 
 
 class InstructorCreateAPIView(CreateAPIView):
@@ -24,35 +38,221 @@ class CourseCreateAPIView(CreateAPIView):
     serializer_class = CourseModelSerializer
 
 
+class CurriculumImportAPIView(APIView):
+    ndjson_content_types = ('application/x-ndjson', 'application/jsonl')
+
+    @swagger_auto_schema(
+        operation_description=(
+            "Kursni bo‘limlar va darslar bilan bitta tranzaksiyada import qilish. "
+            "JSON: {...kurs maydonlari, \"sections\": [{..., \"lessons\": [...]}]}. "
+            "NDJSON (application/x-ndjson): har qatorda bitta obyekt — avval {\"type\": \"course\", ...}, "
+            "so‘ng {\"type\": \"section\", \"ref\": ...} va {\"type\": \"lesson\", \"section\": ref, ...}."
+        ),
+    )
+    def post(self, request):
+        if request.content_type.split(';')[0].strip() in self.ndjson_content_types:
+            # read line by line from the socket, never buffering the whole upload
+            items = items_from_ndjson(request.stream or [])
+        elif isinstance(request.data, dict):
+            items = items_from_tree(request.data)
+        else:
+            return Response({"error": "Expected a JSON object or an NDJSON stream"}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = CurriculumImporter().run(items)
+        if 'errors' in result:
+            return Response(result, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result, status=status.HTTP_201_CREATED)
+
+
+class ExportAPIView(APIView):
+    # every student's enrollments and progress: staff only
+    permission_classes = [IsAdminUser]
+    chunk_size = 2000
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('after', openapi.IN_QUERY, description="Shu ID dan keyingi yozuvlardan davom ettirish (uzilgan eksportni tiklash uchun)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('gzip', openapi.IN_QUERY, description="True — javob gzip bilan siqib uzatiladi", type=openapi.TYPE_BOOLEAN),
+        ],
+        operation_description=(
+            "courses, enrollments yoki progress ma'lumotlarini CSV yoki NDJSON ko‘rinishida oqim bilan eksport qilish. "
+            "Yozuvlar ID bo‘yicha tartiblangan; birinchi ustun/maydon — id."
+        ),
+    )
+    def get(self, request, dataset, fmt):
+        if dataset not in DATASETS:
+            return Response({"error": f"Unknown dataset: {dataset}"}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            raise ValidationError({'after': "Must be an integer id."})
+        compress = request.query_params.get('gzip', '').lower() == 'true'
+
+        filename = f'{dataset}.{fmt}'
+        response = StreamingHttpResponse(
+            export_stream(dataset, fmt, after=after, chunk_size=self.chunk_size, compress=compress),
+            content_type='application/gzip' if compress else FORMATS[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}.gz"' if compress else f'attachment; filename="{filename}"'
+        return response
+
+
+class CategoryTreeAPIView(APIView):
+    # one query to rebuild after a category change, none while the in-memory tree is current
+    query_budget = 1
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('all', openapi.IN_QUERY, description="True — faol bo‘lmagan kategoriyalar ham qaytariladi", type=openapi.TYPE_BOOLEAN),
+        ],
+    )
+    def get(self, request):
+        active_only = request.query_params.get('all', '').lower() != 'true'
+        return Response(get_category_tree(active_only=active_only))
+
+
+
+FIELDSET_PARAMETERS = [
+    openapi.Parameter('fields', openapi.IN_QUERY, description="Faqat shu maydonlar qaytariladi, vergul bilan (masalan: title,price,instructor); qolgan ustunlar bazadan o‘qilmaydi", type=openapi.TYPE_STRING),
+    openapi.Parameter('exclude', openapi.IN_QUERY, description="Qaytarilmaydigan maydonlar, vergul bilan (masalan: description,requirements,what_you_learn)", type=openapi.TYPE_STRING),
+]
+
 
 class CourseListAPIView(APIView):
+    orderings = {
+        'price': 'price',
+        'created_at': 'created_at',
+        'title': 'title',
+        'final_price': 'final_price_value',
+        # tie-broken on the stats row itself so the stats indexes alone give the order
+        'rating': ('stats__average_rating', 'stats__course_id'),
+        'popularity': ('stats__students_count', 'stats__course_id'),
+    }
+    default_ordering = '-created_at'
+    # enforced by the query budget tests in each app's tests.py
+    query_budget = 1
+    # safe requests read from a replica, see core/db_router.py
+    replica_reads = True
+    # build rows from values() instead of running CourseListSerializer, see apps/courses/listing.py
+    fast_path = True
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
     @swagger_auto_schema(
         manual_parameters=[
-            openapi.Parameter('category', openapi.IN_QUERY, description="Category ID bo‘yicha filter (majburiy emas, lekin ishlaydi)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('category', openapi.IN_QUERY, description="Category ID bo‘yicha filter, barcha ichki kategoriyalar bilan (majburiy emas, lekin ishlaydi)", type=openapi.TYPE_INTEGER),
             openapi.Parameter('instructor', openapi.IN_QUERY, description="Instructor ID bo‘yicha filter", type=openapi.TYPE_INTEGER),
             openapi.Parameter('level', openapi.IN_QUERY, description="Level (beginner, intermediate, advanced)", type=openapi.TYPE_STRING),
+            openapi.Parameter('status', openapi.IN_QUERY, description="Status (draft, published, archived)", type=openapi.TYPE_STRING),
             openapi.Parameter('min_price', openapi.IN_QUERY, description="Minimal narx", type=openapi.TYPE_NUMBER),
             openapi.Parameter('max_price', openapi.IN_QUERY, description="Maksimal narx", type=openapi.TYPE_NUMBER),
+            openapi.Parameter('min_rating', openapi.IN_QUERY, description="Minimal o‘rtacha reyting (1-5)", type=openapi.TYPE_NUMBER),
             openapi.Parameter('is_featured', openapi.IN_QUERY, description="True/False — featured kurslar uchun", type=openapi.TYPE_BOOLEAN),
-            openapi.Parameter('search', openapi.IN_QUERY, description="Title bo‘yicha qidirish", type=openapi.TYPE_STRING),
-            openapi.Parameter('ordering', openapi.IN_QUERY, description="Masalan: price yoki -price", type=openapi.TYPE_STRING),
+            openapi.Parameter('search', openapi.IN_QUERY, description="Title, tavsif va o‘rganiladiganlar bo‘yicha to‘liq matnli qidiruv (relevance bo‘yicha tartiblanadi)", type=openapi.TYPE_STRING),
+            openapi.Parameter('ordering', openapi.IN_QUERY, description="price, created_at, title, final_price, rating, popularity yoki relevance (faqat search bilan). Masalan: price yoki -price (standart: -created_at)", type=openapi.TYPE_STRING),
+            openapi.Parameter('cursor', openapi.IN_QUERY, description="Sahifa kursori (javobdagi next/previous havolalaridan olinadi)", type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description="Sahifadagi kurslar soni (standart 20, maksimal 100)", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('sideload', openapi.IN_QUERY, description="True — instructor va category bir marta 'included' blokida qaytariladi", type=openapi.TYPE_BOOLEAN),
+            *FIELDSET_PARAMETERS,
+            openapi.Parameter('facets', openapi.IN_QUERY, description="Kurslar o‘rniga joriy filtrlar bo‘yicha sonlar: level, category, price, featured, language (vergul bilan; bo‘sh yoki all — barchasi)", type=openapi.TYPE_STRING),
         ],
         responses={200: CourseListSerializer(many=True)}
     )
     def get(self, request):
-        courses = Course.objects.all()
+        facets = request.query_params.get('facets')
+        if facets is not None:
+            return self.facets_response(request, parse_facets(facets))
+
+        courses, serializer_class, paginator, fields = self.filter_courses(request)
+        page = paginator.paginate_queryset(courses, request, view=self)
+
+        if not page and paginator.is_first_page:
+            return Response({"message": "Hech qanday kurs topilmadi"}, status=404)
+        return Response(self.page_data(page, serializer_class, paginator, fields))
 
+    def page_data(self, page, serializer_class, paginator, fields=None):
+        sideload = serializer_class is CourseListSideloadSerializer
+        if self.fast_path:
+            with timed_serialization():
+                results, included = course_list_data(page, sideload, fields)
+        else:
+            results = serializer_class(page, many=True, context={'fields': fields}).data
+            included = serializer_class.get_included(page, fields) if sideload else None
+        data = paginator.get_paginated_data(results)
+        if sideload:
+            data['included'] = included
+        return data
+
+    def facets_response(self, request, names):
+        return course_facets_cache.response(request, *self.facets_entry(request, names))
+
+    def facets_entry(self, request, names):
+        """
+        The cache entry with the counts per facet value for the current
+        filters, cached per normalized filter set, and whether it was a
+        cache hit; shared with the async view.
+        """
+        key = cache_key(request.query_params, names)
+        entry = course_facets_cache.get(key)
+        if entry is not None:
+            return entry, 'HIT'
+
+        deps = facet_deps(request.query_params)
+        versions = get_versions(deps)
+        courses, _ = self.apply_filters(request, Course.objects.all())
+        return course_facets_cache.set(key, deps, facet_counts(courses, names), versions=versions), 'MISS'
+
+    def filter_courses(self, request):
+        """
+        The filtered, not yet evaluated course query with its serializer,
+        paginator and selected fields (``None`` for all); shared with the
+        async view.
+        """
+        sideload = request.query_params.get('sideload', '').lower() == 'true'
+        serializer_class = CourseListSideloadSerializer if sideload else CourseListSerializer
+        fields = serializer_class.parse_fieldset(request.query_params)
+        courses, searching = self.apply_filters(request, Course.objects.all())
+
+        orderings, default_ordering = self.orderings, self.default_ordering
+        if searching:
+            orderings = {**orderings, 'relevance': 'search_rank'}
+            default_ordering = 'relevance'
+
+        paginator = KeysetPagination(orderings=orderings, default_ordering=default_ordering)
+        if paginator.get_ordering(request).removeprefix('-') in ('rating', 'popularity'):
+            # every course has a stats row; an inner join lets the database start from the stats index
+            courses = courses.filter(stats__isnull=False)
+
+        # the cursor is read from the ordering columns, so they are loaded whatever the fields
+        ordering = orderings[paginator.get_ordering(request).removeprefix('-')]
+        key_columns = [
+            column for column in (ordering if isinstance(ordering, tuple) else (ordering, paginator.tiebreaker))
+            if column not in courses.query.annotations
+        ]
+        if self.fast_path:
+            columns = COLUMNS if fields is None else serializer_class.fieldset_columns(fields, key_columns)
+            courses = course_list_values(courses, columns)
+        else:
+            courses = serializer_class.setup_eager_loading(courses, fields, key_columns)
+        return courses, serializer_class, paginator, fields
+
+    def apply_filters(self, request, courses):
+        """``courses`` narrowed by the query string filters, and whether a search was among them."""
         category = request.query_params.get('category')
         instructor = request.query_params.get('instructor')
         level = request.query_params.get('level')
+        course_status = request.query_params.get('status')
         min_price = request.query_params.get('min_price')
         max_price = request.query_params.get('max_price')
+        min_rating = request.query_params.get('min_rating')
         is_featured = request.query_params.get('is_featured')
         search = request.query_params.get('search')
-        ordering = request.query_params.get('ordering')
 
         if category:
-            courses = courses.filter(category__id=category)
+            try:
+                category = int(category)
+            except ValueError:
+                raise ValidationError({"category": "Category ID must be an integer."})
+            courses = courses.filter(category_id__in=subtree_ids(category))
 
         if instructor:
             courses = courses.filter(instructor__id=instructor)
@@ -60,12 +260,24 @@ class CourseListAPIView(APIView):
         if level:
             courses = courses.filter(level=level)
 
+        if course_status:
+            courses = courses.filter(status=course_status)
+
         if min_price:
             courses = courses.filter(price__gte=min_price)
 
         if max_price:
             courses = courses.filter(price__lte=max_price)
 
+        if min_rating:
+            try:
+                min_rating = float(min_rating)
+            except ValueError:
+                raise ValidationError({"min_rating": "Minimum rating must be a number."})
+            if not 0 <= min_rating <= 5:
+                raise ValidationError({"min_rating": "Minimum rating must be between 0 and 5."})
+            courses = courses.filter(stats__average_rating__gte=min_rating)
+
         if is_featured is not None:
             if is_featured.lower() == 'true':
                 courses = courses.filter(is_featured=True)
@@ -73,29 +285,65 @@ class CourseListAPIView(APIView):
                 courses = courses.filter(is_featured=False)
 
         if search:
-            courses = courses.filter(title__icontains=search)
+            courses = get_search_backend().search(courses, search)
+        return courses, bool(search)
 
-        if ordering:
-            courses = courses.order_by(ordering)
 
-        if not courses.exists():
-            return Response({"message": "Hech qanday kurs topilmadi"}, status=404)
 
-        serializer = CourseListSerializer(courses, many=True)
-        return Response(serializer.data)
+class CourseDetailAPIView(APIView):
+    query_budget = 1
+    replica_reads = True
 
+    @swagger_auto_schema(manual_parameters=FIELDSET_PARAMETERS, responses={200: CourseDetailSerializer})
+    def get(self, request, pk):
+        fields = CourseDetailSerializer.parse_fieldset(request.query_params)
+        cache_key = pk if fields is None else f"{pk}:{fieldset_key(fields)}"
+        entry = course_detail_cache.get(cache_key)
+        if entry is not None:
+            return course_detail_cache.response(request, entry, 'HIT')
+
+        # read before loading the course, so a concurrent write leaves the entry stale rather than wrong
+        course_version = get_versions({'course': pk})
+        try:
+            course = CourseDetailSerializer.setup_eager_loading(Course.objects.all(), fields).get(pk=pk)
+        except Course.DoesNotExist:
+            return Response({"error": "Course not found"}, status=404)
 
+        serializer = CourseDetailSerializer(course, context={'fields': fields})
+        deps = course_deps(course)
+        entry = course_detail_cache.set(cache_key, deps, serializer.data, versions={**get_versions(deps), **course_version})
+        return course_detail_cache.response(request, entry, 'MISS')
 
-class CourseDetailAPIView(APIView):
 
+class CourseCurriculumAPIView(APIView):
+    query_budget = 3
+    replica_reads = True
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('include', openapi.IN_QUERY, description="Og‘ir maydonlar, vergul bilan: content, resources", type=openapi.TYPE_STRING),
+        ],
+        responses={200: CurriculumSerializer}
+    )
     def get(self, request, pk):
+        include = sorted(
+            set(filter(None, request.query_params.get('include', '').split(','))) & set(CurriculumLessonSerializer.heavy_fields)
+        )
+        cache_key = f"{pk}:{','.join(include)}"
+        entry = curriculum_cache.get(cache_key)
+        if entry is not None:
+            return curriculum_cache.response(request, entry, 'HIT')
+
+        deps = {'curriculum': pk}
+        versions = get_versions(deps)
         try:
-            course = Course.objects.get(pk=pk)
+            course = CurriculumSerializer.setup_eager_loading(Course.objects.all(), include).get(pk=pk)
         except Course.DoesNotExist:
             return Response({"error": "Course not found"}, status=404)
 
-        serializer = CourseDetailSerializer(course)
-        return Response(serializer.data)
+        serializer = CurriculumSerializer(course, context={'include': include})
+        entry = curriculum_cache.set(cache_key, deps, serializer.data, versions=versions)
+        return curriculum_cache.response(request, entry, 'MISS')
 
 
 class CourseDetailPutPatchDeleteAPIView(APIView):
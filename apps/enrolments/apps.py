@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EnrolmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.enrolments'
+
+    def ready(self):
+        from apps.enrolments import signals  # noqa: F401
@@ -0,0 +1,193 @@
+import os
+import uuid
+from datetime import timedelta
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from apps.enrolments.models import Certificate, CertificateJob, CertificateSequence, Enrollment
+
+SEQUENCE_NAME = 'certificate'
+MAX_ATTEMPTS = 5
+
+SVG_TEMPLATE = """<svg xmlns="http://www.w3.org/2000/svg" width="1123" height="794" viewBox="0 0 1123 794">
+<rect x="20" y="20" width="1083" height="754" fill="#fff" stroke="#1f3a5f" stroke-width="6"/>
+<text x="561" y="180" font-size="56" text-anchor="middle" font-family="serif">Sertifikat</text>
+<text x="561" y="300" font-size="40" text-anchor="middle" font-family="serif">{student}</text>
+<text x="561" y="380" font-size="24" text-anchor="middle" font-family="sans-serif">kursni muvaffaqiyatli tamomladi:</text>
+<text x="561" y="450" font-size="32" text-anchor="middle" font-family="serif">{course}</text>
+<text x="561" y="560" font-size="20" text-anchor="middle" font-family="sans-serif">O‘qituvchi: {instructor}</text>
+<text x="100" y="720" font-size="18" font-family="monospace">№ {number}</text>
+<text x="1023" y="720" font-size="18" text-anchor="end" font-family="monospace">{issued}</text>
+</svg>
+"""
+
+
+def certificate_number(value):
+    return f'{settings.CERTIFICATE_NUMBER_PREFIX}-{value:010d}'
+
+
+def certificate_url(number):
+    return f'{settings.CERTIFICATE_BASE_URL}{number}.svg'
+
+
+def enqueue_completed(batch_size=1000):
+    """Adds a job for every completed enrollment that doesn't have one yet; returns how many were added."""
+    enqueued = 0
+    last_id = 0
+    completed = Enrollment.objects.filter(status='completed', certificate_job__isnull=True).order_by('id')
+    while True:
+        ids = list(completed.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return enqueued
+        CertificateJob.objects.bulk_create([CertificateJob(enrollment_id=pk) for pk in ids], ignore_conflicts=True)
+        enqueued += len(ids)
+        last_id = ids[-1]
+
+
+def allocate_numbers(count):
+    """
+    Reserves ``count`` consecutive certificate numbers with a single UPDATE.
+    The row stays locked until the surrounding transaction ends, so two
+    workers never get overlapping blocks; a rolled back block leaves a gap.
+    """
+    if not count:
+        return range(0)
+    with transaction.atomic():
+        CertificateSequence.objects.bulk_create([CertificateSequence(name=SEQUENCE_NAME)], ignore_conflicts=True)
+        sequence = CertificateSequence.objects.filter(name=SEQUENCE_NAME)
+        sequence.update(next_value=F('next_value') + count)
+        end = sequence.values_list('next_value', flat=True).get()
+    return range(end - count, end)
+
+
+def claim_jobs(chunk_size, lease_seconds=300):
+    """
+    Leases up to ``chunk_size`` unfinished jobs to this worker and returns
+    their ids. Jobs leased by a worker that died become claimable again once
+    the lease expires.
+    """
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    claimable = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    with transaction.atomic():
+        jobs = CertificateJob.objects.filter(claimable, status__in=['pending', 'issued']).order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            jobs = jobs.select_for_update(skip_locked=True)
+        ids = list(jobs.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return []
+        # re-checking the lease in the UPDATE keeps a concurrent worker that
+        # read the same rows from claiming them a second time
+        CertificateJob.objects.filter(claimable, id__in=ids).update(
+            claimed_by=token, locked_until=now + timedelta(seconds=lease_seconds), attempts=F('attempts') + 1,
+        )
+    return list(CertificateJob.objects.filter(id__in=ids, claimed_by=token).values_list('id', flat=True))
+
+
+def issue_certificates(job_ids):
+    """Creates the missing certificates of the given pending jobs in one transaction; returns how many."""
+    with transaction.atomic():
+        jobs = dict(CertificateJob.objects.filter(id__in=job_ids, status='pending').values_list('id', 'enrollment_id'))
+        if not jobs:
+            return 0
+        # a crash between creating the certificates and marking the jobs rolls
+        # both back, but an enrollment that already has one is never issued twice
+        existing = set(
+            Certificate.objects.filter(enrollment_id__in=jobs.values()).values_list('enrollment_id', flat=True)
+        )
+        missing = [enrollment_id for enrollment_id in jobs.values() if enrollment_id not in existing]
+        certificates = []
+        for enrollment_id, value in zip(missing, allocate_numbers(len(missing))):
+            number = certificate_number(value)
+            certificates.append(Certificate(
+                enrollment_id=enrollment_id, certificate_number=number, certificate_url=certificate_url(number),
+            ))
+        Certificate.objects.bulk_create(certificates)
+        CertificateJob.objects.filter(id__in=jobs).update(status='issued')
+    return len(certificates)
+
+
+def render_certificate(payload):
+    """
+    Writes one certificate artifact. Runs in a worker process, so it only
+    gets plain data and never touches the ORM. The file is written under a
+    temporary name and moved into place, so a re-run simply overwrites it.
+    """
+    path = os.path.join(payload['root'], f"{payload['number']}.svg")
+    content = SVG_TEMPLATE.format(**{key: escape(str(value)) for key, value in payload.items()})
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as fh:
+        fh.write(content)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _render_job(job):
+    job_id, payload = job
+    try:
+        render_certificate(payload)
+    except Exception as exc:
+        return job_id, f'{type(exc).__name__}: {exc}'
+    return job_id, None
+
+
+def render_issued(job_ids, pool=None):
+    """
+    Renders the artifacts of the given issued jobs, in ``pool`` (a
+    ``concurrent.futures`` executor) when one is given, and marks them done.
+    Failed jobs are retried after their lease expires, up to MAX_ATTEMPTS.
+    """
+    rows = Certificate.objects.filter(
+        enrollment__certificate_job__id__in=job_ids, enrollment__certificate_job__status='issued',
+    ).values(
+        'certificate_number', 'issued_at', 'enrollment__certificate_job__id',
+        'enrollment__student__username', 'enrollment__student__first_name', 'enrollment__student__last_name',
+        'enrollment__course__title', 'enrollment__course__instructor__user__username',
+        'enrollment__course__instructor__user__first_name', 'enrollment__course__instructor__user__last_name',
+    )
+    root = str(settings.CERTIFICATE_ROOT)
+    os.makedirs(root, exist_ok=True)
+    jobs = []
+    for row in rows:
+        student = ' '.join(filter(None, [row['enrollment__student__first_name'], row['enrollment__student__last_name']]))
+        instructor = ' '.join(filter(None, [
+            row['enrollment__course__instructor__user__first_name'],
+            row['enrollment__course__instructor__user__last_name'],
+        ]))
+        jobs.append((row['enrollment__certificate_job__id'], {
+            'root': root,
+            'number': row['certificate_number'],
+            'student': student or row['enrollment__student__username'],
+            'course': row['enrollment__course__title'],
+            'instructor': instructor or row['enrollment__course__instructor__user__username'],
+            'issued': row['issued_at'].date().isoformat(),
+        }))
+
+    results = list(pool.map(_render_job, jobs, chunksize=16) if pool else map(_render_job, jobs))
+    done = [job_id for job_id, error in results if error is None]
+    CertificateJob.objects.filter(id__in=done).update(status='done', locked_until=None, last_error='')
+    for job_id, error in results:
+        if error is not None:
+            CertificateJob.objects.filter(id=job_id).update(
+                # the lease is kept, so the job is retried once it expires
+                status=Case(When(attempts__gte=MAX_ATTEMPTS, then=Value('failed')), default=F('status')),
+                last_error=error,
+            )
+    return len(done), len(results) - len(done)
+
+
+def process_queue(chunk_size=500, pool=None, lease_seconds=300):
+    """Enqueues newly completed enrollments and works the queue until it is empty."""
+    totals = {'enqueued': enqueue_completed(), 'issued': 0, 'rendered': 0, 'failed': 0}
+    while True:
+        job_ids = claim_jobs(chunk_size, lease_seconds)
+        if not job_ids:
+            return totals
+        totals['issued'] += issue_certificates(job_ids)
+        rendered, failed = render_issued(job_ids, pool)
+        totals['rendered'] += rendered
+        totals['failed'] += failed
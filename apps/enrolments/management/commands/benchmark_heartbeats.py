@@ -0,0 +1,93 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from apps.courses.models import Lesson
+from apps.enrolments.progress import flush_heartbeats
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Posts synthetic heartbeats for existing enrollments through the ingestion endpoint, flushes them "
+        "and reports the sustained events per second. Everything is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=50000)
+        parser.add_argument('--batch', type=int, default=500, help="Heartbeats per request.")
+        parser.add_argument('--flush-every', type=int, default=20, help="Flush after this many requests.")
+        parser.add_argument('--complete-ratio', type=float, default=0.05)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true')
+
+    def handle(self, *args, **options):
+        pairs = list(
+            Lesson.objects.filter(section__course__enrollments__isnull=False)
+            .values_list('section__course__enrollments__id', 'id')[:100000]
+        )
+        if not pairs:
+            raise CommandError("At least one enrollment in a course with lessons is needed.")
+
+        setup_test_environment()
+        try:
+            with transaction.atomic():
+                self.run(Client(), pairs, options)
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            pass
+        finally:
+            teardown_test_environment()
+
+    def run(self, client, pairs, options):
+        rng = random.Random(options['seed'])
+        url = reverse('enrolments:heartbeats')
+        watched = {}
+        ingest_time = flush_time = 0.0
+        sent = requests = 0
+
+        while sent < options['events']:
+            batch = []
+            for _ in range(min(options['batch'], options['events'] - sent)):
+                enrollment_id, lesson_id = rng.choice(pairs)
+                minutes = watched[enrollment_id, lesson_id] = watched.get((enrollment_id, lesson_id), 0) + 1
+                batch.append({
+                    'enrollment': enrollment_id, 'lesson': lesson_id, 'watch_time_minutes': minutes,
+                    'completed': rng.random() < options['complete_ratio'],
+                })
+            body = json.dumps({'heartbeats': batch})
+
+            started = time.perf_counter()
+            response = client.post(url, body, content_type='application/json')
+            ingest_time += time.perf_counter() - started
+            if response.status_code != 202:
+                raise CommandError(f"HTTP {response.status_code}: {response.content[:500]!r}")
+            sent += len(batch)
+            requests += 1
+
+            if requests % options['flush_every'] == 0:
+                started = time.perf_counter()
+                while flush_heartbeats():
+                    pass
+                flush_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        while flush_heartbeats():
+            pass
+        flush_time += time.perf_counter() - started
+
+        total = ingest_time + flush_time
+        self.stdout.write(f"{sent} heartbeats in {requests} requests ({len(pairs)} enrollment/lesson pairs)")
+        self.stdout.write(f"ingest: {ingest_time:.2f}s ({sent / ingest_time:.0f} events/s)")
+        self.stdout.write(f"flush:  {flush_time:.2f}s")
+        self.stdout.write(self.style.SUCCESS(f"sustained: {sent / total:.0f} events/s"))
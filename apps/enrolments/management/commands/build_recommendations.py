@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.enrolments import recommendations
+
+
+class Command(BaseCommand):
+    help = (
+        "Builds the student × course enrollment matrix and stores the top similar courses of every course "
+        "(\"students who took this also took\"). Without --full only the courses whose lists can have changed "
+        "since the previous run are recomputed. Needs numpy and scipy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every course, not only the changed ones.")
+        parser.add_argument('--top-k', type=int, default=10, help="Recommendations kept per course.")
+        parser.add_argument('--min-shared', type=int, default=2, help="Students two courses must share to be related.")
+        parser.add_argument('--chunk-size', type=int, default=50000, help="Enrollments read per query.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Courses scored and written per transaction.")
+
+    def handle(self, *args, **options):
+        if recommendations.np is None or recommendations.sparse is None:
+            raise CommandError("build_recommendations needs numpy and scipy: pip install numpy scipy")
+        if options['top_k'] < 1 or options['batch_size'] < 1 or options['chunk_size'] < 1:
+            raise CommandError("--top-k, --batch-size and --chunk-size must be positive.")
+
+        started = time.perf_counter()
+        run = recommendations.refresh_recommendations(
+            full=options['full'], top_k=options['top_k'], min_shared=options['min_shared'],
+            chunk_size=options['chunk_size'], columns_per_batch=options['batch_size'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Full' if run.full else 'Incremental'} run: recomputed {run.courses} course(s) up to enrollment "
+            f"{run.last_enrollment_id} in {time.perf_counter() - started:.1f}s."
+        ))
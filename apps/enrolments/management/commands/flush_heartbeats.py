@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.enrolments.progress import flush_heartbeats
+
+
+class Command(BaseCommand):
+    help = "Moves buffered progress heartbeats into LessonProgress and advances the enrollments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--loop', action='store_true', help="Keep flushing every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = 0
+            while True:
+                consumed = flush_heartbeats(batch_size=options['batch_size'])
+                flushed += consumed
+                if consumed < options['batch_size']:
+                    break
+            if flushed or not options['loop']:
+                self.stdout.write(f"Flushed {flushed} heartbeat(s).")
+            if not options['loop']:
+                return
+            time.sleep(options['interval'])
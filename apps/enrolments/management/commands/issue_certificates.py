@@ -0,0 +1,36 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from apps.enrolments.certificates import process_queue
+
+
+class Command(BaseCommand):
+    help = (
+        "Queues completed enrollments, issues their certificates in chunks and renders the "
+        "artifacts in a process pool. Safe to re-run or run several at once after a crash."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4, help="Render processes; 0 renders in this process.")
+        parser.add_argument('--lease', type=int, default=300, help="Seconds before a claimed chunk can be retried.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling every --interval seconds.")
+        parser.add_argument('--interval', type=float, default=10.0)
+
+    def handle(self, *args, **options):
+        pool = ProcessPoolExecutor(max_workers=options['workers']) if options['workers'] else None
+        try:
+            while True:
+                totals = process_queue(chunk_size=options['chunk_size'], pool=pool, lease_seconds=options['lease'])
+                if any(totals.values()) or not options['loop']:
+                    self.stdout.write(
+                        "Enqueued {enqueued}, issued {issued}, rendered {rendered}, failed {failed}.".format(**totals)
+                    )
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+        finally:
+            if pool is not None:
+                pool.shutdown()
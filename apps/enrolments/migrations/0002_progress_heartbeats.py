@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:50
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_completed_lessons(apps, schema_editor):
+    Enrollment = apps.get_model('enrolments', 'Enrollment')
+    LessonProgress = apps.get_model('enrolments', 'LessonProgress')
+    counts = (
+        LessonProgress.objects.filter(is_completed=True)
+        .values('enrollment_id').annotate(n=Count('id')).values_list('enrollment_id', 'n')
+    )
+    Enrollment.objects.bulk_update(
+        [Enrollment(id=enrollment_id, completed_lessons=n) for enrollment_id, n in counts],
+        ['completed_lessons'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressHeartbeat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('enrollment_id', models.BigIntegerField()),
+                ('lesson_id', models.BigIntegerField()),
+                ('watch_time_minutes', models.IntegerField(default=0)),
+                ('is_completed', models.BooleanField(default=False)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='enrollment',
+            name='completed_lessons',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_completed_lessons, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery
+from django.db.models.functions import Round
+
+
+def fill_amount_paid(apps, schema_editor):
+    # what was actually paid was never stored; the current sale price is the best estimate
+    Course = apps.get_model('courses', 'Course')
+    Enrollment = apps.get_model('enrolments', 'Enrollment')
+    sale_price = Course.objects.filter(pk=OuterRef('course_id')).annotate(
+        sale_price=Round(ExpressionWrapper(
+            F('price') * (100 - F('discount_percentage')) / 100, output_field=DecimalField(max_digits=10, decimal_places=2),
+        ), 2),
+    ).values('sale_price')
+    Enrollment.objects.update(amount_paid=Subquery(sale_price))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0005_course_recommendations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='enrollment',
+            name='amount_paid',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(fill_amount_paid, migrations.RunPython.noop),
+    ]
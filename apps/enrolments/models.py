@@ -16,13 +16,30 @@ class Enrollment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
     progress_percentage = models.IntegerField(default=0)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # maintained incrementally by the heartbeat flush, see apps/enrolments/progress.py
+    completed_lessons = models.IntegerField(default=0)
+    # the course's sale price when the student enrolled; revenue is rolled up
+    # from it, so later price changes don't rewrite past days
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
     class Meta:
         unique_together = ['student', 'course']
+        indexes = [
+            models.Index(fields=['student', 'enrolled_at'], name='enrollment_student_date_idx'),
+            models.Index(fields=['course', 'enrolled_at'], name='enrollment_course_date_idx'),
+            models.Index(fields=['enrolled_at'], name='enrollment_date_idx'),
+            # the certificate worker scans completed enrollments only
+            models.Index(fields=['id'], name='enrollment_completed_idx', condition=models.Q(status='completed')),
+        ]
 
     def __str__(self):
         return f"{self.student.username} → {self.course.title}"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.amount_paid is None:
+            self.amount_paid = self.course.sale_price()
+        super().save(*args, **kwargs)
+
 
 class LessonProgress(models.Model):
     enrollment = models.ForeignKey(Enrollment, on_delete=models.CASCADE, related_name='lesson_progress')
@@ -33,11 +50,35 @@ class LessonProgress(models.Model):
 
     class Meta:
         unique_together = ['enrollment', 'lesson']
+        indexes = [
+            models.Index(
+                fields=['enrollment', 'completed_at'], name='progress_completed_idx',
+                condition=models.Q(is_completed=True),
+            ),
+            models.Index(fields=['lesson', 'completed_at'], name='progress_lesson_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.lesson.title} - {self.enrollment.student.username}"
 
 
+class ProgressHeartbeat(models.Model):
+    """
+    Buffer of player heartbeats, already coalesced per request and folded
+    into LessonProgress by the ``flush_heartbeats`` command.
+    """
+    # plain ids rather than foreign keys keep the hot insert path free of
+    # constraint checks; pairs that don't exist are dropped at flush time
+    enrollment_id = models.BigIntegerField()
+    lesson_id = models.BigIntegerField()
+    watch_time_minutes = models.IntegerField(default=0)
+    is_completed = models.BooleanField(default=False)
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Heartbeat {self.enrollment_id}/{self.lesson_id}"
+
+
 class Certificate(models.Model):
     enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='certificate')
     certificate_number = models.CharField(max_length=50, unique=True)
@@ -46,3 +87,79 @@ class Certificate(models.Model):
 
     def __str__(self):
         return f"Certificate #{self.certificate_number}"
+
+
+class CertificateJob(models.Model):
+    """
+    Queue row for the ``issue_certificates`` worker: one per completed enrollment.
+
+    ``pending`` jobs still need a certificate row, ``issued`` ones still need
+    their artifact rendered. A worker leases a chunk by setting
+    ``locked_until``; a job whose lease ran out (the worker died) is picked up
+    again, and every step checks what is already done, so re-running is safe.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('issued', 'Issued'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    enrollment = models.OneToOneField(Enrollment, on_delete=models.CASCADE, related_name='certificate_job')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.IntegerField(default=0)
+    claimed_by = models.CharField(max_length=64, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='certjob_status_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"Certificate job {self.enrollment_id} ({self.status})"
+
+
+class CertificateSequence(models.Model):
+    """Next free certificate number; workers reserve numbers from it in blocks."""
+    name = models.CharField(max_length=50, primary_key=True)
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
+
+
+class CourseRecommendation(models.Model):
+    """
+    "Students who took this course also took": the top courses by cosine
+    similarity of their enrolled students, ``rank`` 1 being the closest.
+    Written by the ``build_recommendations`` command, read by rank.
+    """
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='recommendations')
+    recommended = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='+')
+    rank = models.PositiveSmallIntegerField()
+    score = models.FloatField()
+    shared_students = models.IntegerField()
+
+    class Meta:
+        constraints = [
+            # also the index the endpoint reads a course's list from, in order
+            models.UniqueConstraint(fields=['course', 'rank'], name='course_recommendation_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.course_id} → {self.recommended_id} (#{self.rank})"
+
+
+class RecommendationRun(models.Model):
+    """One ``build_recommendations`` run; the latest one's ``last_enrollment_id`` is where an incremental run starts."""
+    last_enrollment_id = models.BigIntegerField()
+    full = models.BooleanField(default=False)
+    courses = models.IntegerField(default=0)
+    finished_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Recommendations up to enrollment {self.last_enrollment_id}"
@@ -0,0 +1,135 @@
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Least, NullIf
+from django.utils import timezone
+
+from apps.analytics.rollups import log_activity
+from apps.courses.models import CourseStats, Lesson
+from apps.enrolments.models import Enrollment, LessonProgress, ProgressHeartbeat
+
+
+def coalesce(heartbeats):
+    """Folds heartbeats into one ``[watch_time_minutes, is_completed]`` per (enrollment, lesson)."""
+    merged = {}
+    for enrollment_id, lesson_id, minutes, completed in heartbeats:
+        current = merged.setdefault((enrollment_id, lesson_id), [0, False])
+        current[0] = max(current[0], minutes)
+        current[1] = current[1] or completed
+    return merged
+
+
+def buffer_heartbeats(heartbeats):
+    """Coalesces one request's heartbeats and appends them to the buffer table in a single INSERT."""
+    merged = coalesce(
+        (hb['enrollment'], hb['lesson'], hb['watch_time_minutes'], hb['completed']) for hb in heartbeats
+    )
+    ProgressHeartbeat.objects.bulk_create([
+        ProgressHeartbeat(enrollment_id=enrollment_id, lesson_id=lesson_id, watch_time_minutes=minutes, is_completed=completed)
+        for (enrollment_id, lesson_id), (minutes, completed) in merged.items()
+    ])
+    return len(merged)
+
+
+def flush_heartbeats(batch_size=5000):
+    """
+    Moves up to ``batch_size`` buffered heartbeats into LessonProgress with one
+    bulk upsert, then advances the affected enrollments by the number of
+    newly completed lessons instead of recounting them. Returns the number of
+    buffer rows consumed. Watch time and course completions are appended to
+    the analytics change log.
+    """
+    with transaction.atomic():
+        buffered = ProgressHeartbeat.objects.order_by('id')
+        if connection.features.has_select_for_update_skip_locked:
+            buffered = buffered.select_for_update(skip_locked=True)
+        rows = list(buffered.values_list('id', 'enrollment_id', 'lesson_id', 'watch_time_minutes', 'is_completed')[:batch_size])
+        if not rows:
+            return 0
+
+        merged = coalesce(row[1:] for row in rows)
+        newly_completed, watched = apply_progress(merged)
+        finished = advance_enrollments(newly_completed)
+        today = timezone.localdate()
+        log_activity(
+            [(course_id, today, {'watch_minutes': minutes}) for course_id, minutes in watched.items()]
+            + [(course_id, today, {'completions': count}) for course_id, count in finished.items()]
+        )
+        ProgressHeartbeat.objects.filter(id__in=[row[0] for row in rows]).delete()
+    return len(rows)
+
+
+def apply_progress(merged):
+    enrollment_ids = {enrollment_id for enrollment_id, _ in merged}
+    lesson_ids = {lesson_id for _, lesson_id in merged}
+    enrollment_courses = dict(Enrollment.objects.filter(id__in=enrollment_ids).values_list('id', 'course_id'))
+    lesson_courses = dict(Lesson.objects.filter(id__in=lesson_ids).values_list('id', 'section__course_id'))
+    existing = {
+        (row[0], row[1]): row[2:]
+        for row in LessonProgress.objects.filter(enrollment_id__in=enrollment_ids, lesson_id__in=lesson_ids)
+        .values_list('enrollment_id', 'lesson_id', 'watch_time_minutes', 'is_completed', 'completed_at')
+    }
+
+    now = timezone.now()
+    upserts = []
+    newly_completed = defaultdict(int)
+    watched = defaultdict(int)
+    for (enrollment_id, lesson_id), (minutes, completed) in merged.items():
+        course_id = enrollment_courses.get(enrollment_id)
+        if course_id is None or lesson_courses.get(lesson_id) != course_id:
+            continue
+        key = (enrollment_id, lesson_id)
+        old_minutes, old_completed, completed_at = existing.get(key, (0, False, None))
+        minutes = max(minutes, old_minutes)
+        is_completed = completed or old_completed
+        if key in existing and minutes == old_minutes and is_completed == old_completed:
+            continue
+        if is_completed and not old_completed:
+            completed_at = now
+            newly_completed[enrollment_id] += 1
+        watched[course_id] += minutes - old_minutes
+        upserts.append(LessonProgress(
+            enrollment_id=enrollment_id, lesson_id=lesson_id, watch_time_minutes=minutes,
+            is_completed=is_completed, completed_at=completed_at,
+        ))
+
+    LessonProgress.objects.bulk_create(
+        upserts,
+        update_conflicts=True,
+        unique_fields=['enrollment', 'lesson'],
+        update_fields=['watch_time_minutes', 'is_completed', 'completed_at'],
+    )
+    return newly_completed, watched
+
+
+def advance_enrollments(newly_completed):
+    """
+    One UPDATE per distinct increment rather than per enrollment. Returns
+    ``{course_id: count}`` of the enrollments these updates completed.
+    """
+    by_increment = defaultdict(list)
+    for enrollment_id, count in newly_completed.items():
+        by_increment[count].append(enrollment_id)
+
+    total_lessons = Subquery(CourseStats.objects.filter(pk=OuterRef('course_id')).values('total_lessons')[:1])
+    now = timezone.now()
+    for increment, enrollment_ids in by_increment.items():
+        done = F('completed_lessons') + increment
+        finished = Q(status='active') & Q(completed_lessons__gte=total_lessons - increment)
+        Enrollment.objects.filter(id__in=enrollment_ids).update(
+            completed_lessons=done,
+            progress_percentage=Coalesce(
+                Least(Value(100), done * 100 / NullIf(total_lessons, 0)), F('progress_percentage'),
+                output_field=IntegerField(),
+            ),
+            status=Case(When(finished, then=Value('completed')), default=F('status')),
+            completed_at=Case(When(finished, then=Value(now)), default=F('completed_at')),
+        )
+    if not newly_completed:
+        return {}
+    # ``now`` marks exactly the enrollments finished by the statements above
+    return dict(
+        Enrollment.objects.filter(id__in=list(newly_completed), status='completed', completed_at=now)
+        .values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+    )
@@ -0,0 +1,182 @@
+from django.db import transaction
+from django.db.models import Count, Max
+
+from apps.courses.models import Course
+from apps.enrolments.models import CourseRecommendation, Enrollment, RecommendationRun
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+
+# ids per ``__in`` lookup, kept under SQLite's bound-parameter limit
+IN_BATCH = 500
+
+
+def enrollment_chunks(enrollments, chunk_size):
+    """``(student_id, course_id)`` arrays of ``enrollments``, read in keyset chunks of ``chunk_size``."""
+    last_id = 0
+    while True:
+        rows = np.array(list(
+            enrollments.filter(id__gt=last_id).order_by('id').values_list('id', 'student_id', 'course_id')[:chunk_size]
+        ), dtype=np.int64).reshape(-1, 3)
+        if not len(rows):
+            return
+        yield rows[:, 1:]
+        last_id = int(rows[-1, 0])
+        if len(rows) < chunk_size:
+            return
+
+
+def related_ids(enrollments, field, ids, column):
+    """Distinct ``column`` values of the ``enrollments`` whose ``field`` is one of ``ids``."""
+    ids = sorted(ids)
+    found = set()
+    for start in range(0, len(ids), IN_BATCH):
+        found.update(
+            enrollments.filter(**{f'{field}__in': ids[start:start + IN_BATCH]})
+            .values_list(column, flat=True).distinct()
+        )
+    return found
+
+
+def student_chunks(enrollments, student_ids):
+    """``(student_id, course_id)`` arrays of every enrollment of ``student_ids``."""
+    student_ids = sorted(student_ids)
+    for start in range(0, len(student_ids), IN_BATCH):
+        yield np.array(list(
+            enrollments.filter(student_id__in=student_ids[start:start + IN_BATCH]).values_list('student_id', 'course_id')
+        ), dtype=np.int64).reshape(-1, 2)
+
+
+class CoEnrollment:
+    """
+    The student × course enrollment matrix, built from chunks of
+    ``(student_id, course_id)`` NumPy arrays and kept as a SciPy CSC matrix
+    of ones, so a block of course columns can be sliced out and multiplied
+    cheaply.
+
+    ``courses`` are the ``(id, status)`` pairs that make up the columns. The
+    matrix may hold only some of the students (those of the courses being
+    recomputed); ``students_per_course`` then has to be given, counted over
+    all of them, or the cosine norms would be too small.
+    """
+
+    def __init__(self, courses, chunks, students_per_course=None):
+        self.course_ids = np.array([course_id for course_id, _ in courses], dtype=np.int64)
+        # only published courses are recommended
+        self.candidates = np.array([course_status == 'published' for _, course_status in courses], dtype=bool)
+
+        students, columns = [], []
+        for rows in chunks:
+            # enrollments of courses deleted since the course ids were read are dropped
+            position, known = self.positions(rows[:, 1])
+            students.append(rows[known, 0])
+            columns.append(position[known])
+
+        students = np.concatenate(students) if students else np.zeros(0, dtype=np.int64)
+        columns = np.concatenate(columns) if columns else np.zeros(0, dtype=np.int64)
+        _, rows = np.unique(students, return_inverse=True)
+        self.matrix = sparse.csc_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, columns)),
+            shape=(rows.max() + 1 if len(rows) else 0, len(self.course_ids)),
+        )
+        if students_per_course is None:
+            self.students_per_course = np.asarray(self.matrix.sum(axis=0), dtype=np.float64).ravel()
+        else:
+            self.students_per_course = np.zeros(len(self.course_ids), dtype=np.float64)
+            counted = np.array(list(students_per_course.items()), dtype=np.int64).reshape(-1, 2)
+            position, known = self.positions(counted[:, 0])
+            self.students_per_course[position[known]] = counted[known, 1]
+        self.enrollments = len(rows)
+
+    def positions(self, course_ids):
+        """Column of each of ``course_ids``, and a mask of those that are columns at all."""
+        course_ids = np.asarray(course_ids, dtype=np.int64)
+        if not len(self.course_ids):
+            return np.zeros(len(course_ids), dtype=np.int64), np.zeros(len(course_ids), dtype=bool)
+        position = np.searchsorted(self.course_ids, course_ids).clip(max=len(self.course_ids) - 1)
+        return position, self.course_ids[position] == course_ids
+
+    def co_counts(self, columns):
+        """Courses × ``columns`` sparse matrix of how many students took both, in CSC form."""
+        return (self.matrix.T @ self.matrix[:, columns]).tocsc()
+
+    def top_k(self, columns, k, min_shared):
+        """
+        Yields ``(course_id, [(recommended_id, score, shared_students), ...])``
+        for every course column, best first. The score is the cosine of the
+        two courses' student vectors: shared / sqrt(students_a * students_b).
+        """
+        co = self.co_counts(columns)
+        norms = np.sqrt(self.students_per_course)
+        for j, column in enumerate(columns):
+            start, end = co.indptr[j], co.indptr[j + 1]
+            others, shared = co.indices[start:end], co.data[start:end]
+            keep = (others != column) & (shared >= min_shared) & self.candidates[others]
+            others, shared = others[keep], shared[keep]
+            scores = shared / (norms[others] * norms[column])
+            if len(scores) > k:
+                # everything tied with the k-th best stays in, so the cut below is by course id, not arbitrary
+                best = scores >= np.partition(scores, len(scores) - k)[len(scores) - k]
+                others, shared, scores = others[best], shared[best], scores[best]
+            # highest score first, ties by course id so reruns are stable
+            order = np.lexsort((self.course_ids[others], -scores))[:k]
+            yield int(self.course_ids[column]), [
+                (int(self.course_ids[others[i]]), float(scores[i]), int(shared[i])) for i in order
+            ]
+
+
+def refresh_recommendations(full=False, top_k=10, min_shared=2, chunk_size=50000, columns_per_batch=500):
+    """
+    Recomputes the stored recommendations and returns the RecommendationRun.
+
+    A full run rebuilds every course from the whole Enrollment table.
+    Otherwise only courses whose lists can have changed since the previous
+    run are rebuilt: those with new enrollments and those sharing a student
+    with them, from the enrollments of their students alone. Removed
+    enrollments are not tracked, so a periodic full run is still needed to
+    let them go.
+    """
+    previous = RecommendationRun.objects.order_by('-id').first()
+    full = full or previous is None
+    # read before the courses, so every enrollment up to it belongs to a course
+    # read below and none is skipped for a course that didn't exist yet
+    last_enrollment_id = Enrollment.objects.aggregate(last=Max('id'))['last'] or 0
+    enrollments = Enrollment.objects.filter(id__lte=last_enrollment_id)
+    courses = list(Course.objects.order_by('id').values_list('id', 'status'))
+
+    if full:
+        co = CoEnrollment(courses, enrollment_chunks(enrollments, chunk_size))
+        columns = np.arange(len(co.course_ids))
+    else:
+        since = previous.last_enrollment_id
+        changed = set(enrollments.filter(id__gt=since).values_list('course_id', flat=True).distinct())
+        affected = changed | related_ids(
+            enrollments, 'student_id', related_ids(enrollments, 'course_id', changed, 'student_id'), 'course_id',
+        )
+        # every co-enrollment count of an affected course comes from one of its students
+        students = related_ids(enrollments, 'course_id', affected, 'student_id')
+        students_per_course = {}
+        if students:
+            students_per_course = dict(enrollments.values_list('course_id').annotate(students=Count('id')).order_by())
+        co = CoEnrollment(courses, student_chunks(enrollments, students), students_per_course)
+        columns, known = co.positions(sorted(affected))
+        columns = columns[known]
+
+    for start in range(0, len(columns), columns_per_batch):
+        batch = columns[start:start + columns_per_batch]
+        rows = [
+            CourseRecommendation(
+                course_id=course_id, recommended_id=recommended_id, rank=rank, score=score, shared_students=shared,
+            )
+            for course_id, recommended in co.top_k(batch, top_k, min_shared)
+            for rank, (recommended_id, score, shared) in enumerate(recommended, 1)
+        ]
+        with transaction.atomic():
+            CourseRecommendation.objects.filter(course_id__in=co.course_ids[batch].tolist()).delete()
+            CourseRecommendation.objects.bulk_create(rows, batch_size=1000)
+
+    return RecommendationRun.objects.create(last_enrollment_id=last_enrollment_id, full=full, courses=len(columns))
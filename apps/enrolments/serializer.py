@@ -0,0 +1,28 @@
+from rest_framework import serializers
+
+from core.middleware import TimedSerializerMixin
+
+
+class HeartbeatSerializer(serializers.Serializer):
+    enrollment = serializers.IntegerField(min_value=1)
+    lesson = serializers.IntegerField(min_value=1)
+    watch_time_minutes = serializers.IntegerField(min_value=0)
+    completed = serializers.BooleanField(default=False)
+
+
+class HeartbeatBatchSerializer(serializers.Serializer):
+    MAX_HEARTBEATS = 1000
+
+    heartbeats = HeartbeatSerializer(many=True, allow_empty=False, max_length=MAX_HEARTBEATS)
+
+
+class RecommendedCourseSerializer(TimedSerializerMixin, serializers.Serializer):
+    id = serializers.IntegerField(source='recommended_id')
+    title = serializers.CharField(source='recommended.title')
+    slug = serializers.CharField(source='recommended.slug')
+    thumbnail = serializers.CharField(source='recommended.thumbnail')
+    level = serializers.CharField(source='recommended.level')
+    price = serializers.DecimalField(source='recommended.price', max_digits=10, decimal_places=2)
+    discount_percentage = serializers.IntegerField(source='recommended.discount_percentage')
+    score = serializers.FloatField()
+    shared_students = serializers.IntegerField()
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.courses import stats
+from apps.enrolments.models import Enrollment
+
+
+@receiver(post_save, sender=Enrollment)
+def count_enrollment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        stats.adjust_students(instance.course_id, 1)
+
+
+@receiver(post_delete, sender=Enrollment)
+def uncount_enrollment(sender, instance, **kwargs):
+    stats.adjust_students(instance.course_id, -1)
@@ -1,3 +1,212 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.analytics.models import ActivityEvent
+from apps.courses.models import Course, Lesson
+from apps.enrolments import certificates, urls as enrolment_urls
+from apps.enrolments.certificates import claim_jobs, enqueue_completed, issue_certificates, process_queue
+from apps.enrolments.models import (
+    Certificate, CertificateJob, CourseRecommendation, Enrollment, LessonProgress, ProgressHeartbeat,
+)
+from apps.enrolments.progress import flush_heartbeats
+from apps.enrolments.recommendations import refresh_recommendations
+from core.testing import CatalogueTestCase, QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, CatalogueTestCase):
+    urls = enrolment_urls
+
+
+class HeartbeatFlushTests(CatalogueTestCase):
+    url = reverse('enrolments:heartbeats')
+
+    def setUp(self):
+        super().setUp()
+        self.enrollment = Enrollment.objects.create(student=User.objects.create(username='watcher'), course=self.course)
+        self.lessons = list(Lesson.objects.filter(section__course=self.course).order_by('id').values_list('id', flat=True))
+
+    def send(self, *heartbeats):
+        response = self.client.post(self.url, [
+            {'enrollment': self.enrollment.pk, 'lesson': lesson, 'watch_time_minutes': minutes, 'completed': completed}
+            for lesson, minutes, completed in heartbeats
+        ], content_type='application/json')
+        self.assertEqual(response.status_code, 202, response.content)
+        return response.json()
+
+    def test_heartbeats_are_buffered_until_flushed(self):
+        # repeated heartbeats of one lesson are coalesced per request: the longest watch time wins
+        self.assertEqual(self.send((self.lessons[0], 3, False), (self.lessons[0], 7, False)), {'accepted': 2, 'buffered': 1})
+        self.assertFalse(LessonProgress.objects.filter(enrollment=self.enrollment).exists())
+
+        self.assertEqual(flush_heartbeats(), 1)
+        progress = LessonProgress.objects.get(enrollment=self.enrollment, lesson_id=self.lessons[0])
+        self.assertEqual((progress.watch_time_minutes, progress.is_completed), (7, False))
+        self.assertFalse(ProgressHeartbeat.objects.exists())
+
+        # watch time never goes back and completion sticks
+        self.send((self.lessons[0], 2, True))
+        self.send((self.lessons[0], 1, False))
+        flush_heartbeats()
+        progress.refresh_from_db()
+        self.assertEqual((progress.watch_time_minutes, progress.is_completed), (7, True))
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 1)
+
+    def test_completing_every_lesson_completes_the_enrollment(self):
+        ActivityEvent.objects.all().delete()
+        self.send(*[(lesson, 5, True) for lesson in self.lessons])
+        flush_heartbeats()
+
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, len(self.lessons))
+        self.assertEqual((self.enrollment.status, self.enrollment.progress_percentage), ('completed', 100))
+        self.assertIsNotNone(self.enrollment.completed_at)
+        self.assertEqual(sum(ActivityEvent.objects.values_list('completions', flat=True)), 1)
+        self.assertEqual(sum(ActivityEvent.objects.values_list('watch_minutes', flat=True)), 5 * len(self.lessons))
+
+        # a repeated completion counts nothing twice
+        self.send((self.lessons[0], 5, True))
+        flush_heartbeats()
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, len(self.lessons))
+
+    def test_lessons_of_another_course_are_dropped(self):
+        foreign = Lesson.objects.exclude(section__course=self.course).values_list('id', flat=True).first()
+        self.send((foreign, 5, True))
+        self.assertEqual(flush_heartbeats(), 1)
+        self.assertFalse(LessonProgress.objects.filter(enrollment=self.enrollment).exists())
+        self.enrollment.refresh_from_db()
+        self.assertEqual(self.enrollment.completed_lessons, 0)
+
+
+class CertificateQueueTests(CatalogueTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Enrollment.objects.filter(id__in=Enrollment.objects.order_by('id').values('id')[:8]).update(
+            status='completed', completed_at=timezone.now(),
+        )
+        cls.completed = Enrollment.objects.filter(status='completed').count()
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.enterContext(override_settings(CERTIFICATE_ROOT=root.name))
+        self.root = root.name
+
+    def test_a_lapsed_lease_is_claimed_again(self):
+        enqueue_completed()
+        first = claim_jobs(3)
+        second = claim_jobs(3)
+        self.assertEqual(len(first), 3)
+        self.assertFalse(set(first) & set(second))
+
+        # the worker holding ``first`` died; its jobs come back once the lease runs out
+        CertificateJob.objects.filter(id__in=first).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = claim_jobs(self.completed)
+        self.assertEqual(set(first), set(reclaimed) & set(first))
+        self.assertFalse(set(second) & set(reclaimed))
+        self.assertEqual(set(CertificateJob.objects.filter(id__in=first).values_list('attempts', flat=True)), {2})
+
+    def test_interleaved_workers_get_distinct_numbers(self):
+        enqueue_completed()
+        workers = [claim_jobs(3), claim_jobs(3), claim_jobs(self.completed)]
+        for job_ids in reversed(workers):
+            issue_certificates(job_ids)
+
+        numbers = list(Certificate.objects.values_list('certificate_number', flat=True))
+        self.assertEqual(len(numbers), self.completed)
+        self.assertEqual(len(set(numbers)), len(numbers))
+        self.assertEqual(
+            sorted(numbers), [certificates.certificate_number(value) for value in range(1, self.completed + 1)],
+        )
+
+    def test_rerunning_the_queue_issues_nothing_twice(self):
+        totals = process_queue(chunk_size=3)
+        self.assertEqual(totals, {'enqueued': self.completed, 'issued': self.completed, 'rendered': self.completed, 'failed': 0})
+        self.assertEqual(len(os.listdir(self.root)), self.completed)
+        numbers = set(Certificate.objects.values_list('certificate_number', flat=True))
+
+        # as if a worker crashed after issuing and its jobs were picked up again
+        CertificateJob.objects.update(status='pending', locked_until=None)
+        totals = process_queue(chunk_size=3)
+        self.assertEqual((totals['enqueued'], totals['issued'], totals['rendered']), (0, 0, self.completed))
+        self.assertEqual(set(Certificate.objects.values_list('certificate_number', flat=True)), numbers)
+        self.assertEqual(len(os.listdir(self.root)), self.completed)
+
+        self.assertEqual(process_queue(), {'enqueued': 0, 'issued': 0, 'rendered': 0, 'failed': 0})
+
+    def test_failed_renders_are_retried_until_the_attempts_run_out(self):
+        with mock.patch.object(certificates, 'render_certificate', side_effect=OSError('disk full')):
+            self.assertEqual(process_queue()['failed'], self.completed)
+            job = CertificateJob.objects.first()
+            self.assertEqual((job.status, job.last_error), ('issued', 'OSError: disk full'))
+            for _ in range(certificates.MAX_ATTEMPTS - 1):
+                CertificateJob.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+                process_queue()
+        self.assertEqual(set(CertificateJob.objects.values_list('status', flat=True)), {'failed'})
+        self.assertEqual(Certificate.objects.count(), self.completed)
+
+
+class RecommendationTests(CatalogueTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.course, cls.taken_together, cls.draft, cls.alone = Course.objects.order_by('id')[:4]
+        Course.objects.filter(pk__in=[cls.course.pk, cls.taken_together.pk, cls.alone.pk]).update(status='published')
+        Course.objects.filter(pk=cls.draft.pk).update(status='draft')
+        # students who took the course also took the other published one and the draft, never ``alone``
+        for n in range(4):
+            student = User.objects.create(username=f'co-{n}')
+            for course in (cls.course, cls.taken_together, cls.draft):
+                Enrollment.objects.get_or_create(student=student, course=course)
+
+    def recommendations(self):
+        return set(CourseRecommendation.objects.values_list('course_id', 'recommended_id', 'rank', 'shared_students'))
+
+    def test_only_published_co_enrolled_courses_are_recommended(self):
+        refresh_recommendations(full=True, min_shared=2)
+        published = set(Course.objects.filter(status='published').values_list('id', flat=True))
+        self.assertTrue(CourseRecommendation.objects.exists())
+        for course_id, recommended_id, _, shared in self.recommendations():
+            students = Enrollment.objects.filter(course_id=course_id).values('student_id')
+            self.assertIn(recommended_id, published)
+            self.assertNotEqual(recommended_id, course_id)
+            self.assertEqual(shared, Enrollment.objects.filter(course_id=recommended_id, student_id__in=students).count())
+            self.assertGreaterEqual(shared, 2)
+
+        recommended = CourseRecommendation.objects.filter(course=self.course).values_list('recommended_id', flat=True)
+        self.assertIn(self.taken_together.pk, recommended)
+        self.assertNotIn(self.draft.pk, recommended)
+
+    def test_endpoint_hides_courses_unpublished_since_the_run(self):
+        refresh_recommendations(full=True, min_shared=2)
+        url = reverse('enrolments:course-recommendations', kwargs={'pk': self.course.pk})
+        self.assertIn(self.taken_together.pk, [row['id'] for row in self.client.get(url).json()['results']])
+
+        Course.objects.filter(pk=self.taken_together.pk).update(status='archived')
+        self.assertNotIn(self.taken_together.pk, [row['id'] for row in self.client.get(url).json()['results']])
+
+    def test_incremental_run_matches_a_full_one(self):
+        refresh_recommendations(full=True, min_shared=2)
+        for n in range(3):
+            student = User.objects.create(username=f'late-{n}')
+            Enrollment.objects.create(student=student, course=self.alone)
+            Enrollment.objects.create(student=student, course=self.taken_together)
+
+        run = refresh_recommendations(min_shared=2)
+        self.assertFalse(run.full)
+        incremental = self.recommendations()
+        self.assertTrue(any(recommended_id == self.alone.pk for _, recommended_id, _, _ in incremental))
+        refresh_recommendations(full=True, min_shared=2)
+        self.assertEqual(incremental, self.recommendations())
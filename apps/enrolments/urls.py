@@ -0,0 +1,10 @@
+from django.urls import path
+
+from apps.enrolments.views import CourseRecommendationsAPIView, HeartbeatAPIView
+
+app_name = 'enrolments'
+
+urlpatterns = [
+    path('progress/heartbeats/', HeartbeatAPIView.as_view(), name='heartbeats'),
+    path('courses/<int:pk>/recommendations/', CourseRecommendationsAPIView.as_view(), name='course-recommendations'),
+]
@@ -1,3 +1,61 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from apps.enrolments.models import CourseRecommendation
+from apps.enrolments.progress import buffer_heartbeats
+from apps.enrolments.serializer import HeartbeatBatchSerializer, RecommendedCourseSerializer
+from core.openapi import openapi, swagger_auto_schema
+
+
+class HeartbeatAPIView(APIView):
+
+    @swagger_auto_schema(
+        request_body=HeartbeatBatchSerializer,
+        operation_description=(
+            "Video pleyerdan kelgan progress signallarini paket bilan qabul qilish. "
+            "Signallar buferga yoziladi va `flush_heartbeats` buyrug‘i orqali LessonProgress ga o‘tkaziladi."
+        ),
+    )
+    def post(self, request):
+        data = request.data
+        if isinstance(data, list):
+            data = {'heartbeats': data}
+        serializer = HeartbeatBatchSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        heartbeats = serializer.validated_data['heartbeats']
+        buffered = buffer_heartbeats(heartbeats)
+        return Response({'accepted': len(heartbeats), 'buffered': buffered}, status=status.HTTP_202_ACCEPTED)
+
+
+class CourseRecommendationsAPIView(APIView):
+    """
+    "Students who took this course also took", precomputed by the
+    ``build_recommendations`` command and read in rank order from the
+    (course, rank) index, with the recommended courses joined in.
+    """
+    MAX_LIMIT = 20
+
+    query_budget = 1
+    replica_reads = True
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Tavsiyalar soni (standart 10, maksimal 20)", type=openapi.TYPE_INTEGER),
+        ],
+        responses={200: RecommendedCourseSerializer(many=True)},
+    )
+    def get(self, request, pk):
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            raise ValidationError({"limit": "Limit must be an integer."})
+        limit = max(1, min(limit, self.MAX_LIMIT))
+
+        recommendations = (
+            CourseRecommendation.objects.filter(course_id=pk, recommended__status='published')
+            .select_related('recommended').order_by('rank')[:limit]
+        )
+        return Response({'course': pk, 'results': RecommendedCourseSerializer(recommendations, many=True).data})
 
-# Create your views here.
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_catalogue_indexes'),
+        ('reviews', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coursereview',
+            index=models.Index(fields=['course', 'created_at', 'id'], name='review_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coursereview',
+            index=models.Index(fields=['student', 'created_at'], name='review_student_date_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_question_threads(apps, schema_editor):
+    Question = apps.get_model('reviews', 'Question')
+    Answer = apps.get_model('reviews', 'Answer')
+    Lesson = apps.get_model('courses', 'Lesson')
+    Question.objects.update(
+        instructor_id=Subquery(
+            Lesson.objects.filter(pk=OuterRef('lesson_id')).values('section__course__instructor_id')[:1]
+        ),
+        answer_count=Coalesce(Subquery(
+            Answer.objects.filter(question_id=OuterRef('pk')).order_by()
+            .values('question_id').annotate(n=Count('id')).values('n')[:1]
+        ), 0),
+        has_instructor_answer=Exists(Answer.objects.filter(question_id=OuterRef('pk'), is_instructor_answer=True)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('courses', '0006_catalogue_indexes'),
+        ('reviews', '0002_catalogue_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='answer_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='has_instructor_answer',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='instructor',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='questions', to='courses.instructor'),
+        ),
+        migrations.AlterField(
+            model_name='answer',
+            name='question',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='answers', to='reviews.question'),
+        ),
+        migrations.AlterField(
+            model_name='question',
+            name='lesson',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='questions', to='courses.lesson'),
+        ),
+        migrations.AddIndex(
+            model_name='answer',
+            index=models.Index(fields=['question', 'created_at', 'id'], name='answer_question_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['lesson', 'created_at', 'id'], name='question_lesson_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['instructor', 'created_at', 'id'], name='question_instr_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(condition=models.Q(('has_instructor_answer', False)), fields=['instructor', 'created_at', 'id'], name='question_inbox_idx'),
+        ),
+        migrations.RunPython(fill_question_threads, migrations.RunPython.noop),
+    ]
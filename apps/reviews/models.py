@@ -1,6 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
-from apps.courses.models import Course, Lesson
+from apps.courses.models import Course, Instructor, Lesson
 
 
 class CourseReview(models.Model):
@@ -14,28 +14,59 @@ class CourseReview(models.Model):
 
     class Meta:
         unique_together = ['course', 'student']
+        indexes = [
+            models.Index(fields=['course', 'created_at', 'id'], name='review_course_date_idx'),
+            models.Index(fields=['student', 'created_at'], name='review_student_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.course.title} - {self.student.username}"
 
 
 class Question(models.Model):
-    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='questions')
+    # the foreign keys without their own index lead a composite index below
+    lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='questions', db_index=False)
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='questions')
     title = models.CharField(max_length=200)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # denormalized so the instructor inbox is one index range instead of a join
+    # through lesson, section and course plus a NOT EXISTS over the answers;
+    # kept up to date by apps/reviews/signals.py
+    instructor = models.ForeignKey(
+        Instructor, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='questions',
+        db_index=False,
+    )
+    answer_count = models.IntegerField(default=0, editable=False)
+    has_instructor_answer = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lesson', 'created_at', 'id'], name='question_lesson_date_idx'),
+            models.Index(fields=['instructor', 'created_at', 'id'], name='question_instr_date_idx'),
+            # the inbox: questions still waiting for their instructor
+            models.Index(
+                fields=['instructor', 'created_at', 'id'], name='question_inbox_idx',
+                condition=models.Q(has_instructor_answer=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
 
 
 class Answer(models.Model):
-    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers')
+    # answer_question_date_idx leads with the question
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answers', db_index=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     content = models.TextField()
     is_instructor_answer = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['question', 'created_at', 'id'], name='answer_question_date_idx'),
+        ]
+
     def __str__(self):
         return f"Answer to {self.question.title}"
@@ -0,0 +1,22 @@
+from django.db.models import Exists, F, OuterRef, Prefetch
+
+from apps.reviews.models import Answer, Question
+
+
+def refresh_question(question_id, count_delta):
+    """
+    Moves ``answer_count`` by ``count_delta`` and recomputes
+    ``has_instructor_answer`` in the same UPDATE, so deleting one of several
+    instructor answers, or flipping the flag on an answer, stays correct.
+    """
+    Question.objects.filter(pk=question_id).update(
+        answer_count=F('answer_count') + count_delta,
+        has_instructor_answer=Exists(Answer.objects.filter(question_id=OuterRef('pk'), is_instructor_answer=True)),
+    )
+
+
+def thread_queryset():
+    """Questions with their author and all answers (oldest first) with theirs: two queries per page."""
+    return Question.objects.select_related('student').prefetch_related(
+        Prefetch('answers', queryset=Answer.objects.select_related('user').order_by('created_at', 'id')),
+    )
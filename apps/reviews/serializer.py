@@ -0,0 +1,62 @@
+from django.contrib.auth.models import User
+from rest_framework import serializers
+
+from apps.reviews.models import Answer, CourseReview, Question
+from core.middleware import TimedSerializerMixin
+
+# newest reviews shown next to a course's rating summary
+RECENT_REVIEWS = 5
+
+
+class RecentReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    student = serializers.CharField(source='student.username', read_only=True)
+
+    class Meta:
+        model = CourseReview
+        fields = ['id', 'student', 'rating', 'title', 'comment', 'created_at']
+
+
+class RatingSummarySerializer(TimedSerializerMixin, serializers.Serializer):
+    """A course's CourseStats row rendered as its review summary; ``recent`` is attached by the view."""
+    course = serializers.IntegerField(source='course_id')
+    reviews_count = serializers.IntegerField()
+    average_rating = serializers.FloatField()
+    histogram = serializers.SerializerMethodField()
+    recent = RecentReviewSerializer(many=True)
+
+    @staticmethod
+    def get_histogram(stats):
+        # highest rating first, as course pages list them
+        return {str(stars): count for stars, count in reversed(stats.rating_histogram().items())}
+
+
+class AnswerSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True)
+    author = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Answer
+        fields = ['id', 'user', 'author', 'content', 'is_instructor_answer', 'created_at']
+        read_only_fields = ['is_instructor_answer']
+
+
+class QuestionSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    student = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True)
+    author = serializers.CharField(source='student.username', read_only=True)
+    answers = AnswerSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Question
+        fields = [
+            'id', 'lesson', 'student', 'author', 'title', 'content', 'created_at',
+            'answer_count', 'has_instructor_answer', 'answers',
+        ]
+        read_only_fields = ['lesson']
+
+
+class InboxQuestionSerializer(QuestionSerializer):
+    lesson_title = serializers.CharField(source='lesson.title', read_only=True)
+    course = serializers.IntegerField(source='lesson.section.course_id', read_only=True)
+
+    class Meta(QuestionSerializer.Meta):
+        fields = ['course', 'lesson_title', *QuestionSerializer.Meta.fields]
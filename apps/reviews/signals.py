@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.courses import stats
+from apps.courses.models import Course, Lesson
+from apps.reviews.models import Answer, CourseReview, Question
+from apps.reviews.questions import refresh_question
+
+
+@receiver(pre_save, sender=CourseReview)
+def remember_review_rating(sender, instance, raw=False, **kwargs):
+    instance._previous_rating = None
+    if instance.pk and not raw:
+        instance._previous_rating = (
+            CourseReview.objects.filter(pk=instance.pk).values_list('course_id', 'rating').first()
+        )
+
+
+@receiver(post_save, sender=CourseReview)
+def count_review(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_rating', None)
+    if created or previous is None:
+        stats.adjust_reviews(instance.course_id, 1, instance.rating, {instance.rating: 1})
+        return
+    previous_course_id, previous_rating = previous
+    if previous_course_id != instance.course_id:
+        stats.adjust_reviews(previous_course_id, -1, -previous_rating, {previous_rating: -1})
+        stats.adjust_reviews(instance.course_id, 1, instance.rating, {instance.rating: 1})
+    elif previous_rating != instance.rating:
+        stats.adjust_reviews(
+            instance.course_id, 0, instance.rating - previous_rating, {previous_rating: -1, instance.rating: 1},
+        )
+
+
+@receiver(post_delete, sender=CourseReview)
+def uncount_review(sender, instance, **kwargs):
+    stats.adjust_reviews(instance.course_id, -1, -instance.rating, {instance.rating: -1})
+
+
+@receiver(pre_save, sender=Question)
+def assign_question_instructor(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.instructor_id = (
+            Lesson.objects.filter(pk=instance.lesson_id).values_list('section__course__instructor_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Course)
+def reassign_course_questions(sender, instance, created, raw=False, **kwargs):
+    # a course handed to another instructor moves its questions to their inbox;
+    # the instructor before the save is remembered by apps.analytics.signals
+    previous = getattr(instance, '_previous_instructor_id', None)
+    if raw or created or previous is None or previous == instance.instructor_id:
+        return
+    Question.objects.filter(lesson__section__course_id=instance.pk).exclude(
+        instructor_id=instance.instructor_id,
+    ).update(instructor_id=instance.instructor_id)
+
+
+@receiver(post_save, sender=Answer)
+def count_answer(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        refresh_question(instance.question_id, 1 if created else 0)
+
+
+@receiver(post_delete, sender=Answer)
+def uncount_answer(sender, instance, **kwargs):
+    refresh_question(instance.question_id, -1)
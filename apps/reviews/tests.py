@@ -1,3 +1,147 @@
-from django.test import TestCase
+from collections import Counter
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.courses.models import Course, Instructor
+from apps.reviews import urls as review_urls
+from apps.reviews.models import Answer, CourseReview, Question
+from core.testing import CatalogueTestCase, QueryBudgetMixin
+
+
+class QueryBudgetTests(QueryBudgetMixin, CatalogueTestCase):
+    urls = review_urls
+    variants = {
+        'instructor-questions': ['status=all'],
+        'course-reviews': ['ordering=created_at'],
+    }
+
+    def url_kwargs(self):
+        return {**super().url_kwargs(), 'pk': self.course.instructor_id}
+
+
+class QuestionCounterTests(CatalogueTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.student = User.objects.create(username='asker')
+        cls.instructor_user = cls.course.instructor.user
+
+    def setUp(self):
+        super().setUp()
+        self.question = Question.objects.create(lesson=self.lesson, student=self.student, title='Why?', content='...')
+
+    def answer(self, user, is_instructor_answer=False):
+        return Answer.objects.create(question=self.question, user=user, content='...', is_instructor_answer=is_instructor_answer)
+
+    def counters(self):
+        self.question.refresh_from_db()
+        return self.question.answer_count, self.question.has_instructor_answer
+
+    def test_new_questions_land_in_the_course_instructors_inbox(self):
+        self.assertEqual(self.question.instructor_id, self.course.instructor_id)
+        self.assertEqual(self.counters(), (0, False))
+
+    def test_answers_move_the_counters(self):
+        self.answer(self.student)
+        self.assertEqual(self.counters(), (1, False))
+        first = self.answer(self.instructor_user, is_instructor_answer=True)
+        second = self.answer(self.instructor_user, is_instructor_answer=True)
+        self.assertEqual(self.counters(), (3, True))
+
+        # one of two instructor answers gone still leaves the question answered
+        first.delete()
+        self.assertEqual(self.counters(), (2, True))
+        second.is_instructor_answer = False
+        second.save()
+        self.assertEqual(self.counters(), (2, False))
+        second.delete()
+        self.assertEqual(self.counters(), (1, False))
+
+    def test_reassigning_the_course_moves_its_questions(self):
+        other = Instructor.objects.exclude(pk=self.course.instructor_id).first()
+        self.course.instructor = other
+        self.course.save()
+        self.question.refresh_from_db()
+        self.assertEqual(self.question.instructor_id, other.pk)
+        self.assertFalse(
+            Question.objects.filter(lesson__section__course=self.course).exclude(instructor=other).exists(),
+        )
+
+    def test_saving_a_course_without_reassigning_it_leaves_questions_alone(self):
+        self.course.title = 'Renamed'
+        with CaptureQueriesContext(connection) as ctx:
+            self.course.save()
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'reviews_question' in q['sql']])
+
+
+class CourseRatingTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = Course.objects.exclude(pk=self.course.pk).order_by('id').first()
+
+    def review(self, rating, course=None):
+        student = User.objects.create(username=f'reviewer-{User.objects.count()}')
+        return CourseReview.objects.create(
+            course=course or self.course, student=student, rating=rating, title='Review', comment='...',
+        )
+
+    def summary(self, course):
+        response = self.client.get(reverse('reviews:course-rating', kwargs={'course_id': course.pk}))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assertSummaryMatchesReviews(self, course):
+        ratings = Counter(CourseReview.objects.filter(course=course).values_list('rating', flat=True))
+        summary = self.summary(course)
+        self.assertEqual(summary['histogram'], {str(stars): ratings[stars] for stars in (5, 4, 3, 2, 1)})
+        self.assertEqual(summary['reviews_count'], ratings.total())
+        self.assertAlmostEqual(
+            summary['average_rating'], sum(stars * n for stars, n in ratings.items()) / ratings.total() if ratings else 0,
+        )
+
+    def test_histogram_follows_review_writes(self):
+        first, second = self.review(5), self.review(2)
+        self.review(5, course=self.other)
+        self.assertSummaryMatchesReviews(self.course)
+
+        first.rating = 3
+        first.save()
+        self.assertSummaryMatchesReviews(self.course)
+
+        # a review moved to another course leaves one histogram for the other
+        second.course = self.other
+        second.save()
+        self.assertSummaryMatchesReviews(self.course)
+        self.assertSummaryMatchesReviews(self.other)
+
+        first.delete()
+        second.delete()
+        self.assertSummaryMatchesReviews(self.course)
+        self.assertSummaryMatchesReviews(self.other)
+
+    def test_reviews_are_listed_page_by_page_in_order(self):
+        for rating in (1, 2, 3, 4, 5, 4, 3):
+            self.review(rating)
+        # equal timestamps are ordered by id
+        CourseReview.objects.filter(course=self.course).update(created_at=timezone.now())
+        url = reverse('reviews:course-reviews', kwargs={'course_id': self.course.pk})
+        for ordering, expected in [
+            ('', CourseReview.objects.filter(course=self.course).order_by('-created_at', '-id')),
+            ('ordering=created_at', CourseReview.objects.filter(course=self.course).order_by('created_at', 'id')),
+        ]:
+            with self.subTest(ordering=ordering):
+                seen = []
+                page = self.client.get(f'{url}?page_size=3&{ordering}').json()
+                while True:
+                    self.assertLessEqual(len(page['results']), 3)
+                    seen += [review['id'] for review in page['results']]
+                    if not page['next']:
+                        break
+                    page = self.client.get(page['next']).json()
+                self.assertEqual(seen, list(expected.values_list('id', flat=True)))
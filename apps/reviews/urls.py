@@ -0,0 +1,15 @@
+from django.urls import path
+
+from apps.reviews.views import AnswerDeleteAPIView, CourseRatingAPIView, CourseReviewsAPIView, \
+    InstructorQuestionsAPIView, LessonQuestionsAPIView, QuestionAnswersAPIView
+
+app_name = 'reviews'
+
+urlpatterns = [
+    path('courses/<int:course_id>/reviews/', CourseReviewsAPIView.as_view(), name='course-reviews'),
+    path('courses/<int:course_id>/rating/', CourseRatingAPIView.as_view(), name='course-rating'),
+    path('lessons/<int:lesson_id>/questions/', LessonQuestionsAPIView.as_view(), name='lesson-questions'),
+    path('instructors/<int:pk>/questions/', InstructorQuestionsAPIView.as_view(), name='instructor-questions'),
+    path('questions/<int:pk>/answers/', QuestionAnswersAPIView.as_view(), name='question-answers'),
+    path('answers/<int:pk>/', AnswerDeleteAPIView.as_view(), name='answer-delete'),
+]
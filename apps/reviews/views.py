@@ -1,3 +1,129 @@
-from django.shortcuts import render
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from apps.courses.models import CourseStats, Lesson
+from apps.courses.pagination import KeysetPagination
+from apps.reviews.models import Answer, CourseReview, Question
+from apps.reviews.questions import thread_queryset
+from apps.reviews.serializer import RECENT_REVIEWS, AnswerSerializer, InboxQuestionSerializer, QuestionSerializer, \
+    RatingSummarySerializer, RecentReviewSerializer
+from core.openapi import openapi, swagger_auto_schema
+
+ORDERING_PARAMETERS = [
+    openapi.Parameter('ordering', openapi.IN_QUERY, description="created_at yoki -created_at (standart: -created_at)", type=openapi.TYPE_STRING),
+    openapi.Parameter('cursor', openapi.IN_QUERY, description="Sahifa kursori (javobdagi next/previous havolalaridan olinadi)", type=openapi.TYPE_STRING),
+    openapi.Parameter('page_size', openapi.IN_QUERY, description="Sahifadagi yozuvlar soni (standart 20, maksimal 100)", type=openapi.TYPE_INTEGER),
+]
+
+
+class CourseReviewsAPIView(APIView):
+    """A course's reviews, newest first by default, walked along review_course_date_idx."""
+
+    # the page with the reviewers' usernames joined in
+    query_budget = 1
+    replica_reads = True
+
+    @swagger_auto_schema(manual_parameters=ORDERING_PARAMETERS, responses={200: RecentReviewSerializer(many=True)})
+    def get(self, request, course_id):
+        paginator = KeysetPagination(orderings={'created_at': 'created_at'}, default_ordering='-created_at')
+        reviews = CourseReview.objects.filter(course_id=course_id).select_related('student')
+        page = paginator.paginate_queryset(reviews, request, view=self)
+        return paginator.get_paginated_response(RecentReviewSerializer(page, many=True).data)
+
+
+class CourseRatingAPIView(APIView):
+    """
+    Average, star histogram and newest reviews of a course. The histogram is
+    kept in CourseStats by the review signals, so no GROUP BY over the
+    reviews runs here.
+    """
+
+    query_budget = 2
+    replica_reads = True
+
+    @swagger_auto_schema(responses={200: RatingSummarySerializer})
+    def get(self, request, course_id):
+        stats = CourseStats.objects.filter(pk=course_id).first()
+        if stats is None:
+            return Response({"error": "Course not found"}, status=404)
+        stats.recent = (
+            CourseReview.objects.filter(course_id=course_id).select_related('student')
+            .order_by('-created_at', '-id')[:RECENT_REVIEWS]
+        )
+        return Response(RatingSummarySerializer(stats).data)
+
+
+class QuestionPageMixin:
+    orderings = {'created_at': 'created_at'}
+    default_ordering = '-created_at'
+    # the page of questions with their authors, then every answer of the page
+    query_budget = 2
+    replica_reads = True
+
+    def paginated(self, request, questions, serializer_class):
+        paginator = KeysetPagination(orderings=self.orderings, default_ordering=self.default_ordering)
+        page = paginator.paginate_queryset(questions, request, view=self)
+        return paginator.get_paginated_response(serializer_class(page, many=True).data)
+
+
+class LessonQuestionsAPIView(QuestionPageMixin, APIView):
+
+    @swagger_auto_schema(manual_parameters=ORDERING_PARAMETERS, responses={200: QuestionSerializer(many=True)})
+    def get(self, request, lesson_id):
+        return self.paginated(request, thread_queryset().filter(lesson_id=lesson_id), QuestionSerializer)
+
+    @swagger_auto_schema(request_body=QuestionSerializer, responses={201: QuestionSerializer})
+    def post(self, request, lesson_id):
+        if not Lesson.objects.filter(pk=lesson_id).exists():
+            return Response({"error": "Lesson not found"}, status=404)
+        serializer = QuestionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(lesson_id=lesson_id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class InstructorQuestionsAPIView(QuestionPageMixin, APIView):
+    """The instructor's inbox: questions across all their lessons, by default only those without their answer."""
+
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter('status', openapi.IN_QUERY, description="unanswered — instruktor javob bermagan savollar (standart), all — barchasi", type=openapi.TYPE_STRING),
+            *ORDERING_PARAMETERS,
+        ],
+        responses={200: InboxQuestionSerializer(many=True)},
+    )
+    def get(self, request, pk):
+        question_status = request.query_params.get('status', 'unanswered')
+        if question_status not in ('unanswered', 'all'):
+            raise ValidationError({"status": "Status must be one of: all, unanswered."})
+
+        questions = thread_queryset().select_related('lesson__section').filter(instructor_id=pk)
+        if question_status == 'unanswered':
+            questions = questions.filter(has_instructor_answer=False)
+        return self.paginated(request, questions, InboxQuestionSerializer)
+
+
+class QuestionAnswersAPIView(APIView):
+
+    @swagger_auto_schema(request_body=AnswerSerializer, responses={201: AnswerSerializer})
+    def post(self, request, pk):
+        question = Question.objects.filter(pk=pk).values('id', 'instructor__user_id').first()
+        if question is None:
+            return Response({"error": "Question not found"}, status=404)
+        serializer = AnswerSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        is_instructor = serializer.validated_data['user'].pk == question['instructor__user_id']
+        serializer.save(question_id=pk, is_instructor_answer=is_instructor)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class AnswerDeleteAPIView(APIView):
+
+    def delete(self, request, pk):
+        answer = Answer.objects.filter(pk=pk).first()
+        if answer is None:
+            return Response({"error": "Answer not found"}, status=404)
+        answer.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
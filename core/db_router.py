@@ -0,0 +1,88 @@
+import contextvars
+import random
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_routing = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    """
+    Per-request routing decision. ``use_replica`` is switched on for safe
+    requests to views that opt in with ``replica_reads = True``; ``wrote``
+    flips on the first write and keeps the rest of the request on the primary.
+    The object is shared, not copied, with the threads the async ORM runs on,
+    so a write made there is seen by the request.
+    """
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.use_replica = False
+        self.wrote = False
+
+    @property
+    def reads_from_replica(self):
+        return self.use_replica and not self.pinned and not self.wrote
+
+
+def start_request(pinned=False):
+    state = RoutingState(pinned)
+    return state, _routing.set(state)
+
+
+def end_request(token):
+    _routing.reset(token)
+
+
+def read_from_primary():
+    """
+    Sends the remaining reads of the current request to the primary, e.g.
+    when they build something that outlives the request and must not lag
+    behind a write other clients have already seen.
+    """
+    state = _routing.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def replica_aliases():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of opted-in views to a random replica and everything else to
+    the primary: writes, reads in other requests, management commands and
+    workers, and reads inside a transaction. A client that wrote is pinned to
+    the primary for ``REPLICA_PIN_SECONDS`` through a cookie (see
+    ``core.middleware.ReplicaRoutingMiddleware``) so it reads its own writes
+    while the replicas catch up.
+
+    Replicas are full copies of the primary, so only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or not state.reads_from_replica:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        replicas = replica_aliases()
+        return random.choice(replicas) if replicas else None
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in replica_aliases():
+            return False
+        return None
@@ -0,0 +1,276 @@
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from rest_framework import serializers
+
+from core import db_router
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SAMPLE_RATE': 0.01,          # share of requests that are instrumented
+    'SLOW_QUERY_MS': 100,         # a single query slower than this is logged
+    'REPEATED_QUERY_THRESHOLD': 5,  # the same SQL this many times in one request looks like N+1
+    'FORCE_HEADER': 'X-Request-Timing',  # instruments the request regardless of sampling, DEBUG only
+}
+
+_metrics = contextvars.ContextVar('request_metrics', default=None)
+
+
+def instrumentation_settings():
+    return {**DEFAULTS, **getattr(settings, 'REQUEST_INSTRUMENTATION', {})}
+
+
+class RequestMetrics:
+    def __init__(self, slow_query_ms):
+        self.slow_query_ms = slow_query_ms
+        self.queries = 0
+        self.db_ms = 0.0
+        self.serialize_ms = 0.0
+        self.serialize_depth = 0
+        self.render_started = None
+        self.render_ms = 0.0
+        self.sql_counts = Counter()
+        self.slow_queries = []
+
+    def record(self, sql, elapsed):
+        self.queries += 1
+        self.db_ms += elapsed
+        self.sql_counts[sql] += 1
+        if elapsed >= self.slow_query_ms:
+            self.slow_queries.append({'sql': sql[:500], 'ms': round(elapsed, 2)})
+
+
+def _record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection. It reads the request's
+    metrics from a context variable, which asgiref copies into the threads
+    the async ORM runs queries on, so it sees the queries of sync and async
+    views alike; outside a sampled request it only costs that lookup.
+    """
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record(sql, (time.perf_counter() - started) * 1000)
+
+
+def _install_query_recorder(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+connection_created.connect(_install_query_recorder)
+
+
+@contextlib.contextmanager
+def timed_serialization():
+    """Adds the time spent in the block to the instrumented request's ``serialize`` metric."""
+    metrics = _metrics.get()
+    if metrics is None:
+        yield
+        return
+    # serialization started inside another timed block is already inside its time
+    metrics.serialize_depth += 1
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serialize_depth -= 1
+        if not metrics.serialize_depth:
+            metrics.serialize_ms += (time.perf_counter() - started) * 1000
+
+
+class TimedSerializerMixin:
+    """
+    Times the project's response serializers with ``timed_serialization``.
+    Only the outermost one is timed (each item of a ``many=True`` root),
+    since nested serializers run inside its time.
+    """
+
+    def to_representation(self, instance):
+        parent = self.parent
+        if parent is None or (isinstance(parent, serializers.ListSerializer) and parent.parent is None):
+            with timed_serialization():
+                return super().to_representation(instance)
+        return super().to_representation(instance)
+
+
+class RequestInstrumentationMiddleware:
+    """
+    Records SQL count and time, serializer time and render time for a sample
+    of requests. They are returned in a ``Server-Timing`` header and logged as
+    one JSON line, together with repeated identical queries (likely N+1),
+    slow queries and views that exceed their ``query_budget``.
+
+    Requests outside the sample only pay for one ``random()`` call. Works in
+    both sync and async stacks, so async views are not pushed onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = instrumentation_settings()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self, request):
+        if settings.DEBUG and request.headers.get(self.config['FORCE_HEADER']):
+            return True
+        return random.random() < self.config['SAMPLE_RATE']
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled(request):
+            return self.get_response(request)
+
+        metrics = RequestMetrics(self.config['SLOW_QUERY_MS'])
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        if not self.sampled(request):
+            return await self.get_response(request)
+
+        metrics = RequestMetrics(self.config['SLOW_QUERY_MS'])
+        token = _metrics.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _metrics.reset(token)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={metrics.db_ms:.1f};desc="{metrics.queries} queries"',
+            f'serialize;dur={metrics.serialize_ms:.1f}',
+            f'render;dur={metrics.render_ms:.1f}',
+            f'total;dur={total_ms:.1f}',
+        ])
+        self.log(request, response, metrics, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns
+        metrics = _metrics.get()
+        if metrics is not None:
+            metrics.render_started = time.perf_counter()
+            response.add_post_render_callback(functools.partial(self.rendered, metrics))
+        return response
+
+    @staticmethod
+    def rendered(metrics, response):
+        metrics.render_ms += (time.perf_counter() - metrics.render_started) * 1000
+
+    def log(self, request, response, metrics, total_ms):
+        threshold = self.config['REPEATED_QUERY_THRESHOLD']
+        repeated = [
+            {'sql': sql[:500], 'count': count}
+            for sql, count in metrics.sql_counts.most_common() if count >= threshold
+        ]
+        match = getattr(request, 'resolver_match', None)
+        view_class = getattr(match.func, 'view_class', None) if match else None
+        budget = getattr(view_class, 'query_budget', None)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 2),
+            'db_ms': round(metrics.db_ms, 2),
+            'queries': metrics.queries,
+            'serialize_ms': round(metrics.serialize_ms, 2),
+            'render_ms': round(metrics.render_ms, 2),
+        }
+        problems = {}
+        if repeated:
+            problems['repeated_queries'] = repeated
+        if metrics.slow_queries:
+            problems['slow_queries'] = metrics.slow_queries
+        if budget is not None and metrics.queries > budget:
+            problems['query_budget'] = budget
+        record.update(problems)
+
+        line = json.dumps(record, ensure_ascii=False)
+        if problems:
+            logger.warning(line)
+        else:
+            logger.info(line)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets ``core.db_router.PrimaryReplicaRouter`` send the reads of safe
+    requests to views with ``replica_reads = True`` to a replica. A request
+    that writes sets a short-lived cookie that keeps the client on the
+    primary until the replicas have caught up.
+    """
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        self.cookie_name = getattr(settings, 'REPLICA_PIN_COOKIE', 'db_pin')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def pinned(self, request):
+        try:
+            return float(request.COOKIES.get(self.cookie_name, 0)) > time.time()
+        except ValueError:
+            return False
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state, token = db_router.start_request(self.pinned(request))
+        request.db_routing = state
+        try:
+            response = self.get_response(request)
+        finally:
+            db_router.end_request(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state, token = db_router.start_request(self.pinned(request))
+        request.db_routing = state
+        try:
+            response = await self.get_response(request)
+        finally:
+            db_router.end_request(token)
+        return self.finish(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        request.db_routing.use_replica = (
+            request.method in self.SAFE_METHODS and getattr(view_class, 'replica_reads', False)
+        )
+
+    def finish(self, response, state):
+        if state.wrote:
+            until = time.time() + self.pin_seconds
+            response.set_cookie(self.cookie_name, f'{until:.3f}', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,138 @@
+"""
+OpenAPI documentation that API workers don't pay for.
+
+Views take ``swagger_auto_schema`` and ``openapi`` from here instead of from
+drf_yasg. With ``settings.API_DOCS`` on they are drf_yasg's own; with it off
+they are inert stand-ins, drf_yasg is never imported and the doc URLs are not
+routed.
+
+The schema is generated once per deploy by the ``generate_openapi`` command
+into ``settings.OPENAPI_SCHEMA_DIR`` (or, when the files are missing, on the
+first schema request) and served from memory with an ETag, instead of
+drf_yasg inspecting every view and serializer on each request.
+"""
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import condition, require_safe
+
+# served format -> content type
+FORMATS = {'json': 'application/json', 'yaml': 'application/yaml'}
+
+if settings.API_DOCS:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+    def _inert(*args, **kwargs):
+        return None
+
+    class _InertOpenAPI:
+        """Stands in for ``drf_yasg.openapi``: every name is a callable that accepts anything and returns None."""
+
+        def __getattr__(self, name):
+            return _inert
+
+    openapi = _InertOpenAPI()
+
+    def swagger_auto_schema(**kwargs):
+        return lambda view_method: view_method
+
+
+def api_info():
+    return openapi.Info(
+        title="E-Learning API",
+        default_version='v1',
+        description="API documentation for E-Learning platform",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="youremail@example.com"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema():
+    """The full schema; inspects every view and serializer, so it runs once per deploy."""
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    return OpenAPISchemaGenerator(api_info()).get_schema(request=None, public=True)
+
+
+def encode_schema(schema):
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+
+    return {
+        'json': OpenAPICodecJson(validators=[]).encode(schema),
+        'yaml': OpenAPICodecYaml(validators=[]).encode(schema),
+    }
+
+
+def schema_path(fmt):
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'schema.{fmt}'
+
+
+def write_schema():
+    """Generates the schema and writes every format to disk; returns the paths written."""
+    documents = encode_schema(generate_schema())
+    Path(settings.OPENAPI_SCHEMA_DIR).mkdir(parents=True, exist_ok=True)
+    paths = []
+    for fmt, body in documents.items():
+        path = schema_path(fmt)
+        # replaced in one step, so a worker starting meanwhile reads the old file or the new one
+        temporary = path.with_name(f'.{path.name}.{os.getpid()}')
+        temporary.write_bytes(body)
+        os.replace(temporary, path)
+        paths.append(path)
+    return paths
+
+
+_lock = threading.Lock()
+_documents = {}
+
+
+def schema_document(fmt):
+    """``(body, etag)`` of the schema in ``fmt``, loaded once per process."""
+    if not _documents:
+        with _lock:
+            if not _documents:
+                try:
+                    bodies = {name: schema_path(name).read_bytes() for name in FORMATS}
+                except FileNotFoundError:
+                    bodies = encode_schema(generate_schema())
+                _documents.update(
+                    (name, (body, hashlib.sha1(body).hexdigest()[:20])) for name, body in bodies.items()
+                )
+    return _documents[fmt]
+
+
+@require_safe
+@condition(etag_func=lambda request, format: schema_document(format.lstrip('.'))[1])
+def schema_view(request, format):
+    fmt = format.lstrip('.')
+    body, _ = schema_document(fmt)
+    response = HttpResponse(body, content_type=FORMATS[fmt])
+    # clients keep their copy but revalidate it, since a deploy can change the schema
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def docs_ui_view(renderer):
+    """Swagger UI or ReDoc page; the page loads the prebuilt schema from ``SPEC_URL``."""
+    from drf_yasg.renderers import ReDocRenderer, SwaggerUIRenderer
+    from rest_framework.permissions import AllowAny
+    from rest_framework.response import Response
+    from rest_framework.views import APIView
+
+    class DocsUIView(APIView):
+        renderer_classes = [{'swagger': SwaggerUIRenderer, 'redoc': ReDocRenderer}[renderer]]
+        permission_classes = [AllowAny]
+        # not an API endpoint, so left out of the schema
+        swagger_schema = None
+
+        def get(self, request):
+            # the renderers only read the title and version from it
+            return Response(openapi.Swagger(info=api_info(), _prefix='/', paths=openapi.Paths({})))
+
+    return DocsUIView.as_view()
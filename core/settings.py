@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -25,6 +27,8 @@ SECRET_KEY = 'django-insecure-)30dv0v5&=c5!dgu9(al-8^$ewljj+qa6$y(qp&^5ll0*^4#t)
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+TESTING = sys.argv[1:2] == ['test']
+
 ALLOWED_HOSTS = []
 
 
@@ -39,12 +43,21 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'rest_framework',
-    'drf_yasg',
 
     'apps.courses',
+    'apps.enrolments',
+    'apps.reviews',
+    'apps.analytics',
 ]
 
+# Swagger/ReDoc and the OpenAPI schema; API workers run with API_DOCS=0 and never import drf_yasg
+API_DOCS = os.environ.get('API_DOCS', '1') == '1'
+if API_DOCS:
+    INSTALLED_APPS.append('drf_yasg')
+
 MIDDLEWARE = [
+    'core.middleware.RequestInstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -77,14 +90,56 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Connections are kept open between requests for CONN_MAX_AGE seconds and
+# checked before reuse, so a dropped connection is replaced instead of failing.
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+}
+
+# Read replicas, see core/db_router.py. Locally they are SQLite files listed in
+# DATABASE_REPLICA_FILES (separated by os.pathsep) and refreshed from the
+# primary with the sync_replicas command.
+DATABASE_REPLICAS = []
+for number, replica_file in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_FILES', '').split(os.pathsep)), 1):
+    alias = f'replica{number}'
+    DATABASES[alias] = {**DATABASES['default'], 'NAME': replica_file, 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+if TESTING:
+    # a mirror of the test database for the routing tests in core/tests.py,
+    # which switch it on with DATABASE_REPLICAS = ['replica']
+    DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
+# After a write the client reads from the primary for this many seconds
+REPLICA_PIN_SECONDS = 5
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Response caches are invalidated by bumping versions stored here, so every
+# worker must share it: use Redis or Memcached when running more than one process.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'e-learning',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
     }
 }
 
 
+# Full-text search over the course catalogue, see apps/courses/search.py.
+# Use 'apps.courses.search.DatabaseSearchBackend' on databases without FTS5.
+COURSE_SEARCH_BACKEND = 'apps.courses.search.SQLiteFTSBackend'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -121,6 +176,37 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Per-request SQL/serializer/render timings, see core/middleware.py. REQUEST_SAMPLE_RATE
+# overrides the share of requests measured; the test runner measures none, so
+# ``manage.py test`` doesn't print a log line per request
+REQUEST_INSTRUMENTATION = {
+    'SAMPLE_RATE': float(os.environ.get('REQUEST_SAMPLE_RATE', 0.0 if TESTING else 1.0 if DEBUG else 0.01)),
+    'SLOW_QUERY_MS': 100,
+    'REPEATED_QUERY_THRESHOLD': 5,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'core.middleware': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# Prebuilt OpenAPI schema, written by the generate_openapi command; see core/openapi.py
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
+# the doc UIs load the prebuilt schema instead of having drf_yasg generate one per page view
+SWAGGER_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+REDOC_SETTINGS = {'SPEC_URL': ('schema-json', {'format': '.json'})}
+
+# Rendered certificates, written by the issue_certificates worker
+CERTIFICATE_ROOT = BASE_DIR / 'media' / 'certificates'
+CERTIFICATE_BASE_URL = 'http://localhost:8000/media/certificates/'
+CERTIFICATE_NUMBER_PREFIX = 'EL'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
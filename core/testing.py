@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.courses.models import Course, Lesson
+from apps.courses.tree import get_category_tree
+
+
+class CatalogueTestCase(TestCase):
+    """
+    TestCase over a small catalogue made by the ``seed_data`` command, with a
+    fixed random seed so every run sees the same rows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'seed_data', instructors=2, categories=2, courses=6, sections=2, lessons=3, students=12,
+            enrollments=3, questions=6, seed=1, stdout=StringIO(),
+        )
+        cls.course = Course.objects.order_by('id').first()
+        cls.lesson = Lesson.objects.filter(section__course=cls.course).order_by('id').first()
+
+    def setUp(self):
+        # response caches live in the process-wide cache; every test starts cold
+        cache.clear()
+
+
+class QueryBudgetMixin:
+    """
+    Requests every GET endpoint of ``urls`` that declares a ``query_budget``,
+    bare and with the query strings in ``variants``, and fails if one runs
+    more SQL queries than its view allows. ``url_kwargs`` fills the url
+    parameters.
+    """
+    urls = None
+    variants = {}
+
+    def url_kwargs(self):
+        return {'pk': self.course.pk, 'course_id': self.course.pk, 'lesson_id': self.lesson.pk}
+
+    # queries are counted on the primary
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_query_budgets(self):
+        # the category tree is built once per process and version, not per request
+        get_category_tree()
+        samples = self.url_kwargs()
+        for pattern in self.urls.urlpatterns:
+            budget = getattr(getattr(pattern.callback, 'view_class', None), 'query_budget', None)
+            if budget is None:
+                continue
+            url = reverse(
+                f'{self.urls.app_name}:{pattern.name}',
+                kwargs={name: samples[name] for name in pattern.pattern.converters},
+            )
+            for query in [''] + self.variants.get(pattern.name, []):
+                full_url = f'{url}?{query}' if query else url
+                with self.subTest(url=full_url), CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(full_url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertLessEqual(
+                        len(ctx.captured_queries), budget,
+                        '\n'.join([f"{full_url} ran more than {budget} queries:"] + [q['sql'] for q in ctx.captured_queries]),
+                    )
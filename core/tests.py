@@ -0,0 +1,197 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.courses.models import Course
+from apps.courses.tests import course_payload
+from apps.courses.views import CourseDetailAPIView
+from core import openapi
+from core.db_router import PrimaryReplicaRouter, end_request, start_request
+from core.testing import CatalogueTestCase
+
+SAMPLE_ALL = {'SAMPLE_RATE': 1.0, 'SLOW_QUERY_MS': 100, 'REPEATED_QUERY_THRESHOLD': 5}
+SAMPLE_NONE = {**SAMPLE_ALL, 'SAMPLE_RATE': 0.0}
+
+
+def server_timing(response):
+    """``{metric: (duration, description)}`` of the Server-Timing header."""
+    return {
+        name: (float(duration), description)
+        for name, duration, description in re.findall(r'(\w+);dur=([0-9.]+)(?:;desc="([^"]*)")?', response['Server-Timing'])
+    }
+
+
+class RequestInstrumentationTests(CatalogueTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('courses:detail', kwargs={'pk': self.course.pk})
+
+    @override_settings(REQUEST_INSTRUMENTATION=SAMPLE_ALL)
+    def test_sampled_requests_get_server_timing_and_a_log_line(self):
+        with self.assertLogs('core.middleware', 'INFO') as logs, CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+
+        timing = server_timing(response)
+        self.assertEqual(set(timing), {'db', 'serialize', 'render', 'total'})
+        self.assertEqual(timing['db'][1], f'{len(ctx.captured_queries)} queries')
+        # the detail view serializes a model instance, so serializer time is measured
+        self.assertGreater(timing['serialize'][0], 0)
+        self.assertGreaterEqual(timing['total'][0], timing['serialize'][0])
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, 'INFO')
+        self.assertEqual(
+            (record['view'], record['status'], record['queries']), ('courses:detail', 200, len(ctx.captured_queries)),
+        )
+
+    @override_settings(REQUEST_INSTRUMENTATION=SAMPLE_NONE)
+    def test_requests_outside_the_sample_are_not_measured(self):
+        with self.assertNoLogs('core.middleware'):
+            response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(REQUEST_INSTRUMENTATION=SAMPLE_NONE, DEBUG=True)
+    def test_force_header_measures_outside_the_sample_in_debug(self):
+        with self.assertLogs('core.middleware', 'INFO'):
+            response = self.client.get(self.url, headers={'X-Request-Timing': '1'})
+        self.assertIn('Server-Timing', response)
+
+    @override_settings(REQUEST_INSTRUMENTATION=SAMPLE_ALL)
+    def test_exceeding_the_query_budget_is_a_warning(self):
+        with mock.patch.object(CourseDetailAPIView, 'query_budget', 0), self.assertLogs('core.middleware') as logs:
+            self.client.get(self.url)
+        self.assertEqual(logs.records[0].levelname, 'WARNING')
+        self.assertEqual(json.loads(logs.records[0].getMessage())['query_budget'], 0)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(TransactionTestCase):
+    """``replica`` mirrors the test database (see core/settings.py); queries are counted per connection."""
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        call_command(
+            'seed_data', instructors=1, categories=1, courses=3, students=3, enrollments=1, questions=1, seed=1,
+            stdout=StringIO(),
+        )
+        cache.clear()
+        self.course = Course.objects.order_by('id').first()
+        self.list_url = reverse('courses:list-detail-course')
+
+    def request(self, method, url, **kwargs):
+        """The response and the number of queries it ran on the primary and on the replica."""
+        with CaptureQueriesContext(connections['default']) as primary, CaptureQueriesContext(connections['replica']) as replica:
+            response = getattr(self.client, method)(url, **kwargs)
+        return response, len(primary), len(replica)
+
+    def test_reads_of_opted_in_views_go_to_the_replica(self):
+        response, primary, replica = self.request('get', self.list_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_writes_go_to_the_primary_and_pin_the_client(self):
+        response, primary, replica = self.request(
+            'post', reverse('courses:create-course'), data=course_payload(self.course, 'Routed'),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual((primary > 0, replica), (True, 0))
+        self.assertGreater(float(response.cookies['db_pin'].value), time.time())
+
+        # the cookie keeps the client's reads on the primary until the replicas have caught up
+        response, primary, replica = self.request('get', self.list_url)
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        self.client.cookies['db_pin'] = f'{time.time() - 1:.3f}'
+        response, primary, replica = self.request('get', self.list_url)
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_cache_misses_are_built_from_the_primary(self):
+        url = reverse('courses:detail', kwargs={'pk': self.course.pk})
+        response, primary, replica = self.request('get', url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        response, primary, replica = self.request('get', url)
+        self.assertEqual((response['X-Cache'], primary, replica), ('HIT', 0, 0))
+
+    def test_reads_outside_requests_and_inside_transactions_use_the_primary(self):
+        router = PrimaryReplicaRouter()
+        self.assertIsNone(router.db_for_read(Course))
+
+        state, token = start_request()
+        try:
+            state.use_replica = True
+            self.assertEqual(router.db_for_read(Course), 'replica')
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Course))
+            self.assertEqual(router.db_for_write(Course), 'default')
+            self.assertIsNone(router.db_for_read(Course))
+        finally:
+            end_request(token)
+
+
+@skipUnless(settings.API_DOCS, "the schema is only routed with API_DOCS")
+class OpenAPISchemaTests(SimpleTestCase):
+
+    def setUp(self):
+        schema_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(schema_dir.cleanup)
+        self.enterContext(override_settings(OPENAPI_SCHEMA_DIR=schema_dir.name))
+        # the documents are loaded once per process
+        openapi._documents.clear()
+        self.addCleanup(openapi._documents.clear)
+
+    def test_prebuilt_schema_is_served_with_an_etag(self):
+        paths = openapi.write_schema()
+        self.assertEqual(sorted(path.name for path in paths), ['schema.json', 'schema.yaml'])
+
+        for fmt in openapi.FORMATS:
+            with self.subTest(fmt=fmt):
+                url = reverse('schema-json', kwargs={'format': f'.{fmt}'})
+                response = self.client.get(url)
+                self.assertEqual((response.status_code, response['Cache-Control']), (200, 'no-cache'))
+                self.assertEqual(response.content, openapi.schema_path(fmt).read_bytes())
+
+                response = self.client.get(url, headers={'If-None-Match': response['ETag']})
+                self.assertEqual((response.status_code, response.content), (304, b''))
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': '"stale"'}).status_code, 200)
+
+    def test_missing_files_are_generated_on_the_first_request(self):
+        response = self.client.get(reverse('schema-json', kwargs={'format': '.json'}))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('/courses/list/', json.loads(response.content)['paths'])
+
+
+class APIDocsOffTests(SimpleTestCase):
+
+    def test_api_workers_run_without_drf_yasg(self):
+        script = (
+            "import sys, django; django.setup(); "
+            "from django.urls import get_resolver; "
+            "import apps.courses.views, apps.courses.async_views, apps.enrolments.views, apps.reviews.views, "
+            "apps.analytics.views; "
+            "names = get_resolver().reverse_dict.keys(); "
+            "assert 'drf_yasg' not in sys.modules, 'drf_yasg was imported'; "
+            "assert 'schema-json' not in names, 'the schema is routed'"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, 'API_DOCS': '0', 'DJANGO_SETTINGS_MODULE': 'core.settings'},
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
@@ -14,30 +14,24 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, re_path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="E-Learning API",
-        default_version='v1',
-        description="API documentation for E-Learning platform",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="youremail@example.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/courses/', include('apps.courses.urls',namespace='courses')),
-    # Swagger URL-lar
-    re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+    path('api/enrolments/', include('apps.enrolments.urls',namespace='enrolments')),
+    path('api/reviews/', include('apps.reviews.urls',namespace='reviews')),
+    path('api/analytics/', include('apps.analytics.urls',namespace='analytics')),
 ]
+
+if settings.API_DOCS:
+    from core.openapi import docs_ui_view, schema_view
+
+    # Swagger URL-lar: the schema is prebuilt by generate_openapi and served from memory
+    urlpatterns += [
+        re_path(r'^swagger(?P<format>\.json|\.yaml)$', schema_view, name='schema-json'),
+        path('swagger/', docs_ui_view('swagger'), name='schema-swagger-ui'),
+        path('redoc/', docs_ui_view('redoc'), name='schema-redoc'),
+    ]